@@ -1,19 +1,195 @@
 # backend/app/__init__.py
 
-from flask import Flask
+import os
+import secrets
+
+from flask import Flask, request
 from flask_cors import CORS
 
+from app.data_manager import configure_shards, configure_storage, configure_writes, warm_up
+from app.json_provider import create_json_provider
+from app.services.images import THUMBNAIL_WORKERS, configure_images
+from app.services.session_service import SESSION_MAX_ENTRIES, SESSION_TTL_SECONDS, configure_sessions
+
 def create_app():
     app = Flask(__name__)
     CORS(app)
 
+    # Codificador JSON das respostas: JSON_PROVIDER=auto (orjson se instalado), orjson ou stdlib
+    app.json = create_json_provider(app, os.environ.get("JSON_PROVIDER", "auto"))
+
+    # Divide imóveis e reservas em DATA_SHARDS arquivos (1 = arquivo único)
+    configure_shards(int(os.environ.get("DATA_SHARDS", 1)))
+
+    # Nível de durabilidade das escritas: sync (padrão), fsync, batched ou shutdown.
+    # Em batched, as escritas são gravadas em lotes em segundo plano.
+    configure_writes(
+        durability=os.environ.get("DATA_DURABILITY", "sync"),
+        interval=float(os.environ.get("DATA_FLUSH_INTERVAL", 1.0)),
+        batch_size=int(os.environ.get("DATA_FLUSH_BATCH", 500)),
+    )
+
+    # Formato dos arquivos das coleções: DATA_FORMAT=json (padrão), jsonl ou binary,
+    # com exceções por coleção (ex.: "jsonl,reservations=binary")
+    default_format, format_overrides = "json", {}
+    for item in filter(None, (i.strip() for i in os.environ.get("DATA_FORMAT", "json").split(","))):
+        name, _, fmt = item.rpartition("=")
+        if name:
+            format_overrides[name.strip()] = fmt.strip()
+        else:
+            default_format = fmt
+    configure_storage(default_format, format_overrides)
+
+    # Imagens enviadas dos imóveis (ver app/services/images.py)
+    configure_images(
+        os.environ.get("IMAGE_DIR", "images"),
+        workers=int(os.environ.get("THUMBNAIL_WORKERS", THUMBNAIL_WORKERS)),
+    )
+
+    # Sessões: SECRET_KEY assina os tokens emitidos no login. Sem ela, uma chave
+    # aleatória é gerada e as sessões deixam de valer quando o processo reinicia.
+    # SESSION_REQUIRED=off volta a aceitar, nas rotas que recebem o ID do usuário,
+    # requisições sem token (modo obsoleto, para clientes antigos).
+    configure_sessions(
+        os.environ.get("SECRET_KEY") or secrets.token_hex(32),
+        ttl_seconds=int(os.environ.get("SESSION_TTL", SESSION_TTL_SECONDS)),
+        max_entries=int(os.environ.get("SESSION_MAX_ENTRIES", SESSION_MAX_ENTRIES)),
+        required=os.environ.get("SESSION_REQUIRED", "on") != "off",
+    )
+
+    # Replicação: REPLICATION_ROLE=primary publica as alterações em REPLICATION_DIR;
+    # REPLICATION_ROLE=follower é uma réplica de leitura que carrega as coleções de lá
+    replication_role = os.environ.get("REPLICATION_ROLE")
+    replication_dir = os.environ.get("REPLICATION_DIR", "replication")
+    if replication_role not in (None, "", "primary", "follower"):
+        raise ValueError(f"Papel de replicação inválido: {replication_role}")
+
+    if replication_role == "follower":
+        from app.services.replication import init_follower
+        init_follower(replication_dir)
+    else:
+        # Carrega as coleções de data/*.json antes da primeira requisição.
+        # DATA_LOAD_MODE=lazy adia a carga de cada coleção para o primeiro acesso.
+        warm_up(
+            mode=os.environ.get("DATA_LOAD_MODE", "eager"),
+            executor=os.environ.get("DATA_LOAD_EXECUTOR", "thread"),
+        )
+
     # Importa e registra as rotas
     from app.routes.auth_routes import auth_bp
     from app.routes.locador_routes import locador_bp
     from app.routes.locatario_routes import locatario_bp
+    from app.routes.replication_routes import replication_bp
+    from app.routes.image_routes import image_bp
+    from app.routes.job_routes import job_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(locador_bp, url_prefix='/api/locador')
     app.register_blueprint(locatario_bp, url_prefix='/api/locatario')
+    app.register_blueprint(replication_bp, url_prefix='/api/replication')
+    app.register_blueprint(image_bp, url_prefix='/api/images')
+    app.register_blueprint(job_bp, url_prefix='/api/jobs')
+
+    # Controle de admissão: limite de taxa por usuário/IP em cada blueprint e de
+    # requisições simultâneas nas rotas caras (ver app/admission.py)
+    from app.admission import (DEFAULT_CONCURRENCY_LIMITS, DEFAULT_RATE_LIMITS, parse_limits,
+                               parse_rate, register_admission)
+    register_admission(
+        app,
+        rate_limits=parse_limits(os.environ.get("RATE_LIMITS"), DEFAULT_RATE_LIMITS, parse_rate),
+        concurrency_limits=parse_limits(os.environ.get("CONCURRENCY_LIMITS"), DEFAULT_CONCURRENCY_LIMITS, int),
+    )
+
+    # Compressão gzip/br das respostas conforme o Accept-Encoding (ver app/compression.py)
+    if os.environ.get("COMPRESSION", "on") != "off":
+        from app.compression import BR_LEVEL, GZIP_LEVEL, MIN_SIZE, register_compression
+        register_compression(
+            app,
+            min_size=int(os.environ.get("COMPRESSION_MIN_SIZE", MIN_SIZE)),
+            gzip_level=int(os.environ.get("COMPRESSION_GZIP_LEVEL", GZIP_LEVEL)),
+            br_level=int(os.environ.get("COMPRESSION_BR_LEVEL", BR_LEVEL)),
+        )
+
+    # Tarefas de manutenção, executadas pelo agendador (ver app/services/scheduler.py):
+    # JOBS_WORKERS threads, JOBS_PROCESS_WORKERS processos, até JOBS_CPU_BUDGET segundos
+    # de CPU por segundo, pausadas com JOBS_PAUSE_IN_FLIGHT requisições em andamento
+    from app.services.scheduler import (CPU_BUDGET, JOB_PROCESS_WORKERS, JOB_WORKERS, PAUSE_IN_FLIGHT,
+                                        PRIORITY_LOW, register_scheduler, scheduler)
+    scheduler.configure(
+        workers=int(os.environ.get("JOBS_WORKERS", JOB_WORKERS)),
+        process_workers=int(os.environ.get("JOBS_PROCESS_WORKERS", JOB_PROCESS_WORKERS)),
+        cpu_budget=float(os.environ.get("JOBS_CPU_BUDGET", CPU_BUDGET)),
+        pause_in_flight=int(os.environ.get("JOBS_PAUSE_IN_FLIGHT", PAUSE_IN_FLIGHT)),
+    )
+    register_scheduler(app)
+
+    # Arquiva periodicamente as estadias encerradas (no primário; réplicas não gravam)
+    archive_interval = float(os.environ.get("RESERVATION_ARCHIVE_INTERVAL", 3600))
+    if archive_interval > 0 and replication_role != "follower":
+        from app.services.archiver import schedule_archiver
+        schedule_archiver(archive_interval)
+
+    # Snapshots periódicos das coleções em BACKUP_DIR (BACKUP_INTERVAL em segundos; 0 desativa)
+    backup_interval = float(os.environ.get("BACKUP_INTERVAL", 0))
+    if backup_interval > 0 and replication_role != "follower":
+        from app.services.backup import schedule_backups
+        schedule_backups(os.environ.get("BACKUP_DIR", "backups"), backup_interval)
+
+    # Expiração das solicitações de reserva pendentes (PENDING_RESERVATION_TTL em segundos,
+    # padrão 3 dias; 0 desativa)
+    from app.services.expiry import PENDING_TTL_SECONDS
+    pending_ttl = float(os.environ.get("PENDING_RESERVATION_TTL", PENDING_TTL_SECONDS))
+    if pending_ttl > 0 and replication_role != "follower":
+        from app.services.expiry import schedule_expiry
+        schedule_expiry(pending_ttl)
+
+    # Remoção periódica de documentos órfãos (VACUUM_INTERVAL em segundos; 0 desativa)
+    vacuum_interval = float(os.environ.get("VACUUM_INTERVAL", 0))
+    if vacuum_interval > 0 and replication_role != "follower":
+        from app.data_manager import vacuum
+        scheduler.add_job("vacuum", vacuum, interval=vacuum_interval, delay=vacuum_interval,
+                          priority=PRIORITY_LOW)
+
+    # Threads em segundo plano. Só são iniciadas na primeira requisição, para
+    # rodar apenas no processo que atende o servidor (e não no processo
+    # monitor do recarregamento automático do modo debug).
+    background_workers = [scheduler.start]
+
+    if replication_role == "primary":
+        from app.services.replication import start_primary
+        snapshot_every = int(os.environ.get("REPLICATION_SNAPSHOT_EVERY", 10000))
+        background_workers.append(lambda: start_primary(replication_dir, snapshot_every))
+
+    if replication_role == "follower":
+        from app.services.replication import start_follower
+        poll_interval = float(os.environ.get("REPLICATION_POLL_INTERVAL", 0.5))
+        background_workers.append(lambda: start_follower(poll_interval))
+
+    @app.before_request
+    def start_background_workers():
+        for start in background_workers:
+            start()
+
+    # Réplicas atendem apenas leituras: escritas são redirecionadas para PRIMARY_URL
+    if replication_role == "follower":
+        from app.routes.helpers import primary_redirect_response
+        from app.services.replication import replica_lag_seconds
+        primary_url = os.environ.get("PRIMARY_URL")
+
+        @app.before_request
+        def redirect_writes_to_primary():
+            if request.method not in ("GET", "HEAD", "OPTIONS"):
+                return primary_redirect_response(primary_url)
+
+        @app.after_request
+        def add_replication_lag(response):
+            lag = replica_lag_seconds()
+            if lag is not None:
+                response.headers["X-Replication-Lag"] = f"{lag:.3f}"
+            return response
+
+    # Comandos de manutenção (flask --app run <comando>)
+    from app.commands import register_commands
+    register_commands(app)
 
     return app
@@ -0,0 +1,238 @@
+"""
+Módulo de controle de admissão das requisições.
+Protege o servidor de rajadas de tráfego antes que as requisições cheguem às rotas:
+- Limite de taxa por usuário (ou por IP, sem sessão) em cada blueprint,
+  com token buckets: 429 com Retry-After quando o limite é excedido
+- Limite de requisições simultâneas nas rotas mais caras (ex.: /search):
+  503 com Retry-After em vez de enfileirar a requisição
+- Contadores das requisições recusadas (GET /api/admission/stats)
+
+Configuração por variáveis de ambiente (lidas em create_app):
+- RATE_LIMITS: "blueprint=taxa:rajada,..." (ex.: "locatario=10:30,auth=2:10");
+  taxa em requisições por segundo e rajada em requisições; "off" desativa
+- CONCURRENCY_LIMITS: "endpoint=máximo,..." (ex.: "locatario.search_properties=8"); "off" desativa
+"""
+
+import math
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from app.services.session_service import get_session
+
+# Limites padrão por blueprint: (requisições por segundo, rajada)
+DEFAULT_RATE_LIMITS = {
+    "locatario": (10.0, 30),
+    "locador": (10.0, 30),
+    "auth": (2.0, 10),
+}
+
+# Máximo de requisições simultâneas por endpoint
+DEFAULT_CONCURRENCY_LIMITS = {
+    "locatario.search_properties": 8,
+}
+
+# Número máximo de clientes acompanhados por blueprint
+MAX_TRACKED_CLIENTS = 100000
+
+# Retry-After das respostas 503 (segundos)
+SHED_RETRY_AFTER = 1
+
+
+class TokenBuckets:
+    """
+    Token buckets por cliente: cada um recebe `rate` fichas por segundo, até
+    `burst`, e cada requisição consome uma ficha.
+
+    Attributes:
+        rate: Fichas por segundo
+        burst: Capacidade de cada bucket
+    """
+
+    def __init__(self, rate, burst, max_clients=MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, client):
+        """
+        Consome uma ficha do bucket do cliente.
+
+        Args:
+            client: Identificação do cliente
+
+        Returns:
+            float: 0 se a requisição foi admitida, ou segundos até haver uma ficha
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            tokens = self.burst if bucket is None else \
+                min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                if bucket is None and len(self._buckets) > self.max_clients:
+                    self._prune(now)
+                return 0.0
+            self._buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now):
+        # Buckets já cheios equivalem a clientes nunca vistos e podem ser descartados
+        full = [client for client, (tokens, last) in self._buckets.items()
+                if tokens + (now - last) * self.rate >= self.burst]
+        for client in full:
+            del self._buckets[client]
+        if len(self._buckets) > self.max_clients:
+            self._buckets.clear()
+
+
+class ConcurrencyLimiter:
+    """
+    Limite de requisições simultâneas; não espera por uma vaga.
+
+    Attributes:
+        limit: Máximo de requisições simultâneas
+        in_flight: Requisições em andamento
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def parse_limits(value, defaults, parse_limit):
+    """
+    Interpreta a configuração de limites de uma variável de ambiente.
+
+    Args:
+        value: Texto "nome=limite,..." ("off" desativa; None usa os padrões)
+        defaults: Limites padrão
+        parse_limit: Função que converte o texto de um limite
+
+    Returns:
+        dict: Limites por nome
+
+    Raises:
+        ValueError: Se o texto estiver em formato inválido
+    """
+    if value is None:
+        return dict(defaults)
+    if value.strip().lower() in ("", "off"):
+        return {}
+    limits = {}
+    for item in value.split(","):
+        name, _, limit = item.partition("=")
+        if not name.strip() or not limit.strip():
+            raise ValueError(f"Limite inválido: {item}")
+        limits[name.strip()] = parse_limit(limit.strip())
+    return limits
+
+
+def parse_rate(value):
+    """
+    Converte "taxa:rajada" (ou só "taxa", com rajada igual à taxa) em (taxa, rajada).
+    """
+    rate, _, burst = value.partition(":")
+    rate = float(rate)
+    burst = int(burst) if burst else max(int(math.ceil(rate)), 1)
+    if rate <= 0 or burst < 1:
+        raise ValueError(f"Limite de taxa inválido: {value}")
+    return rate, burst
+
+
+def _client_id():
+    """
+    Identifica o cliente: usuário da sessão, se houver token válido, ou IP.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        session = get_session(token.strip())
+        if session is not None:
+            return "user:" + session["user_id"]
+    return "ip:" + (request.remote_addr or "")
+
+
+def _reject(status, message, retry_after):
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(int(math.ceil(retry_after)), 1))
+    return response
+
+
+def register_admission(app, rate_limits, concurrency_limits):
+    """
+    Registra o controle de admissão na aplicação.
+
+    Args:
+        app: Aplicação Flask
+        rate_limits: Blueprint -> (requisições por segundo, rajada)
+        concurrency_limits: Endpoint -> máximo de requisições simultâneas
+    """
+    buckets = {name: TokenBuckets(rate, burst) for name, (rate, burst) in rate_limits.items()}
+    limiters = {name: ConcurrencyLimiter(limit) for name, limit in concurrency_limits.items()}
+    stats_lock = threading.Lock()
+    rejected = {"rate_limited": {}, "shed": {}}
+
+    def count(kind, name):
+        with stats_lock:
+            rejected[kind][name] = rejected[kind].get(name, 0) + 1
+
+    @app.before_request
+    def admit_request():
+        if request.method == "OPTIONS":
+            return None
+        bucket = buckets.get(request.blueprint)
+        if bucket is not None:
+            wait = bucket.acquire(_client_id())
+            if wait:
+                count("rate_limited", request.blueprint)
+                return _reject(429, "Muitas requisições, tente novamente em instantes", wait)
+        limiter = limiters.get(request.endpoint)
+        if limiter is not None:
+            if not limiter.try_acquire():
+                count("shed", request.endpoint)
+                return _reject(503, "Servidor sobrecarregado, tente novamente em instantes", SHED_RETRY_AFTER)
+            g.admission_limiter = limiter
+        return None
+
+    @app.teardown_request
+    def release_slot(exc):
+        limiter = g.pop("admission_limiter", None)
+        if limiter is not None:
+            limiter.release()
+
+    @app.route("/api/admission/stats", methods=["GET"])
+    def admission_stats():
+        """
+        Rota com os contadores do controle de admissão.
+
+        Retorna:
+        - rate_limited: Requisições recusadas com 429, por blueprint
+        - shed: Requisições recusadas com 503, por endpoint
+        - in_flight: Requisições em andamento nos endpoints com limite de simultaneidade
+        - limits: Limites configurados
+        """
+        with stats_lock:
+            payload = {kind: dict(counts) for kind, counts in rejected.items()}
+        payload["in_flight"] = {name: limiter.in_flight for name, limiter in limiters.items()}
+        payload["limits"] = {
+            "rate": {name: {"per_second": b.rate, "burst": b.burst} for name, b in buckets.items()},
+            "concurrency": {name: limiter.limit for name, limiter in limiters.items()},
+        }
+        return jsonify(payload)
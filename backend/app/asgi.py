@@ -0,0 +1,213 @@
+"""
+Módulo do modo de execução ASGI.
+Adapta a aplicação Flask (WSGI) para servidores ASGI (ex.: uvicorn), para
+atender muitos clientes simultâneos sem uma thread por conexão:
+- As rotas são executadas em um pool de threads de tamanho fixo (ASGI_WORKERS),
+  que também limita as leituras e gravações em disco do data_manager feitas
+  pelas rotas. O loop asyncio só recebe os corpos e envia as respostas
+- Os streams Server-Sent Events (rotas /stream) rodam no loop asyncio:
+  enquanto esperam por eventos do feed de alterações não ocupam nenhuma
+  thread, então milhares de clientes conectados custam apenas memória. Os
+  eventos recebidos são filtrados (com leituras dos dados) no mesmo pool
+- Rotas declaradas com async def rodam no loop asyncio (no modo WSGI o
+  Flask exige o pacote asgiref para elas)
+- Corpos de requisição grandes (ex.: envio de imagens) são acumulados em um
+  arquivo temporário a partir de MAX_BODY_IN_MEMORY bytes
+
+Uso, a partir de backend/ (o servidor ASGI não faz parte do requirements.txt):
+    pip install uvicorn
+    uvicorn asgi:app --port 5000
+"""
+
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data_manager import flush
+from app.routes.helpers import ASYNC_BODY_ENVIRON_KEY, ASYNC_EXECUTOR_ENVIRON_KEY
+
+# Número de threads que executam as rotas
+ASGI_WORKERS = 32
+
+# Tamanho a partir do qual o corpo da requisição vai para um arquivo temporário
+MAX_BODY_IN_MEMORY = 1024 * 1024
+
+
+class ASGIAdapter:
+    """
+    Aplicação ASGI que executa uma aplicação WSGI em um pool de threads limitado.
+
+    Attributes:
+        wsgi_app: Aplicação WSGI (ex.: Flask)
+        executor: Pool de threads que executa as requisições
+    """
+
+    def __init__(self, wsgi_app, max_workers=ASGI_WORKERS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asgi-worker")
+        self.loop = None
+        if hasattr(wsgi_app, "async_to_sync"):
+            wsgi_app.async_to_sync = self._async_to_sync
+
+    def _async_to_sync(self, func):
+        """
+        Executa uma rota async def no loop do servidor; a thread da requisição aguarda o resultado.
+        """
+        def run(*args, **kwargs):
+            return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), self.loop).result()
+        return run
+
+    async def __call__(self, scope, receive, send):
+        self.loop = asyncio.get_running_loop()
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Tipo de conexão não suportado: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Grava as escritas pendentes (modos write-behind) antes de encerrar
+                await asyncio.get_running_loop().run_in_executor(self.executor, flush)
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        body = tempfile.SpooledTemporaryFile(max_size=MAX_BODY_IN_MEMORY)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return
+            body.write(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        length = body.tell()
+        body.seek(0)
+
+        environ = build_environ(scope, body)
+        # O corpo já foi recebido inteiro: envios em chunks passam a ter tamanho conhecido
+        environ["CONTENT_LENGTH"] = str(length)
+        environ.pop("HTTP_TRANSFER_ENCODING", None)
+        environ[ASYNC_EXECUTOR_ENVIRON_KEY] = self.executor
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                                  for name, value in headers]
+            return lambda data: None
+
+        try:
+            app_iter = await loop.run_in_executor(self.executor, self.wsgi_app, environ, start_response)
+        finally:
+            body.close()
+
+        async_body = environ.get(ASYNC_BODY_ENVIRON_KEY)
+        await send({"type": "http.response.start", "status": started["status"],
+                    "headers": started["headers"]})
+        try:
+            if async_body is not None:
+                await self._send_async_body(async_body, receive, send)
+            else:
+                iterator = iter(app_iter)
+                while True:
+                    chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            close = getattr(app_iter, "close", None)
+            if close is not None:
+                await loop.run_in_executor(self.executor, close)
+
+    async def _send_async_body(self, async_body, receive, send):
+        """
+        Envia um corpo em streaming produzido no loop, até o cliente desconectar.
+        """
+        async def pump():
+            async for chunk in async_body:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(wait_disconnect())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            if tasks[0] in done and tasks[0].exception() is not None:
+                raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def build_environ(scope, body):
+    """
+    Monta o environ WSGI de uma requisição HTTP ASGI.
+
+    Args:
+        scope: Escopo ASGI da requisição
+        body: Arquivo com o corpo da requisição, posicionado no início
+
+    Returns:
+        dict: Environ WSGI
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def create_asgi_app(max_workers=ASGI_WORKERS):
+    """
+    Cria a aplicação (create_app()) e a adapta para ASGI.
+
+    Args:
+        max_workers: Número de threads que executam as rotas
+
+    Returns:
+        ASGIAdapter: Aplicação ASGI
+    """
+    from app import create_app
+    return ASGIAdapter(create_app(), max_workers=max_workers)
@@ -0,0 +1,165 @@
+"""
+Módulo do feed de alterações.
+Registra, em memória, cada escrita feita pelo data_manager como um evento
+com número de sequência, para que clientes possam acompanhar as alterações
+(ex.: via Server-Sent Events) e retomar a leitura a partir do último evento
+recebido.
+
+Os eventos ficam em um buffer circular de tamanho fixo. O cursor de cada
+evento inclui a "época" do processo: depois de um reinício, ou se o cliente
+ficou tanto tempo desconectado que seus eventos já saíram do buffer, a
+leitura sinaliza que ele precisa recarregar o estado completo.
+
+Leitores em threads esperam com read(); leitores em um loop asyncio (modo
+ASGI, ver app/asgi.py) esperam com read_async(), sem ocupar uma thread.
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import deque
+
+# Quantidade de eventos mantidos em memória
+DEFAULT_CAPACITY = 10000
+
+
+class ChangeFeed:
+    """
+    Feed de alterações com números de sequência.
+
+    Attributes:
+        epoch: Identificador desta instância do feed (muda a cada reinício do processo)
+        last_seq: Número de sequência do último evento publicado
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.last_seq = 0
+        self._events = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        # Leitores asyncio em espera: (loop, future)
+        self._async_waiters = []
+
+    def publish(self, collection, old, new, segment=None, moved_from=None, context=None):
+        """
+        Publica um evento de alteração e acorda os leitores em espera.
+
+        Args:
+            collection: Nome da coleção alterada
+            old: Registro anterior (None em inserções)
+            new: Registro novo (None em remoções)
+            segment: Partição alterada (ex.: reservations.2025-03); padrão: a própria coleção
+            moved_from: Partição de origem, quando o registro só mudou de partição
+                (evento "move", sem alteração no conteúdo)
+            context: Dados resolvidos na publicação (ex.: dono do imóvel de uma
+                reserva), disponíveis aos leitores mesmo depois que os registros
+                referenciados forem removidos
+
+        Returns:
+            dict: Evento publicado
+        """
+        if moved_from is not None:
+            op = "move"
+        else:
+            op = "insert" if old is None else "delete" if new is None else "update"
+        with self._condition:
+            self.last_seq += 1
+            event = {
+                "seq": self.last_seq,
+                "collection": collection,
+                "segment": segment or collection,
+                "op": op,
+                "id": (new or old)["id"],
+                "old": old,
+                "new": new,
+                "context": context or {},
+            }
+            if moved_from is not None:
+                event["moved_from"] = moved_from
+            self._events.append(event)
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass  # loop já encerrado
+        return event
+
+    def read(self, after_seq, timeout=None):
+        """
+        Retorna os eventos posteriores a um número de sequência,
+        esperando até timeout segundos se ainda não houver nenhum.
+
+        Args:
+            after_seq: Último número de sequência já recebido
+            timeout: Tempo máximo de espera em segundos (None espera indefinidamente)
+
+        Returns:
+            tuple: (eventos, reset), onde reset indica que eventos posteriores
+                a after_seq já foram descartados do buffer
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.last_seq > after_seq, timeout)
+            if self._events and self._events[0]["seq"] > after_seq + 1:
+                return [], True
+            start = len(self._events) - (self.last_seq - after_seq)
+            return [self._events[i] for i in range(max(start, 0), len(self._events))], False
+
+    async def read_async(self, after_seq, timeout=None):
+        """
+        Versão de read() para leitores asyncio: espera por novos eventos sem
+        bloquear o loop nem ocupar uma thread.
+
+        Args:
+            after_seq: Último número de sequência já recebido
+            timeout: Tempo máximo de espera em segundos (None espera indefinidamente)
+
+        Returns:
+            tuple: (eventos, reset), como em read()
+        """
+        loop = asyncio.get_running_loop()
+        future = None
+        with self._condition:
+            if self.last_seq <= after_seq:
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+        if future is not None:
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._condition:
+                    if (loop, future) in self._async_waiters:
+                        self._async_waiters.remove((loop, future))
+        return self.read(after_seq, timeout=0)
+
+    def cursor(self, seq):
+        """
+        Formata o cursor de um número de sequência ("<época>-<sequência>").
+        """
+        return f"{self.epoch}-{seq}"
+
+    def parse_cursor(self, cursor):
+        """
+        Interpreta um cursor recebido do cliente.
+
+        Args:
+            cursor: Cursor no formato "<época>-<sequência>" ou None
+
+        Returns:
+            tuple: (número de sequência, reset). Sem cursor, a leitura começa no
+                evento atual; com cursor de outra época ou inválido, reset é True
+        """
+        if not cursor:
+            return self.last_seq, False
+        epoch, _, seq = cursor.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.last_seq:
+            return self.last_seq, True
+        return int(seq), False
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
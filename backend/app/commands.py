@@ -0,0 +1,90 @@
+"""
+Módulo de comandos de linha de comando da aplicação.
+Registra comandos de manutenção no CLI do Flask, executados a partir de backend/:
+
+    flask --app run <comando>
+"""
+
+import os
+
+import click
+
+from app.data_manager import DATA_DIR, archive_partitioned, configure_storage, convert_storage, vacuum
+from app.storage_format import FORMATS
+from app.services.backup import SnapshotError, list_snapshots, restore_snapshot, take_snapshot
+
+
+def _backup_dir():
+    return os.environ.get("BACKUP_DIR", "backups")
+
+
+def register_commands(app):
+    """
+    Registra os comandos de manutenção na aplicação.
+
+    Args:
+        app: Aplicação Flask
+    """
+
+    @app.cli.command("vacuum")
+    def vacuum_command():
+        """Remove reservas e avaliações órfãs e informa o espaço recuperado."""
+        report = vacuum()
+        total_removed = sum(r["removed"] for r in report.values())
+        total_bytes = sum(r["bytes_reclaimed"] for r in report.values())
+        for name, r in report.items():
+            click.echo(f"{name}: {r['removed']} removidos, {r['bytes_reclaimed']} bytes recuperados")
+        click.echo(f"Total: {total_removed} documentos, {total_bytes} bytes")
+
+    @app.cli.command("archive")
+    @click.option("--before", default=None, help="Data limite (AAAA-MM-DD); padrão: hoje")
+    def archive_command(before):
+        """Move as reservas encerradas para as partições arquivadas."""
+        archived = archive_partitioned("reservations", before)
+        for key, count in archived.items():
+            click.echo(f"reservations.{key}: {count} arquivadas")
+        click.echo(f"Total: {sum(archived.values())} reservas arquivadas")
+
+    @app.cli.command("convert")
+    @click.option("--format", "fmt", type=click.Choice(FORMATS), default=None,
+                  help="Formato de todas as coleções; padrão: o configurado em DATA_FORMAT")
+    def convert_command(fmt):
+        """Regrava as coleções e partições no formato de arquivo configurado."""
+        if fmt is not None:
+            configure_storage(fmt)
+        converted = convert_storage()
+        for name, count in converted.items():
+            click.echo(f"{name}: {count} registros regravados")
+        click.echo(f"Total: {len(converted)} coleções convertidas")
+
+    @app.cli.command("snapshot")
+    @click.option("--full", is_flag=True, help="Grava um snapshot completo em vez de incremental")
+    def snapshot_command(full):
+        """Grava um snapshot consistente das coleções em BACKUP_DIR."""
+        snapshot = take_snapshot(_backup_dir(), full=full)
+        if snapshot is None:
+            click.echo("Nenhuma alteração desde o último snapshot")
+            return
+        click.echo(f"{snapshot['id']}: {snapshot['type']}, {snapshot['records']} registros, "
+                   f"{snapshot['changed']} gravados")
+
+    @app.cli.command("snapshots")
+    def snapshots_command():
+        """Lista os snapshots de BACKUP_DIR."""
+        for snapshot in list_snapshots(_backup_dir()):
+            click.echo(f"{snapshot['id']}  {snapshot['type']:<11} {snapshot['created_at']}  "
+                       f"{snapshot['records']} registros")
+
+    @app.cli.command("restore")
+    @click.argument("snapshot_id")
+    @click.option("--target", default=DATA_DIR, help="Diretório de dados de destino; padrão: data")
+    @click.option("--force", is_flag=True, help="Substitui as coleções já existentes no destino")
+    def restore_command(snapshot_id, target, force):
+        """Restaura um snapshot de BACKUP_DIR, conferindo as somas de verificação."""
+        try:
+            restored = restore_snapshot(_backup_dir(), snapshot_id, target, force=force)
+        except SnapshotError as e:
+            raise click.ClickException(str(e))
+        for name, count in restored.items():
+            click.echo(f"{name}: {count} registros")
+        click.echo(f"Snapshot {snapshot_id} restaurado e verificado em {target}")
@@ -0,0 +1,171 @@
+"""
+Módulo de compressão das respostas.
+Comprime as respostas de texto (JSON, text/*, JavaScript, SVG) conforme o
+cabeçalho Accept-Encoding da requisição:
+- br (Brotli): com o pacote brotli (dependência opcional), preferido quando
+  o cliente aceita os dois com a mesma qualidade
+- gzip: biblioteca padrão (zlib)
+
+Respostas comuns só são comprimidas a partir de min_size bytes. Respostas em
+streaming (rotas /stream, Server-Sent Events) são comprimidas bloco a bloco,
+com um flush a cada bloco para que cada evento chegue ao cliente na hora;
+no modo ASGI, o corpo produzido no loop asyncio é comprimido da mesma forma.
+Arquivos (send_file, ex.: imagens) não são comprimidos. O ETag forte de uma
+resposta comprimida (ex.: a versão do registro, ver versioned_response) passa
+a ser fraco (W/"..."), já que os bytes enviados não são os da representação
+original; a versão continua valendo no If-Match.
+
+Configuração (lida em create_app):
+- COMPRESSION: "on" (padrão) ou "off"
+- COMPRESSION_MIN_SIZE: tamanho mínimo em bytes (padrão 1024)
+- COMPRESSION_GZIP_LEVEL: nível do gzip, 1 a 9 (padrão 6)
+- COMPRESSION_BR_LEVEL: qualidade do Brotli, 0 a 11 (padrão 5)
+"""
+
+import importlib.util
+import zlib
+
+from flask import request
+
+from app.routes.helpers import ASYNC_BODY_ENVIRON_KEY
+
+HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BR_LEVEL = 5
+
+# Tipos comprimidos (além de text/*)
+COMPRESSIBLE_TYPES = {"application/json", "application/javascript", "image/svg+xml"}
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        # wbits 16 + MAX_WBITS: formato gzip (cabeçalho e CRC), não zlib
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def compress_body(data, encoding, level):
+    """
+    Comprime um corpo completo.
+
+    Args:
+        data: Corpo (bytes)
+        encoding: "gzip" ou "br"
+        level: Nível de compressão
+
+    Returns:
+        bytes: Corpo comprimido
+    """
+    compressor = _GzipCompressor(level) if encoding == "gzip" else _BrotliCompressor(level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def _compress_chunks(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class _CompressedAsyncBody:
+    """
+    Corpo em streaming do modo ASGI (ver app/asgi.py), comprimido bloco a bloco.
+    """
+
+    def __init__(self, body, compressor):
+        self._body = body
+        self._compressor = compressor
+
+    async def __aiter__(self):
+        async for chunk in self._body:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = self._compressor.compress(chunk) + self._compressor.flush()
+            if data:
+                yield data
+        yield self._compressor.finish()
+
+
+def _is_compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES)
+
+
+def _add_vary(response):
+    if "accept-encoding" not in {value.lower() for value in response.vary}:
+        response.vary.add("Accept-Encoding")
+
+
+def register_compression(app, min_size=MIN_SIZE, gzip_level=GZIP_LEVEL, br_level=BR_LEVEL):
+    """
+    Registra a compressão das respostas na aplicação.
+
+    Args:
+        app: Aplicação Flask
+        min_size: Tamanho mínimo, em bytes, das respostas comuns comprimidas
+        gzip_level: Nível do gzip (1 a 9)
+        br_level: Qualidade do Brotli (0 a 11)
+    """
+    if not 1 <= gzip_level <= 9 or not 0 <= br_level <= 11:
+        raise ValueError("Nível de compressão inválido")
+    encodings = (["br"] if HAS_BROTLI else []) + ["gzip"]
+    levels = {"gzip": gzip_level, "br": br_level}
+
+    def new_compressor(encoding):
+        if encoding == "gzip":
+            return _GzipCompressor(gzip_level)
+        return _BrotliCompressor(br_level)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or not _is_compressible(response.mimetype)
+                or "Content-Encoding" in response.headers or request.method == "HEAD"
+                or response.status_code < 200 or response.status_code in (204, 206, 304)):
+            return response
+        _add_vary(response)
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            async_body = request.environ.get(ASYNC_BODY_ENVIRON_KEY)
+            if async_body is not None:
+                request.environ[ASYNC_BODY_ENVIRON_KEY] = _CompressedAsyncBody(async_body, new_compressor(encoding))
+            response.response = _compress_chunks(response.iter_encoded(), new_compressor(encoding))
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress_body(data, encoding, levels[encoding]))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
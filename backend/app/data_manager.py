@@ -4,19 +4,350 @@ Este arquivo implementa um sistema simples de persistência de dados usando arqu
 Fornece funções para:
 - Salvar dados
 - Carregar dados
-- Deletar dados
-- Buscar dados por ID ou query
+- Deletar dados (individualmente, em lote e em cascata)
+- Buscar dados por ID ou query (com operadores, índices e projeção de campos)
+- Controlar versões dos registros (controle de concorrência otimista)
+- Notificar estruturas derivadas (índices, caches) a cada alteração
+- Publicar cada alteração no feed de alterações (change_feed)
 - Gerenciar IDs numéricos
+- Carregar as coleções na inicialização (em paralelo ou sob demanda)
+- Particionar coleções por período e arquivar registros antigos
+- Dividir coleções grandes em shards (cada escrita regrava apenas um arquivo)
+- Exportar e aplicar o estado das coleções (réplicas de leitura e snapshots)
+- Adiar e agrupar as gravações em disco (write-behind), conforme o nível de durabilidade
+- Gravar cada coleção no formato de arquivo configurado (JSON, JSON lines ou binário)
+
+As coleções ficam em memória depois de carregadas, com um índice por ID e
+índices secundários nos campos mais consultados. Os arquivos JSON continuam
+sendo a fonte persistente: toda escrita atualiza a memória e o arquivo,
+imediatamente ou, no modo write-behind, no próximo lote gravado em segundo plano.
 """
 
-import json
+import atexit
+import glob
+import logging
 import os
-from typing import Dict, List, Any
+import signal
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Any, Optional, Union
 import uuid
+from datetime import date, datetime
+
+from app.change_feed import ChangeFeed
+from app.query import CompiledQuery, compile_query, project
+from app.storage_format import FORMATS, decode, detect_file_format, encode, read_record
 
 # Diretório onde os arquivos JSON serão armazenados
 DATA_DIR = "data"
 
+# Campos com índice secundário em cada coleção (valor do campo -> IDs)
+INDEXED_FIELDS = {
+    "users": ["email"],
+    "properties": ["owner_id"],
+    "reservations": ["property_id", "renter_id"],
+    "reviews": ["reservation_id"],
+}
+
+# Regras de exclusão em cascata: coleção -> [(coleção dependente, campo com o ID)]
+# Ao remover um imóvel, suas reservas são removidas, e com elas as avaliações.
+CASCADE_RULES = {
+    "properties": [("reservations", "property_id")],
+    "reservations": [("reviews", "reservation_id")],
+}
+
+# Coleções particionadas por período de um campo de data (AAAA-MM-DD).
+# A coleção principal guarda a partição "quente" (estadias atuais e futuras);
+# os registros arquivados ficam em "<coleção>.<período>", ex.: reservations.2025-03.json
+PARTITION_RULES = {
+    "reservations": {"field": "end_date", "period": "month"},
+}
+
+# Campos de data (AAAA-MM-DD) comparados como texto nas queries e nas partições.
+# Valores gravados sem zeros à esquerda (ex.: 2027-2-1) são normalizados na carga.
+DATE_FIELDS = {
+    "reservations": ["start_date", "end_date"],
+}
+
+# Tamanho do prefixo da data que identifica cada período
+_PERIOD_KEY_LENGTH = {"month": 7, "year": 4}
+
+# Campo usado para distribuir os registros entre os shards de cada coleção.
+# Com SHARD_COUNT > 1, a coleção é gravada em "<coleção>.shard-<n>.json".
+SHARD_KEYS = {
+    "properties": "owner_id",
+    "reservations": "property_id",
+}
+SHARD_COUNT = 1
+
+# Campos omitidos dos registros publicados no feed de alterações, que fica em
+# memória e é lido pelos streams de eventos. Quem precisa do registro completo
+# (snapshots, replicação) usa restore_redacted().
+FEED_REDACTED_FIELDS = {
+    "users": ["password"],
+}
+
+# Níveis de durabilidade das escritas:
+# - "sync": cada escrita regrava o arquivo antes de retornar (padrão)
+# - "fsync": como "sync", forçando a gravação no disco (fsync) a cada escrita
+# - "batched": escritas vão para a memória e são gravadas em lotes em segundo
+#   plano, a cada FLUSH_INTERVAL segundos ou FLUSH_BATCH_SIZE escritas
+# - "shutdown": escritas só são gravadas no encerramento do processo (ou em flush())
+DURABILITY_LEVELS = ("sync", "fsync", "batched", "shutdown")
+DURABILITY = "sync"
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH_SIZE = 500
+
+# Formato dos arquivos das coleções (ver app/storage_format.py): "json" (padrão),
+# "jsonl" ou "binary", com exceções por coleção em STORAGE_FORMATS.
+# Os arquivos mantêm a extensão .json; o formato é reconhecido pelo conteúdo.
+STORAGE_FORMAT = "json"
+STORAGE_FORMATS: Dict[str, str] = {}
+
+logger = logging.getLogger(__name__)
+
+
+class VersionConflict(Exception):
+    """
+    Erro lançado quando um registro foi alterado por outra escrita desde que foi lido.
+
+    Attributes:
+        collection: Nome da coleção
+        id: ID do registro
+        current_version: Versão atual do registro (None se ele não existe mais)
+    """
+
+    def __init__(self, collection: str, _id: str, current_version: Optional[int]):
+        super().__init__(f"Versão desatualizada do registro {_id} em '{collection}'")
+        self.collection = collection
+        self.id = _id
+        self.current_version = current_version
+
+
+class _Collection:
+    """
+    Estado em memória de uma coleção.
+
+    Attributes:
+        name: Nome da coleção (nome do arquivo JSON)
+        records: Registros indexados pelo ID, na ordem do arquivo
+        indexes: Índices secundários (campo -> valor -> IDs)
+        loaded: Indica se a coleção já foi carregada do disco
+        lock: Trava da coleção, usada na carga única e nas escritas
+        shard_key: Campo usado para escolher o shard (None se a coleção não é dividida)
+        shard_count: Número de shards da coleção
+        shards: IDs dos registros de cada shard, na ordem do arquivo
+        dirty: Shards alterados desde a última gravação
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Dict[Any, Dict[str, None]]] = {}
+        self.loaded = False
+        self.lock = threading.RLock()
+        self.shard_key = SHARD_KEYS.get(name) if SHARD_COUNT > 1 else None
+        self.shard_count = SHARD_COUNT if self.shard_key else 1
+        self.shards: List[Dict[str, None]] = [{} for _ in range(self.shard_count)] if self.shard_key else []
+        self.dirty = set()
+
+    def shard_of(self, item: Dict[str, Any]) -> int:
+        """
+        Retorna o shard de um registro.
+
+        Args:
+            item: Registro da coleção
+
+        Returns:
+            int: Número do shard (sempre 0 em coleções não divididas)
+        """
+        if not self.shard_key:
+            return 0
+        return shard_for(item.get(self.shard_key), self.shard_count)
+
+    def build(self, items: List[Dict[str, Any]]):
+        """
+        Substitui o conteúdo da coleção e reconstrói os índices.
+
+        Args:
+            items: Lista de registros lidos do arquivo
+        """
+        self.records = {item.get("id"): item for item in items}
+        self.indexes = {field: {} for field in INDEXED_FIELDS.get(_base_name(self.name), [])}
+        for shard in self.shards:
+            shard.clear()
+        for item in self.records.values():
+            self._index(item)
+            if self.shard_key:
+                self.shards[self.shard_of(item)][item.get("id")] = None
+        self.loaded = True
+
+    def put(self, item: Dict[str, Any]):
+        """
+        Insere ou substitui um registro, movendo-o para o fim da coleção.
+
+        Args:
+            item: Registro a ser gravado (precisa ter ID)
+        """
+        self.remove(item["id"])
+        self.records[item["id"]] = item
+        self._index(item)
+        shard = self.shard_of(item)
+        if self.shard_key:
+            self.shards[shard][item["id"]] = None
+        self.dirty.add(shard)
+
+    def remove(self, _id: str) -> Optional[Dict[str, Any]]:
+        """
+        Remove um registro e suas entradas nos índices.
+
+        Args:
+            _id: ID do registro
+
+        Returns:
+            Dict[str, Any]: Registro removido ou None se não existir
+        """
+        item = self.records.pop(_id, None)
+        if item is not None:
+            for field, index in self.indexes.items():
+                ids = index.get(item.get(field))
+                if ids is not None:
+                    ids.pop(_id, None)
+                    if not ids:
+                        del index[item.get(field)]
+            shard = self.shard_of(item)
+            if self.shard_key:
+                self.shards[shard].pop(_id, None)
+            self.dirty.add(shard)
+        return item
+
+    def _index(self, item: Dict[str, Any]):
+        for field, index in self.indexes.items():
+            value = item.get(field)
+            try:
+                index.setdefault(value, {})[item.get("id")] = None
+            except TypeError:
+                # Valores não hasheáveis (listas, dicts) ficam fora do índice
+                pass
+
+
+# Coleções conhecidas pelo processo e trava que protege o registro delas
+_collections: Dict[str, _Collection] = {}
+_registry_lock = threading.Lock()
+
+# Períodos arquivados de cada coleção particionada, lidos do diretório no
+# primeiro uso e atualizados quando uma nova partição é registrada
+_partition_keys: Dict[str, List[str]] = {}
+
+# Tempo de carga (ms) e número de registros de cada coleção
+_load_stats: Dict[str, Dict[str, float]] = {}
+
+# Feed com todas as alterações feitas pelo processo, em ordem (ver app/change_feed.py).
+# As alterações em partições arquivadas são publicadas com o nome da coleção principal.
+change_feed = ChangeFeed()
+
+# Funções que resolvem o contexto dos eventos de uma coleção no feed (coleção -> funções)
+_feed_context: Dict[str, List[Callable[[Dict[str, Any]], Dict[str, Any]]]] = {}
+
+# Funções chamadas a cada alteração de uma coleção (coleção -> callbacks)
+_listeners: Dict[str, List[Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]]] = {}
+
+# Funções chamadas também a cada alteração das partições arquivadas (coleção principal -> callbacks)
+_partition_listeners: Dict[str, List[Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]]] = {}
+
+
+def add_listener(collection: str,
+                 callback: Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None],
+                 partitions: bool = False):
+    """
+    Registra uma função chamada a cada inserção, atualização ou remoção na coleção.
+
+    A função recebe o registro anterior e o novo (None na inserção e na
+    remoção, respectivamente) e é chamada sob a trava da coleção, logo após
+    a gravação; por isso deve ser rápida e não pode alterar os registros.
+    A movimentação de registros entre partições não gera notificações
+    (apenas um evento "move" no feed de alterações).
+
+    Args:
+        collection: Nome da coleção
+        callback: Função chamada como callback(anterior, novo)
+        partitions: Se True, a função também é chamada nas alterações das
+            partições arquivadas da coleção (ex.: remoções em cascata e vacuum())
+    """
+    with _registry_lock:
+        _listeners.setdefault(collection, []).append(callback)
+        if partitions:
+            _partition_listeners.setdefault(collection, []).append(callback)
+
+
+def add_feed_context(collection: str, resolver: Callable[[Dict[str, Any]], Dict[str, Any]]):
+    """
+    Registra uma função que resolve, na publicação, dados extras dos eventos
+    de uma coleção (e das suas partições) no feed de alterações, guardados em
+    event["context"]. Útil para dados de outros registros que podem ser
+    removidos antes de o evento ser lido (ex.: o dono do imóvel de uma reserva).
+
+    A função recebe o registro (o novo, ou o anterior nas remoções), é chamada
+    sob a trava da coleção e deve ser rápida.
+
+    Args:
+        collection: Nome da coleção
+        resolver: Função chamada como resolver(registro), que retorna um dicionário
+    """
+    with _registry_lock:
+        _feed_context.setdefault(collection, []).append(resolver)
+
+
+def _redact(collection: str, record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    fields = FEED_REDACTED_FIELDS.get(_base_name(collection))
+    if not fields or record is None:
+        return record
+    return {key: value for key, value in record.items() if key not in fields}
+
+
+def restore_redacted(segment: str, record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Completa um registro lido do feed de alterações com os campos omitidos
+    (FEED_REDACTED_FIELDS), copiados do registro atual em memória.
+
+    Args:
+        segment: Coleção ou partição do registro
+        record: Registro publicado no feed, ou None
+
+    Returns:
+        Dict[str, Any]: Registro completo (o próprio registro se nada foi omitido)
+    """
+    fields = FEED_REDACTED_FIELDS.get(_base_name(segment))
+    if not fields or record is None:
+        return record
+    current = _get_collection(segment).records.get(record["id"]) or {}
+    restored = dict(record)
+    restored.update({field: current[field] for field in fields if field in current})
+    return restored
+
+
+def _notify(collection: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+    context = {}
+    for resolver in _feed_context.get(_base_name(collection), ()):
+        try:
+            context.update(resolver(new or old))
+        except Exception:
+            logger.exception("Falha ao resolver o contexto do evento em '%s'", collection)
+    change_feed.publish(_base_name(collection), _redact(collection, old), _redact(collection, new),
+                        segment=collection, context=context)
+    callbacks = _listeners.get(collection, [])
+    if collection != _base_name(collection):
+        callbacks = _partition_listeners.get(_base_name(collection), [])
+    for callback in callbacks:
+        try:
+            callback(old, new)
+        except Exception:
+            logger.exception("Falha ao notificar alteração em '%s'", collection)
+
+
 def ensure_data_dir():
     """
     Garante que o diretório de dados existe.
@@ -25,127 +356,1194 @@ def ensure_data_dir():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
+
+def _base_name(collection: str) -> str:
+    """
+    Retorna o nome da coleção sem o sufixo de partição (ex.: reservations.2025-03 -> reservations).
+    """
+    return collection.split(".", 1)[0]
+
+
+def _file_path(collection: str) -> str:
+    return os.path.join(DATA_DIR, f"{collection}.json")
+
+
+def _shard_path(collection: str, shard: int) -> str:
+    return os.path.join(DATA_DIR, f"{collection}.shard-{shard}.json")
+
+
+def _shard_files(collection: str) -> Dict[int, str]:
+    """
+    Retorna os arquivos de shard existentes de uma coleção (número do shard -> caminho).
+    """
+    prefix = f"{collection}.shard-"
+    files = {}
+    for path in glob.glob(os.path.join(DATA_DIR, f"{prefix}*.json")):
+        number = os.path.basename(path)[len(prefix):-len(".json")]
+        if number.isdigit():
+            files[int(number)] = path
+    return dict(sorted(files.items()))
+
+
+def _collection_files(collection: str) -> List[str]:
+    """
+    Retorna todos os arquivos existentes de uma coleção: o arquivo único e os shards.
+    """
+    paths = [_file_path(collection)] if os.path.exists(_file_path(collection)) else []
+    return paths + list(_shard_files(collection).values())
+
+
+def shard_for(value: Any, shard_count: int) -> int:
+    """
+    Calcula o shard de um valor da chave de distribuição.
+    Usa CRC32, que é estável entre processos (ao contrário de hash()).
+
+    Args:
+        value: Valor do campo de distribuição
+        shard_count: Número de shards
+
+    Returns:
+        int: Número do shard
+    """
+    return zlib.crc32(str(value).encode("utf-8")) % shard_count
+
+
+def configure_shards(count: int):
+    """
+    Define o número de shards das coleções listadas em SHARD_KEYS.
+    Deve ser chamada antes da carga das coleções; na carga, arquivos gravados
+    com outro número de shards são redistribuídos.
+
+    Args:
+        count: Número de shards (1 desativa a divisão)
+    """
+    global SHARD_COUNT
+    if count < 1:
+        raise ValueError(f"Número de shards inválido: {count}")
+    SHARD_COUNT = count
+    reset_cache()
+
+
+def configure_storage(default: str = "json", overrides: Optional[Dict[str, str]] = None):
+    """
+    Define o formato de arquivo das coleções (ver app/storage_format.py).
+    Arquivos em outro formato continuam legíveis e são convertidos quando a
+    coleção é carregada ou gravada (ou de uma vez, com convert_storage()).
+
+    Args:
+        default: Formato padrão ("json", "jsonl" ou "binary")
+        overrides: Formato de coleções específicas (coleção -> formato)
+
+    Raises:
+        ValueError: Se algum formato for inválido
+    """
+    global STORAGE_FORMAT, STORAGE_FORMATS
+    overrides = dict(overrides or {})
+    for fmt in [default, *overrides.values()]:
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato de armazenamento inválido: {fmt}")
+    STORAGE_FORMAT, STORAGE_FORMATS = default, overrides
+
+
+def _storage_format(collection: str) -> str:
+    """
+    Retorna o formato de arquivo de uma coleção (as partições seguem a coleção principal).
+    """
+    return STORAGE_FORMATS.get(_base_name(collection), STORAGE_FORMAT)
+
+
+def _parse_file(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Lê e interpreta um arquivo de coleção, em qualquer um dos formatos.
+    Fica no nível do módulo para poder ser executada em outro processo.
+
+    Args:
+        file_path: Caminho do arquivo
+
+    Returns:
+        List[Dict[str, Any]]: Registros do arquivo, ou lista vazia se ele não existir
+
+    Raises:
+        ValueError: Se o arquivo estiver corrompido. A coleção não é carregada
+            vazia: a próxima escrita substituiria o arquivo e perderia os registros
+    """
+    if not os.path.exists(file_path):
+        return []
+
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    try:
+        return decode(data)
+    except ValueError as e:
+        logger.error("Arquivo de coleção corrompido: %s (%s)", file_path, e)
+        raise ValueError(f"Arquivo de coleção corrompido: {file_path}: {e}") from e
+
+
+def _dump_file(file_path: str, items: List[Dict[str, Any]], fsync: bool = False, fmt: str = "json"):
+    """
+    Grava registros em um arquivo de coleção de forma atômica: o conteúdo é escrito
+    em um arquivo temporário que depois substitui o original, de modo que um
+    leitor nunca vê um arquivo pela metade. Com fsync, o arquivo e o diretório
+    são forçados para o disco antes de retornar.
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode(items, fmt))
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+    if fsync:
+        try:
+            fd = os.open(os.path.dirname(file_path) or ".", os.O_RDONLY)
+        except OSError:
+            return  # sistemas sem suporte a abrir diretórios (ex.: Windows)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _flush_collection(col: _Collection, fsync: bool = False):
+    """
+    Grava no disco os registros alterados de uma coleção.
+    Coleções não divididas são gravadas inteiras; nas divididas em shards,
+    apenas os shards alterados são regravados.
+
+    Args:
+        col: Coleção a ser persistida
+        fsync: Se True, força a gravação no disco
+    """
+    with col.lock:
+        ensure_data_dir()
+        dirty = set(col.dirty)
+        fmt = _storage_format(col.name)
+        try:
+            if not col.shard_key:
+                _dump_file(_file_path(col.name), list(col.records.values()), fsync, fmt)
+            else:
+                for shard in sorted(dirty):
+                    _dump_file(_shard_path(col.name, shard),
+                               [col.records[_id] for _id in col.shards[shard]], fsync, fmt)
+                    col.dirty.discard(shard)
+        except OSError:
+            logger.exception("Falha ao gravar a coleção '%s'", col.name)
+            raise
+        col.dirty.clear()
+
+
+def _write_file(col: _Collection):
+    """
+    Persiste as alterações de uma coleção conforme o nível de durabilidade:
+    grava agora ("sync"/"fsync") ou marca a coleção para o próximo lote
+    ("batched"/"shutdown"). Deve ser chamada com a trava da coleção adquirida.
+
+    Args:
+        col: Coleção a ser persistida
+    """
+    if DURABILITY in ("sync", "fsync"):
+        _flush_collection(col, fsync=DURABILITY == "fsync")
+        return
+    global _pending_writes
+    with _flush_condition:
+        _pending.setdefault(col.name, col)
+        _pending_counts[col.name] = _pending_counts.get(col.name, 0) + 1
+        _pending_writes += 1
+        if DURABILITY == "batched":
+            _start_flusher()
+            if _pending_writes >= FLUSH_BATCH_SIZE:
+                _flush_condition.notify_all()
+
+
+# Coleções com escritas ainda não gravadas (modos "batched" e "shutdown"),
+# na ordem da primeira escrita pendente de cada uma
+_pending: Dict[str, _Collection] = {}
+# Número de escritas pendentes de cada coleção e o total
+_pending_counts: Dict[str, int] = {}
+_pending_writes = 0
+_flush_condition = threading.Condition()
+# Serializa as gravações em lote (thread de gravação, flush() explícito e encerramento)
+_flush_lock = threading.Lock()
+_flusher = None
+_write_stats = {"flushes": 0, "flushed_writes": 0}
+_exit_hook_installed = False
+
+
+def configure_writes(durability: str = "sync", interval: float = 1.0, batch_size: int = 500):
+    """
+    Define o nível de durabilidade das escritas (ver DURABILITY_LEVELS).
+    Nos modos "batched" e "shutdown", registra a gravação das escritas
+    pendentes no encerramento do processo (atexit e SIGTERM).
+
+    Args:
+        durability: "sync", "fsync", "batched" ou "shutdown"
+        interval: Tempo máximo, em segundos, entre uma escrita e a gravação do lote ("batched")
+        batch_size: Número de escritas pendentes que antecipa a gravação do lote ("batched")
+
+    Raises:
+        ValueError: Se o nível ou os limites forem inválidos
+    """
+    global DURABILITY, FLUSH_INTERVAL, FLUSH_BATCH_SIZE, _exit_hook_installed
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Nível de durabilidade inválido: {durability}")
+    if interval <= 0 or batch_size < 1:
+        raise ValueError("Intervalo e tamanho do lote devem ser positivos")
+    flush()
+    DURABILITY, FLUSH_INTERVAL, FLUSH_BATCH_SIZE = durability, interval, batch_size
+    if durability in ("batched", "shutdown") and not _exit_hook_installed:
+        _exit_hook_installed = True
+        atexit.register(flush)
+        # SIGTERM encerra o processo sem rodar o atexit; convertê-lo em SystemExit garante a gravação
+        if threading.current_thread() is threading.main_thread() and \
+                signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+
+def flush() -> int:
+    """
+    Grava no disco, de uma vez (group commit), todas as escritas pendentes.
+    Nos modos "sync" e "fsync" não há escritas pendentes.
+
+    Returns:
+        int: Número de escritas gravadas
+    """
+    global _pending_writes
+    with _flush_lock:
+        with _flush_condition:
+            pending = list(_pending.values())
+            counts = dict(_pending_counts)
+            _pending.clear()
+            _pending_counts.clear()
+            _pending_writes = 0
+        count = 0
+        for position, col in enumerate(pending):
+            try:
+                _flush_collection(col, fsync=True)
+            except OSError:
+                # Devolve apenas as coleções não gravadas (e as suas escritas) para a próxima tentativa
+                with _flush_condition:
+                    for remaining in pending[position:]:
+                        _pending.setdefault(remaining.name, remaining)
+                        _pending_counts[remaining.name] = (_pending_counts.get(remaining.name, 0)
+                                                           + counts.get(remaining.name, 0))
+                        _pending_writes += counts.get(remaining.name, 0)
+                if position:
+                    _write_stats["flushes"] += 1
+                    _write_stats["flushed_writes"] += count
+                raise
+            count += counts.get(col.name, 0)
+        if pending:
+            _write_stats["flushes"] += 1
+            _write_stats["flushed_writes"] += count
+            logger.debug("Gravadas %d escrita(s) em %d coleção(ões)", count, len(pending))
+    return count
+
+
+def _run_flusher():
+    while True:
+        with _flush_condition:
+            _flush_condition.wait_for(lambda: _pending_writes > 0)
+            # Espera completar o lote, no máximo FLUSH_INTERVAL segundos desde a primeira escrita
+            _flush_condition.wait_for(lambda: _pending_writes >= FLUSH_BATCH_SIZE, FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            time.sleep(FLUSH_INTERVAL)
+
+
+def _start_flusher():
+    """
+    Inicia a thread de gravação em lote, caso ainda não esteja rodando.
+    Deve ser chamada com _flush_condition adquirida.
+    """
+    global _flusher
+    if _flusher is None:
+        _flusher = threading.Thread(target=_run_flusher, name="data-flusher", daemon=True)
+        _flusher.start()
+
+
+def get_write_stats() -> Dict[str, Any]:
+    """
+    Retorna estatísticas das gravações em lote.
+
+    Returns:
+        Dict[str, Any]: Nível de durabilidade, escritas pendentes, lotes gravados
+            e escritas gravadas por eles
+    """
+    with _flush_condition:
+        return {"durability": DURABILITY, "pending_writes": _pending_writes, **_write_stats}
+
+
+def _needs_relayout(col: _Collection, files: List[str]) -> bool:
+    """
+    Indica se os arquivos da coleção não correspondem ao número de shards configurado.
+    """
+    if not col.shard_key:
+        return any(path != _file_path(col.name) for path in files)
+    return any(path == _file_path(col.name) for path in files) or \
+        any(number >= col.shard_count for number in _shard_files(col.name))
+
+
+def _relayout(col: _Collection, files: List[str]):
+    """
+    Regrava a coleção com o número de shards configurado e remove os arquivos antigos.
+    """
+    col.dirty = set(range(col.shard_count))
+    # Gravação imediata: os arquivos antigos são removidos logo em seguida
+    _flush_collection(col)
+    current = {_file_path(col.name)} if not col.shard_key else \
+        {_shard_path(col.name, n) for n in range(col.shard_count)}
+    for path in files:
+        if path not in current:
+            os.remove(path)
+    logger.info("Coleção '%s' redistribuída em %d shard(s)", col.name, col.shard_count)
+
+
+def _needs_conversion(col: _Collection, files: List[str]) -> bool:
+    """
+    Indica se algum arquivo da coleção está em um formato diferente do configurado.
+    """
+    fmt = _storage_format(col.name)
+    return any(detect_file_format(path) not in (None, fmt) for path in files)
+
+
+def _register(collection: str) -> _Collection:
+    col = _collections.get(collection)
+    if col is None:
+        with _registry_lock:
+            col = _collections.get(collection)
+            if col is None:
+                col = _collections[collection] = _Collection(collection)
+                # Nova partição: a lista de períodos da coleção é relida no próximo uso
+                _partition_keys.pop(_base_name(collection), None)
+    return col
+
+
+def _timed_parse(file_path: str):
+    """
+    Interpreta um arquivo de coleção medindo o tempo gasto.
+
+    Returns:
+        tuple: Registros do arquivo e tempo de interpretação em ms
+    """
+    started = time.perf_counter()
+    items = _parse_file(file_path)
+    return items, (time.perf_counter() - started) * 1000
+
+
+def _normalize_dates(collection: str, items: List[Dict[str, Any]]) -> int:
+    """
+    Normaliza para AAAA-MM-DD os campos de DATE_FIELDS gravados em outro formato
+    aceito por strptime (ex.: 2027-2-1), para que as comparações como texto
+    sigam a ordem das datas.
+
+    Returns:
+        int: Número de registros alterados
+    """
+    fields = DATE_FIELDS.get(_base_name(collection))
+    if not fields:
+        return 0
+    changed = 0
+    for item in items:
+        for field in fields:
+            value = item.get(field)
+            if not isinstance(value, str) or (len(value) == 10 and value[4] == "-" and value[7] == "-"):
+                continue
+            try:
+                item[field] = datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+            except ValueError:
+                continue
+            changed += 1
+    return changed
+
+
+def _install(col: _Collection, files: List[str], parsed: List[tuple]):
+    """
+    Instala os registros lidos na coleção e registra o tempo de carga.
+
+    Args:
+        col: Coleção a ser instalada
+        files: Arquivos lidos da coleção
+        parsed: Resultado de _timed_parse() para cada arquivo
+    """
+    items = [item for file_items, _ in parsed for item in file_items]
+    parse_ms = sum(ms for _, ms in parsed)
+    started = time.perf_counter()
+    normalized = _normalize_dates(col.name, items)
+    col.build(items)
+    if _needs_relayout(col, files):
+        _relayout(col, files)
+    elif normalized or _needs_conversion(col, files):
+        # Regrava com as datas normalizadas e no formato configurado
+        # (no próximo lote, nos modos write-behind)
+        col.dirty = set(range(col.shard_count))
+        _write_file(col)
+    index_ms = (time.perf_counter() - started) * 1000
+    _load_stats[col.name] = {
+        "records": len(col.records),
+        "parse_ms": round(parse_ms, 2),
+        "index_ms": round(index_ms, 2),
+    }
+    logger.info("Coleção '%s' carregada: %d registros (leitura %.1f ms, índices %.1f ms)",
+                col.name, len(col.records), parse_ms, index_ms)
+
+
+def _get_collection(collection: str) -> _Collection:
+    """
+    Retorna a coleção em memória, carregando-a do disco no primeiro acesso.
+    A carga acontece uma única vez, mesmo com várias threads concorrentes.
+
+    Args:
+        collection: Nome da coleção
+
+    Returns:
+        _Collection: Coleção carregada
+    """
+    col = _register(collection)
+    if not col.loaded:
+        with col.lock:
+            if not col.loaded:
+                files = _collection_files(collection)
+                _install(col, files, [_timed_parse(path) for path in files])
+    return col
+
+
+def discover_collections() -> List[str]:
+    """
+    Lista as coleções existentes no diretório de dados.
+    As partições arquivadas não são incluídas; elas são carregadas sob demanda.
+
+    Returns:
+        List[str]: Nomes das coleções (arquivos data/*.json sem extensão)
+    """
+    ensure_data_dir()
+    paths = glob.glob(os.path.join(DATA_DIR, "*.json"))
+    return sorted({_base_name(os.path.basename(p)[:-len(".json")]) for p in paths})
+
+
+def warm_up(mode: str = "eager", executor: str = "thread",
+            max_workers: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Prepara as coleções do diretório de dados na inicialização.
+
+    No modo "eager" os arquivos são interpretados em paralelo (em threads ou
+    processos) e os índices são construídos antes da primeira requisição.
+    No modo "lazy" as coleções são apenas registradas e cada uma é carregada
+    no primeiro acesso.
+
+    Args:
+        mode: "eager" ou "lazy"
+        executor: "thread" ou "process" (apenas no modo "eager")
+        max_workers: Número máximo de workers do pool
+
+    Returns:
+        Dict[str, Dict[str, float]]: Estatísticas de carga por coleção
+    """
+    if mode not in ("eager", "lazy"):
+        raise ValueError(f"Modo de carga inválido: {mode}")
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Executor inválido: {executor}")
+
+    names = discover_collections()
+    pending = [col for col in map(_register, names) if not col.loaded]
+    if mode == "lazy" or not pending:
+        logger.info("Coleções registradas para carga sob demanda: %s", ", ".join(names))
+        return get_load_stats()
+
+    started = time.perf_counter()
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_class(max_workers=max_workers) as pool:
+        files = {col.name: _collection_files(col.name) for col in pending}
+        futures = {col.name: [pool.submit(_timed_parse, path) for path in files[col.name]]
+                   for col in pending}
+        for col in pending:
+            parsed = [future.result() for future in futures[col.name]]
+            with col.lock:
+                if not col.loaded:
+                    _install(col, files[col.name], parsed)
+
+    logger.info("Carga inicial concluída em %.1f ms", (time.perf_counter() - started) * 1000)
+    return get_load_stats()
+
+
+def get_load_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Retorna as estatísticas de carga das coleções já carregadas.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Registros e tempos de leitura/indexação (ms) por coleção
+    """
+    return {name: dict(stats) for name, stats in _load_stats.items()}
+
+
+def reset_cache():
+    """
+    Descarta todas as coleções em memória.
+    A próxima leitura de cada coleção volta a carregá-la do disco.
+    Escritas pendentes são gravadas antes.
+    """
+    flush()
+    with _registry_lock:
+        _collections.clear()
+        _partition_keys.clear()
+        _load_stats.clear()
+
+
 def save_data(collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Salva dados em um arquivo JSON.
-    
+
+    Cada registro guarda um número de versão, incrementado a cada gravação.
+    Se os dados trazem o campo "version" (ou seja, foram lidos com
+    find_by_id/find_many e alterados), a gravação só acontece se o registro
+    ainda estiver nessa versão; caso contrário, VersionConflict é lançada.
+
     Args:
         collection: Nome da coleção (nome do arquivo JSON)
         data: Dicionário com os dados a serem salvos
-        
+
     Returns:
-        Dict[str, Any]: Dados salvos com ID gerado/atualizado
+        Dict[str, Any]: Dados salvos com ID e versão gerados/atualizados
+
+    Raises:
+        VersionConflict: Se o registro foi alterado ou removido desde a leitura
     """
-    ensure_data_dir()
-    file_path = os.path.join(DATA_DIR, f"{collection}.json")
-    
-    # Carrega dados existentes
-    existing_data = load_data(collection)
-    
+    col = _get_collection(collection)
+
     # Gera ID se não existir
     if "id" not in data:
         data["id"] = str(uuid.uuid4())
-    
-    # Atualiza ou adiciona dados
-    existing_data = [item for item in existing_data if item.get("id") != data["id"]]
-    existing_data.append(data)
-    
-    # Salva todos os dados
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(existing_data, f, ensure_ascii=False, indent=2)
-    
+
+    # Compara a versão e grava (compare-and-swap sob a trava da coleção)
+    with col.lock:
+        current = col.records.get(data["id"])
+        if "version" in data:
+            current_version = record_version(current) if current is not None else None
+            if current_version != data["version"]:
+                raise VersionConflict(collection, data["id"], current_version)
+        data["version"] = record_version(current) + 1 if current is not None else 1
+        stored = dict(data)
+        col.put(stored)
+        _write_file(col)
+        _notify(collection, current, stored)
+
     return data
 
+def _copy(item: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Retorna uma cópia do registro para o chamador, sempre com o campo de versão.
+    Assim, gravar de volta um registro lido aplica a verificação de versão.
+    Com fields, retorna apenas esses campos (e o ID).
+    """
+    copy = project(item, fields)
+    if fields is None or "version" in fields:
+        copy.setdefault("version", 1)
+    return copy
+
+def record_version(item: Dict[str, Any]) -> int:
+    """
+    Retorna a versão de um registro.
+    Registros gravados antes do controle de versões são considerados na versão 1.
+
+    Args:
+        item: Registro da coleção
+
+    Returns:
+        int: Versão do registro
+    """
+    return item.get("version", 1)
+
 def load_data(collection: str) -> List[Dict[str, Any]]:
     """
     Carrega dados de um arquivo JSON.
-    
+
     Args:
         collection: Nome da coleção (nome do arquivo JSON)
-        
+
     Returns:
         List[Dict[str, Any]]: Lista de dicionários com os dados carregados
     """
-    ensure_data_dir()
-    file_path = os.path.join(DATA_DIR, f"{collection}.json")
-    
-    if not os.path.exists(file_path):
-        return []
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return []
+    col = _get_collection(collection)
+    return [_copy(item) for item in list(col.records.values())]
 
 def delete_data(collection: str, _id: str) -> bool:
     """
     Deleta um documento pelo ID.
-    
+
     Args:
         collection: Nome da coleção
         _id: ID do documento a ser deletado
-        
+
     Returns:
         bool: True se o documento foi deletado, False caso contrário
     """
-    data = load_data(collection)
-    original_length = len(data)
-    data = [item for item in data if item.get("id") != _id]
-    
-    if len(data) < original_length:
-        file_path = os.path.join(DATA_DIR, f"{collection}.json")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
-    return False
+    col = _get_collection(collection)
+    with col.lock:
+        old = col.remove(_id)
+        if old is None:
+            return False
+        _write_file(col)
+        _notify(collection, old, None)
+    return True
+
+def list_partitions(collection: str) -> List[str]:
+    """
+    Lista os períodos arquivados de uma coleção particionada.
+    O diretório de dados é lido uma vez; a lista fica em cache até uma nova
+    partição ser registrada (ex.: por _move_to_partitions()) ou reset_cache().
+
+    Args:
+        collection: Nome da coleção
+
+    Returns:
+        List[str]: Períodos em ordem crescente (ex.: ["2025-02", "2025-03"])
+    """
+    cached = _partition_keys.get(collection)
+    if cached is not None:
+        return list(cached)
+    ensure_data_dir()
+    paths = glob.glob(os.path.join(DATA_DIR, f"{collection}.*.json"))
+    keys = {os.path.basename(p)[len(collection) + 1:-len(".json")] for p in paths}
+    with _registry_lock:
+        keys.update(name[len(collection) + 1:] for name in _collections
+                    if name.startswith(collection + "."))
+        result = sorted(key for key in keys if not key.startswith("shard-"))
+        _partition_keys[collection] = result
+    return list(result)
+
+
+def _segments(collection: str) -> List[str]:
+    """
+    Retorna a coleção principal seguida das suas partições arquivadas.
+    """
+    if collection not in PARTITION_RULES:
+        return [collection]
+    return [collection] + [f"{collection}.{key}" for key in list_partitions(collection)]
+
+
+def _partition_key(collection: str, value: str) -> str:
+    """
+    Retorna o período de um valor de data conforme a regra de partição da coleção.
+    """
+    return value[:_PERIOD_KEY_LENGTH[PARTITION_RULES[collection]["period"]]]
+
+
+def find_many_all(collection: str, query: Union[Dict[str, Any], CompiledQuery] = None,
+                  date_from: Optional[str] = None,
+                  fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Encontra documentos na partição principal e nas partições arquivadas.
+
+    Quando date_from é informado, as partições cujo período termina antes
+    dessa data são ignoradas sem serem carregadas (poda de partições).
+
+    Args:
+        collection: Nome da coleção
+        query: Critérios de busca, como em find_many()
+        date_from: Data mínima (AAAA-MM-DD) do campo de partição
+        fields: Campos retornados de cada documento, como em find_many()
+
+    Returns:
+        List[Dict[str, Any]]: Documentos encontrados, sem repetição
+    """
+    query = compile_query(query)
+    result = find_many(collection, query, fields)
+    if collection not in PARTITION_RULES:
+        return result
+
+    seen = {item["id"] for item in result}
+    for key in reversed(list_partitions(collection)):
+        if date_from and key < _partition_key(collection, date_from):
+            break
+        for item in find_many(f"{collection}.{key}", query, fields):
+            if item["id"] not in seen:
+                seen.add(item["id"])
+                result.append(item)
+    return result
+
+
+def find_by_id_all(collection: str, _id: str) -> Dict[str, Any]:
+    """
+    Encontra um documento pelo ID na partição principal ou nas arquivadas.
+    As partições são consultadas da mais recente para a mais antiga.
+
+    Args:
+        collection: Nome da coleção
+        _id: ID do documento
+
+    Returns:
+        Dict[str, Any]: Documento encontrado ou None se não existir
+    """
+    segments = _segments(collection)
+    for segment in segments[:1] + segments[:0:-1]:
+        col = _collections.get(segment)
+        if segment != collection and (col is None or not col.loaded):
+            # Partição ainda não carregada: em arquivos binários, lê só o registro pelo índice
+            found, item = read_record(_file_path(segment), _id)
+            if found:
+                if item is not None:
+                    return _copy(item)
+                continue
+        item = find_by_id(segment, _id)
+        if item is not None:
+            return item
+    return None
+
+
+def archive_partitioned(collection: str = "reservations",
+                        before: Optional[str] = None) -> Dict[str, int]:
+    """
+    Move da partição principal para as partições arquivadas os registros
+    cujo campo de partição é anterior a uma data (por padrão, hoje).
+
+    Cada partição de destino é gravada uma única vez; a partição principal
+    só é regravada depois que os registros estão salvos no arquivo (mesmo no
+    modo write-behind, as partições de destino são gravadas imediatamente).
+
+    Args:
+        collection: Nome da coleção particionada
+        before: Data limite (AAAA-MM-DD)
+
+    Returns:
+        Dict[str, int]: Número de registros arquivados por período
+    """
+    field = PARTITION_RULES[collection]["field"]
+    before = before or date.today().isoformat()
+    hot = _get_collection(collection)
+
+    with hot.lock:
+        finished = [item for item in hot.records.values()
+                    if item.get(field) and item[field] < before]
+        archived = _move_to_partitions(collection, hot, finished)
+    if archived:
+        logger.info("Arquivados %d registros de '%s': %s", len(finished), collection, archived)
+    return archived
+
+
+def archive_records(collection: str, ids: Iterable[str],
+                    update: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None) -> Dict[str, int]:
+    """
+    Move registros específicos da partição principal para as partições
+    arquivadas do período do seu campo de partição, mesmo que futuro
+    (ex.: reservas em estado final que não precisam mais ficar na partição principal).
+
+    Com update, cada registro pode ser alterado na mesma operação (ex.: passar
+    ao estado final): as alterações ganham nova versão e são notificadas, e a
+    partição principal e cada partição de destino continuam sendo gravadas
+    uma única vez para o lote inteiro.
+
+    Args:
+        collection: Nome da coleção particionada
+        ids: IDs dos registros
+        update: Função chamada, sob a trava da coleção, com uma cópia de cada
+            registro; retorna o registro alterado, ou None para não movê-lo
+
+    Returns:
+        Dict[str, int]: Número de registros movidos por período
+    """
+    field = PARTITION_RULES[collection]["field"]
+    hot = _get_collection(collection)
+    with hot.lock:
+        items = []
+        changed = False
+        for _id in ids:
+            item = hot.records.get(_id)
+            if item is None:
+                continue
+            if update is not None:
+                new = update(dict(item))
+                if new is None:
+                    continue
+                new["version"] = record_version(item) + 1
+                hot.put(new)
+                _notify(collection, item, new)
+                item, changed = new, True
+            if item.get(field):
+                items.append(item)
+        if changed and not items:
+            _write_file(hot)
+        return _move_to_partitions(collection, hot, items)
+
+
+def _move_to_partitions(collection: str, hot: _Collection, items: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Move registros da partição principal para as partições do seu período.
+    Cada partição de destino é gravada uma única vez, antes da partição principal.
+    Deve ser chamada com a trava da partição principal adquirida.
+    """
+    field = PARTITION_RULES[collection]["field"]
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item in items:
+        groups.setdefault(_partition_key(collection, item[field]), []).append(item)
+
+    for key, group in groups.items():
+        archive = _get_collection(f"{collection}.{key}")
+        with archive.lock:
+            for item in group:
+                archive.put(item)
+            _flush_collection(archive, fsync=DURABILITY != "sync")
+
+    for item in items:
+        hot.remove(item["id"])
+    if items:
+        _write_file(hot)
+    for key, group in groups.items():
+        for item in group:
+            change_feed.publish(collection, item, item, segment=f"{collection}.{key}",
+                                moved_from=collection)
+    return {key: len(group) for key, group in sorted(groups.items())}
+
+
+def _referencing_ids(col: _Collection, field: str, ids: Iterable[str]) -> List[str]:
+    """
+    Retorna os IDs dos registros de uma coleção cujo campo referencia algum dos IDs.
+    Usa o índice secundário do campo quando existir.
+    """
+    index = col.indexes.get(field)
+    if index is not None:
+        return [ref for _id in ids for ref in index.get(_id, ())]
+    ids = set(ids)
+    return [item["id"] for item in col.records.values() if item.get(field) in ids]
+
+
+def delete_many(collection: str,
+                predicate_or_ids: Union[Callable[[Dict[str, Any]], bool], Iterable[str]],
+                cascade: bool = True) -> Dict[str, int]:
+    """
+    Deleta vários documentos de uma vez, aplicando as regras de cascata.
+
+    Os IDs removidos de cada coleção são reunidos primeiro e cada coleção
+    afetada é gravada uma única vez no final.
+
+    Args:
+        collection: Nome da coleção
+        predicate_or_ids: Função que recebe um documento e indica se ele deve
+            ser removido, ou uma lista de IDs
+        cascade: Se True, remove também os documentos dependentes (CASCADE_RULES)
+
+    Returns:
+        Dict[str, int]: Número de documentos removidos por coleção
+    """
+    col = _get_collection(collection)
+    if callable(predicate_or_ids):
+        ids = [item["id"] for item in list(col.records.values()) if predicate_or_ids(_copy(item))]
+    else:
+        ids = [_id for _id in predicate_or_ids if _id in col.records]
+
+    # Reúne os IDs a remover em cada coleção seguindo as regras de cascata
+    to_delete: Dict[str, Dict[str, None]] = {collection: dict.fromkeys(ids)}
+    pending = [(collection, ids)]
+    while cascade and pending:
+        parent, parent_ids = pending.pop()
+        for child, field in CASCADE_RULES.get(_base_name(parent), []):
+            for segment in _segments(child):
+                child_ids = [_id for _id in _referencing_ids(_get_collection(segment), field, parent_ids)
+                             if _id not in to_delete.get(segment, {})]
+                if child_ids:
+                    to_delete.setdefault(segment, {}).update(dict.fromkeys(child_ids))
+                    pending.append((segment, child_ids))
+
+    # Uma única escrita por coleção afetada, dos dependentes para os pais: cada
+    # remoção é publicada enquanto os registros que ela referencia ainda existem
+    removed = {}
+    for name, name_ids in reversed(list(to_delete.items())):
+        target = _get_collection(name)
+        with target.lock:
+            olds = [old for old in map(target.remove, name_ids) if old is not None]
+            if olds:
+                _write_file(target)
+            for old in olds:
+                _notify(name, old, None)
+        removed[name] = len(olds)
+    return {name: removed[name] for name in to_delete}
+
+
+def convert_storage() -> Dict[str, int]:
+    """
+    Regrava no formato configurado todas as coleções e partições cujos
+    arquivos estão em outro formato. Cada arquivo é substituído de forma
+    atômica, então leitores e escritores concorrentes não são afetados.
+
+    Returns:
+        Dict[str, int]: Número de registros regravados por coleção/partição
+    """
+    converted = {}
+    for name in discover_collections():
+        for segment in _segments(name):
+            col = _get_collection(segment)
+            with col.lock:
+                if not _needs_conversion(col, _collection_files(segment)):
+                    continue
+                col.dirty = set(range(col.shard_count))
+                _flush_collection(col)
+                converted[segment] = len(col.records)
+    if converted:
+        logger.info("Coleções convertidas para o formato configurado: %s", converted)
+    return converted
+
+
+def _file_size(collection: str) -> int:
+    return sum(os.path.getsize(path) for path in _collection_files(collection))
+
+
+def vacuum() -> Dict[str, Dict[str, int]]:
+    """
+    Remove documentos órfãos, cujo documento referenciado em CASCADE_RULES não existe mais.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Por coleção, documentos removidos e bytes recuperados
+    """
+    flush()
+    children = {segment for rules in CASCADE_RULES.values()
+                for child, _ in rules for segment in _segments(child)}
+    sizes_before = {name: _file_size(name) for name in children}
+    removed: Dict[str, int] = {}
+
+    # Percorre as regras dos pais para os filhos, para que a cascata de um
+    # órfão removido já alcance os dependentes dele
+    for parent, rules in CASCADE_RULES.items():
+        parent_ids = set()
+        for segment in _segments(parent):
+            parent_ids.update(_get_collection(segment).records)
+        for child, field in rules:
+            is_orphan = lambda item, field=field: item.get(field) not in parent_ids
+            for segment in _segments(child):
+                for name, count in delete_many(segment, is_orphan).items():
+                    removed[name] = removed.get(name, 0) + count
+
+    flush()
+    report = {}
+    for name in sorted(set(removed) | children):
+        report[name] = {
+            "removed": removed.get(name, 0),
+            "bytes_reclaimed": max(sizes_before.get(name, 0) - _file_size(name), 0),
+        }
+    return report
+
 
 def find_by_id(collection: str, _id: str) -> Dict[str, Any]:
     """
     Encontra um documento pelo ID.
-    
+
     Args:
         collection: Nome da coleção
         _id: ID do documento a ser encontrado
-        
+
     Returns:
         Dict[str, Any]: Documento encontrado ou None se não existir
     """
-    data = load_data(collection)
-    for item in data:
-        if item.get("id") == _id:
-            return item
-    return None
+    item = _get_collection(collection).records.get(_id)
+    return _copy(item) if item is not None else None
 
-def find_many(collection: str, query: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+def find_many(collection: str, query: Union[Dict[str, Any], CompiledQuery] = None,
+              fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
     Encontra documentos que correspondem à query.
-    
+
+    A query aceita igualdade e os operadores $eq, $ne, $in, $gt, $gte, $lt,
+    $lte e $between (ver app/query.py) e é compilada uma única vez. Entre as
+    condições $eq/$in em campos com índice, é usada a que seleciona menos
+    documentos.
+
     Args:
         collection: Nome da coleção
-        query: Dicionário com os critérios de busca
-        
+        query: Critérios de busca (dicionário ou query já compilada)
+        fields: Campos retornados de cada documento, além do ID (None retorna
+            todos). Documentos parciais não devem ser gravados de volta com save_data()
+
     Returns:
         List[Dict[str, Any]]: Lista de documentos que correspondem à query
+
+    Raises:
+        ValueError: Se a query usar um operador desconhecido ou um operando inválido
     """
-    data = load_data(collection)
-    if not query:
-        return data
-    
-    result = []
-    for item in data:
-        matches = all(item.get(k) == v for k, v in query.items())
-        if matches:
-            result.append(item)
+    compiled = compile_query(query)
+    col = _get_collection(collection)
+    candidates = _plan(col, compiled)
+    if not compiled.conditions:
+        return [_copy(item, fields) for item in candidates]
+    return [_copy(item, fields) for item in candidates if compiled(item)]
+
+def _plan(col: _Collection, compiled: CompiledQuery) -> List[Dict[str, Any]]:
+    """
+    Escolhe os documentos candidatos de uma query: pelo índice mais seletivo
+    ou, sem índice aplicável, a coleção inteira.
+    """
+    best = None
+    for field, values in compiled.lookups.items():
+        index = col.indexes.get(field)
+        if index is None:
+            continue
+        try:
+            buckets = [index.get(value, ()) for value in values]
+        except TypeError:
+            continue
+        size = sum(len(bucket) for bucket in buckets)
+        if best is None or size < best[0]:
+            best = (size, buckets)
+    if best is not None:
+        ids = [_id for bucket in best[1] for _id in list(bucket)]
+        if len(best[1]) > 1:
+            ids = list(dict.fromkeys(ids))
+        return [item for item in map(col.records.get, ids) if item is not None]
+    return list(col.records.values())
+
+def export_collections() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Copia o estado atual de todas as coleções e partições (carregando as que
+    ainda estão só no disco). Cada coleção é copiada sob a sua trava.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Registros de cada coleção/partição
+    """
+    names = set(discover_collections())
+    with _registry_lock:
+        names.update(_base_name(name) for name in _collections)
+    result = {}
+    for name in sorted(names):
+        for segment in _segments(name):
+            col = _get_collection(segment)
+            with col.lock:
+                result[segment] = list(col.records.values())
     return result
 
+
+def snapshot_collections(attempts: int = 3) -> tuple:
+    """
+    Tira uma cópia consistente (de um mesmo instante) de todas as coleções,
+    sem bloquear leituras e escritas além da cópia das referências de cada coleção.
+
+    As coleções são copiadas uma a uma; as alterações feitas durante a cópia
+    são então reaplicadas a partir do feed de alterações, de modo que o
+    resultado corresponde exatamente ao estado após o último evento lido.
+    Os registros não são duplicados: como toda escrita substitui o dicionário
+    do registro, as referências copiadas não mudam depois.
+
+    Args:
+        attempts: Número de tentativas se o feed descartar eventos durante a cópia
+
+    Returns:
+        tuple: (número de sequência do feed, {coleção/partição: {ID: registro}})
+
+    Raises:
+        RuntimeError: Se não for possível obter uma cópia consistente
+    """
+    for _ in range(attempts):
+        start_seq = change_feed.last_seq
+        state = {name: {item["id"]: item for item in items}
+                 for name, items in export_collections().items()}
+        events, reset = change_feed.read(start_seq, timeout=0)
+        if reset:
+            continue
+        for event in events:
+            target = state.setdefault(event["segment"], {})
+            if event["op"] == "move":
+                state.setdefault(event["moved_from"], {}).pop(event["id"], None)
+                target[event["id"]] = event["new"]
+            elif event["new"] is None:
+                target.pop(event["id"], None)
+            else:
+                target[event["id"]] = restore_redacted(event["segment"], event["new"])
+        return (events[-1]["seq"] if events else start_seq), state
+    raise RuntimeError("Não foi possível obter uma cópia consistente das coleções")
+
+
+def apply_change(collection: str, _id: str, record: Optional[Dict[str, Any]]):
+    """
+    Aplica em memória uma alteração feita em outro processo (réplica de leitura):
+    o registro é gravado como recebido, com a mesma versão, sem gravação em disco.
+    Os listeners são notificados normalmente.
+
+    Args:
+        collection: Nome da coleção ou partição
+        _id: ID do registro
+        record: Registro novo, ou None para removê-lo
+    """
+    col = _get_collection(collection)
+    with col.lock:
+        current = col.records.get(_id)
+        if record is None:
+            if current is None:
+                return
+            col.remove(_id)
+        else:
+            if current == record:
+                return
+            record = dict(record)
+            col.put(record)
+        col.dirty.clear()
+        _notify(collection, current, record)
+
+
+def apply_move(source: str, target: str, record: Dict[str, Any]):
+    """
+    Aplica em memória a movimentação de um registro entre partições feita em
+    outro processo. Como em archive_partitioned(), não notifica os listeners.
+
+    Args:
+        source: Partição de origem
+        target: Partição de destino
+        record: Registro movido
+    """
+    src, dst = _get_collection(source), _get_collection(target)
+    with src.lock:
+        src.remove(record["id"])
+        src.dirty.clear()
+        with dst.lock:
+            dst.put(dict(record))
+            dst.dirty.clear()
+    change_feed.publish(_base_name(target), record, record, segment=target, moved_from=source)
+
+
+def install_collections(collections: Dict[str, List[Dict[str, Any]]]):
+    """
+    Substitui o estado em memória pelo de uma cópia exportada com
+    export_collections(), aplicando apenas as diferenças (com notificação).
+
+    Args:
+        collections: Registros de cada coleção/partição
+    """
+    with _registry_lock:
+        names = set(_collections) | set(collections)
+    for name in sorted(names):
+        records = {item["id"]: item for item in collections.get(name, [])}
+        col = _register(name)
+        with col.lock:
+            if not col.loaded:
+                col.build([])
+            for _id in [_id for _id in col.records if _id not in records]:
+                apply_change(name, _id, None)
+            for _id, record in records.items():
+                apply_change(name, _id, record)
+
+def scan(collection: str, predicate: Callable[..., bool], *args) -> List[Dict[str, Any]]:
+    """
+    Varre uma coleção inteira e retorna os documentos aceitos pelo predicado.
+
+    A varredura é feita nos registros em memória, sem ler arquivos: vê as
+    escritas ainda não gravadas (write-behind) e funciona nas réplicas de
+    leitura. O predicado não deve alterar o documento.
+
+    Args:
+        collection: Nome da coleção
+        predicate: Função chamada como predicate(documento, *args), ou query
+            compilada com compile_query() (que também pode usar os índices)
+        *args: Argumentos adicionais do predicado
+
+    Returns:
+        List[Dict[str, Any]]: Documentos aceitos pelo predicado
+    """
+    col = _get_collection(collection)
+    candidates = _plan(col, predicate) if isinstance(predicate, CompiledQuery) else list(col.records.values())
+    return [_copy(item) for item in candidates if predicate(item, *args)]
+
 def get_next_numeric_id(collection: str) -> int:
     """
     Gera o próximo ID numérico para uma coleção.
-    
+
     Args:
         collection: Nome da coleção
-        
+
     Returns:
         int: Próximo ID numérico disponível
     """
@@ -0,0 +1,97 @@
+"""
+Módulo do codificador JSON das respostas.
+Substitui o provedor JSON padrão do Flask (módulo json da biblioteca padrão)
+por um mais rápido quando disponível:
+- "orjson": usa o pacote orjson (dependência opcional), várias vezes mais
+  rápido para as listagens grandes (/search, /reservations/<owner_id>)
+- "stdlib": provedor padrão do Flask
+
+A saída do orjson segue a do provedor padrão: chaves ordenadas (sort_keys),
+datas no formato HTTP e os mesmos tipos extras (Decimal, UUID, dataclasses),
+tratados pela função padrão do Flask. Valores que o orjson não codifica
+(ex.: inteiros maiores que 64 bits) usam o provedor padrão. A diferença é que
+caracteres não ASCII são enviados em UTF-8, sem escapes \\uXXXX.
+
+Configuração (lida em create_app): JSON_PROVIDER=auto (padrão: orjson se
+instalado), orjson ou stdlib.
+"""
+
+import importlib.util
+
+from flask.json.provider import DefaultJSONProvider
+
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+
+PROVIDERS = ("auto", "orjson", "stdlib")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Provedor JSON do Flask baseado no orjson, com as mesmas opções do provedor padrão.
+    """
+
+    def __init__(self, app):
+        import orjson
+
+        super().__init__(app)
+        self._orjson = orjson
+
+    def _options(self):
+        options = (self._orjson.OPT_NON_STR_KEYS | self._orjson.OPT_PASSTHROUGH_DATETIME
+                   | self._orjson.OPT_PASSTHROUGH_DATACLASS)
+        if self.sort_keys:
+            options |= self._orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj):
+        """
+        Codifica obj em JSON compacto (UTF-8).
+
+        Returns:
+            bytes: JSON codificado
+        """
+        try:
+            return self._orjson.dumps(obj, default=self.default, option=self._options())
+        except self._orjson.JSONEncodeError:
+            return super().dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Opções do módulo json (ex.: indent) ficam com o provedor padrão
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            # Saída indentada do modo debug
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+
+def create_json_provider(app, name="auto"):
+    """
+    Cria o provedor JSON da aplicação.
+
+    Args:
+        app: Aplicação Flask
+        name: auto, orjson ou stdlib (ver PROVIDERS)
+
+    Returns:
+        DefaultJSONProvider: Provedor, atribuído a app.json em create_app
+
+    Raises:
+        ValueError: Se o provedor for inválido, ou orjson sem o pacote instalado
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Provedor JSON inválido: {name}")
+    if name == "orjson" and not HAS_ORJSON:
+        raise ValueError("JSON_PROVIDER=orjson requer o pacote orjson (pip install orjson)")
+    if name == "stdlib" or not HAS_ORJSON:
+        return DefaultJSONProvider(app)
+    return OrjsonProvider(app)
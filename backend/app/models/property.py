@@ -19,10 +19,13 @@ class Property:
         available_until: Data de disponibilidade final (string em formato ISO)
         owner_id: ID do proprietário do imóvel
         image_url: URL da imagem do imóvel (opcional)
+        latitude: Latitude do imóvel (opcional)
+        longitude: Longitude do imóvel (opcional)
     """
     
     def __init__(self, id, title, description, address, city, price_per_day,
-                 available_from, available_until, owner_id, image_url=None):
+                 available_from, available_until, owner_id, image_url=None,
+                 latitude=None, longitude=None):
         """
         Inicializa um novo imóvel.
         
@@ -36,6 +39,8 @@ class Property:
             available_until: Data de disponibilidade final (string em formato ISO)
             owner_id: ID do proprietário do imóvel
             image_url: URL da imagem do imóvel (opcional)
+            latitude: Latitude do imóvel (opcional)
+            longitude: Longitude do imóvel (opcional)
         """
         self.id = id
         self.title = title
@@ -47,6 +52,8 @@ class Property:
         self.available_until = available_until
         self.owner_id = owner_id
         self.image_url = image_url
+        self.latitude = latitude
+        self.longitude = longitude
 
     def to_dict(self):
         """
@@ -65,7 +72,9 @@ class Property:
             "available_from": self.available_from,
             "available_until": self.available_until,
             "owner_id": self.owner_id,
-            "image_url": self.image_url
+            "image_url": self.image_url,
+            "latitude": self.latitude,
+            "longitude": self.longitude
         }
 
     @staticmethod
@@ -89,5 +98,7 @@ class Property:
             available_from=data["available_from"],
             available_until=data["available_until"],
             owner_id=data["owner_id"],
-            image_url=data.get("image_url")
+            image_url=data.get("image_url"),
+            latitude=data.get("latitude"),
+            longitude=data.get("longitude")
         )
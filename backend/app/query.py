@@ -0,0 +1,165 @@
+"""
+Módulo de consultas às coleções.
+Compila as queries aceitas por find_many() em um predicado, uma única vez
+por consulta, e informa ao data_manager quais condições podem usar índices.
+
+Uma query é um dicionário campo -> condição. A condição pode ser um valor
+(igualdade) ou um dicionário de operadores, todos obrigatórios:
+- {"$eq": v} / {"$ne": v}: igual / diferente de v
+- {"$in": [v1, v2, ...]}: igual a algum dos valores
+- {"$gt": v}, {"$gte": v}, {"$lt": v}, {"$lte": v}: comparações
+- {"$between": [a, b]}: entre a e b, inclusive
+- {"$truthy": True} / {"$truthy": False}: valor verdadeiro / falso ou ausente
+  (como em "if documento.get(campo)")
+
+Exemplo: {"property_id": {"$in": ids}, "end_date": {"$gte": "2025-01-01"}}
+
+Os valores são comparados sem conversão de tipo. Comparações entre tipos
+incompatíveis (ou com campos ausentes) simplesmente não casam.
+"""
+
+import operator
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _in(value: Any, options: Any) -> bool:
+    return value in options
+
+
+def _between(value: Any, bounds: Tuple[Any, Any]) -> bool:
+    return bounds[0] <= value <= bounds[1]
+
+
+def _truthy(value: Any, expected: bool) -> bool:
+    return bool(value) == expected
+
+
+# Operador -> função de teste (valor do campo, operando)
+OPERATORS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$in": _in,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$between": _between,
+    "$truthy": _truthy,
+}
+
+
+def _is_operator_dict(condition: Any) -> bool:
+    return isinstance(condition, dict) and bool(condition) and all(
+        isinstance(key, str) and key.startswith("$") for key in condition)
+
+
+def _compile_operand(op: str, operand: Any) -> Any:
+    """
+    Valida e prepara o operando de um operador.
+
+    Raises:
+        ValueError: Se o operando não for válido para o operador
+    """
+    if op == "$in":
+        if isinstance(operand, (str, bytes, dict)) or not hasattr(operand, "__iter__"):
+            raise ValueError("O operador $in espera uma lista de valores")
+        operand = tuple(operand)
+        try:
+            return frozenset(operand)
+        except TypeError:
+            # Valores não hasheáveis: busca linear na tupla
+            return operand
+    if op == "$between":
+        if isinstance(operand, (str, bytes, dict)) or len(operand) != 2:
+            raise ValueError("O operador $between espera [mínimo, máximo]")
+        return tuple(operand)
+    if op == "$truthy":
+        return bool(operand)
+    return operand
+
+
+class CompiledQuery:
+    """
+    Query compilada em uma lista de condições.
+    Pode ser chamada como predicado (query(documento) -> bool), por exemplo
+    em scan().
+
+    Attributes:
+        conditions: Condições (campo, função de teste, operando), todas obrigatórias
+        lookups: Valores aceitos por campo nas condições $eq/$in (campo -> valores),
+            usados pelo data_manager para escolher um índice
+    """
+
+    __slots__ = ("conditions", "lookups")
+
+    def __init__(self, conditions: List[Tuple[str, Any, Any]], lookups: Dict[str, Tuple[Any, ...]]):
+        self.conditions = conditions
+        self.lookups = lookups
+
+    def __call__(self, item: Dict[str, Any]) -> bool:
+        get = item.get
+        for field, test, operand in self.conditions:
+            try:
+                if not test(get(field), operand):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+
+def compile_query(query: Optional[Dict[str, Any]]) -> CompiledQuery:
+    """
+    Compila uma query em um predicado.
+
+    Args:
+        query: Dicionário com os critérios de busca (None ou vazio aceita tudo)
+
+    Returns:
+        CompiledQuery: Query compilada
+
+    Raises:
+        ValueError: Se a query usar um operador desconhecido ou um operando inválido
+    """
+    if isinstance(query, CompiledQuery):
+        return query
+    conditions = []
+    lookups = {}
+    for field, condition in (query or {}).items():
+        if not _is_operator_dict(condition):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            test = OPERATORS.get(op)
+            if test is None:
+                raise ValueError(f"Operador de consulta desconhecido: {op}")
+            operand = _compile_operand(op, operand)
+            conditions.append((field, test, operand))
+            if op == "$eq":
+                values = (operand,)
+            elif op == "$in":
+                values = tuple(operand)
+            else:
+                continue
+            # Com várias condições de igualdade no mesmo campo, vale a mais restritiva
+            if field not in lookups or len(values) < len(lookups[field]):
+                lookups[field] = values
+    return CompiledQuery(conditions, lookups)
+
+
+def project(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Retorna apenas os campos pedidos de um documento (o ID sempre é incluído).
+
+    Args:
+        item: Documento
+        fields: Campos a manter (None mantém todos)
+
+    Returns:
+        Dict[str, Any]: Novo dicionário com os campos encontrados no documento
+    """
+    if fields is None:
+        return dict(item)
+    result = {"id": item.get("id")}
+    for field in fields:
+        if field in item:
+            result[field] = item[field]
+    return result
@@ -7,8 +7,10 @@ Este arquivo contém as rotas relacionadas à autenticação de usuários:
 """
 
 from flask import Blueprint, request, jsonify
-from app.data_manager import save_data, find_many
-from app.services.auth_service import update_user_info
+from app.data_manager import save_data, VersionConflict
+from app.services.auth_service import find_user_by_email, update_user_info
+from app.services.session_service import create_session
+from app.routes.helpers import get_expected_version, versioned_response, version_conflict_response, authorized_user
 
 # Cria um blueprint para agrupar as rotas de autenticação
 auth_bp = Blueprint('auth', __name__)
@@ -37,8 +39,7 @@ def register():
         return jsonify({'error': 'Dados inválidos'}), 400
 
     # Verifica se o email já está cadastrado
-    existing_users = find_many('users', {'email': email})
-    if existing_users:
+    if find_user_by_email(email):
         return jsonify({'error': 'E-mail já cadastrado'}), 409
 
     user = {
@@ -63,7 +64,8 @@ def login():
     - email: Email do usuário
     
     Retorna:
-    - 200: Login bem-sucedido com informações do usuário
+    - 200: Login bem-sucedido com informações do usuário e o token de sessão
+      (enviado nas próximas requisições no cabeçalho Authorization: Bearer <token>)
     - 400: Email não fornecido
     - 404: Usuário não encontrado
     """
@@ -73,18 +75,21 @@ def login():
     if not email:
         return jsonify({'error': 'Email é obrigatório'}), 400
 
-    users = find_many('users', {'email': email})
-    if not users:
+    user = find_user_by_email(email)
+    if not user:
         return jsonify({'error': 'Usuário não encontrado'}), 404
 
-    user = users[0]  # Get the first matching user
+    token, expires_in = create_session(user)
     return jsonify({
         'message': 'Login bem-sucedido',
+        'token': token,
+        'expires_in': expires_in,
         'user': {
             'id': user['id'],
             'name': user['name'],
             'email': user['email'],
-            'user_type': user['user_type']
+            'user_type': user['user_type'],
+            'version': user['version']
         }
     }), 200
 
@@ -97,18 +102,30 @@ def edit_user():
     - id: ID do usuário
     - name: Novo nome do usuário
     - email: Novo email do usuário
+    - Authorization: Bearer <token> (cabeçalho, token emitido no login)
+    - If-Match: Versão do usuário lida pelo cliente (cabeçalho opcional)
     
     Retorna:
-    - 200: Dados atualizados com sucesso
+    - 200: Dados atualizados com sucesso (com a nova versão)
     - 400: Erro na atualização
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Token de sessão de outro usuário
+    - 409: Usuário alterado por outra requisição (com a versão atual)
     """
     data = request.json
-    user_id = data.get("id")  # ou você pode pegar de um token se estiver usando autenticação
+    user_id = data.get("id")
     name = data.get("name")
     email = data.get("email")
 
+    _, error = authorized_user(user_id, lookup=False)
+    if error:
+        return error
+
     try:
-        update_user_info(user_id, name, email)
-        return jsonify({"message": "Dados atualizados com sucesso"}), 200
+        user = update_user_info(user_id, name, email, get_expected_version())
+        return versioned_response({"message": "Dados atualizados com sucesso", "version": user["version"]},
+                                  user["version"])
+    except VersionConflict as e:
+        return version_conflict_response(e.current_version)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
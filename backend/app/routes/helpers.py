@@ -0,0 +1,251 @@
+"""
+Módulo de funções auxiliares das rotas.
+Concentra tratamentos HTTP comuns aos blueprints:
+- Autorização pelo token de sessão (cabeçalho Authorization)
+- Leitura da versão esperada no cabeçalho If-Match
+- Respostas com ETag e respostas de conflito (409)
+- Streams Server-Sent Events do feed de alterações
+- Redirecionamento das escritas de uma réplica de leitura para o primário
+"""
+
+import asyncio
+import json
+
+from flask import Response, redirect, request, jsonify
+
+from app.data_manager import change_feed, find_by_id
+from app.services.session_service import get_session, sessions_required
+
+# Intervalo, em segundos, entre mensagens de keep-alive nos streams SSE
+SSE_KEEPALIVE_SECONDS = 15
+
+# Tempo, em ms, que o navegador espera antes de reconectar um stream SSE
+SSE_RETRY_MS = 3000
+
+# Chave do environ em que event_stream() deixa o stream para o servidor ASGI
+ASYNC_BODY_ENVIRON_KEY = "app.async_body"
+
+# Chave do environ com o pool de threads do servidor ASGI, em que os streams
+# filtram os eventos (a função select pode ler os dados)
+ASYNC_EXECUTOR_ENVIRON_KEY = "app.async_executor"
+
+
+def _bearer_token():
+    """
+    Lê o token do cabeçalho Authorization: Bearer <token> (None se ausente).
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+
+def authorized_user(user_id, lookup=True):
+    """
+    Identifica o usuário de uma requisição que informa o próprio ID.
+
+    O cabeçalho Authorization: Bearer <token> é obrigatório: o usuário vem da
+    sessão (sem acessar os dados) e precisa ser o mesmo do ID informado. Só
+    com SESSION_REQUIRED=off uma requisição sem o cabeçalho é aceita, e o
+    usuário é buscado pelo ID (modo obsoleto, para clientes antigos).
+
+    Args:
+        user_id: ID do usuário informado na rota ou no corpo
+        lookup: Se False, no modo obsoleto sem token o usuário não é buscado (retorna None)
+
+    Returns:
+        tuple: (usuário com id e user_type, ou None se não existir; resposta de erro
+            401/403, ou None se a requisição pode continuar)
+    """
+    token = _bearer_token()
+    if not token:
+        if sessions_required():
+            return None, (jsonify({"error": "Token de sessão obrigatório"}), 401)
+        return (find_by_id("users", user_id) if lookup else None), None
+
+    session = get_session(token)
+    if session is None:
+        return None, (jsonify({"error": "Sessão inválida ou expirada"}), 401)
+    if session["user_id"] != user_id:
+        return None, (jsonify({"error": "Sessão de outro usuário"}), 403)
+    return {"id": session["user_id"], "user_type": session["user_type"]}, None
+
+
+def session_user():
+    """
+    Identifica o usuário da sessão em uma requisição que não informa um ID
+    (ex.: envio de imagens). O cabeçalho Authorization: Bearer <token> segue
+    as mesmas regras de authorized_user().
+
+    Returns:
+        tuple: (usuário com id e user_type, ou None no modo obsoleto sem token;
+            resposta de erro 401, ou None se a requisição pode continuar)
+    """
+    token = _bearer_token()
+    if not token:
+        if sessions_required():
+            return None, (jsonify({"error": "Token de sessão obrigatório"}), 401)
+        return None, None
+
+    session = get_session(token)
+    if session is None:
+        return None, (jsonify({"error": "Sessão inválida ou expirada"}), 401)
+    return {"id": session["user_id"], "user_type": session["user_type"]}, None
+
+
+def get_expected_version():
+    """
+    Lê a versão esperada do registro no cabeçalho If-Match.
+    Aceita o formato de ETag ("3", W/"3") ou o número puro (3).
+
+    Returns:
+        int: Versão esperada, 0 se o cabeçalho não contém uma versão válida
+            (nunca corresponde a um registro), ou None se não houver cabeçalho
+            (ou se ele for "*")
+    """
+    etags = request.if_match
+    if not etags or etags.star_tag:
+        return None
+    for tag in sorted(etags.as_set(include_weak=True)):
+        if tag.isdigit():
+            return int(tag)
+    return 0
+
+
+def versioned_response(payload, version, status=200):
+    """
+    Monta uma resposta JSON com o cabeçalho ETag da versão do registro.
+
+    Args:
+        payload: Dados da resposta
+        version: Versão atual do registro
+        status: Código HTTP
+
+    Returns:
+        tuple: Resposta e código HTTP
+    """
+    response = jsonify(payload)
+    response.headers["ETag"] = f'"{version}"'
+    return response, status
+
+
+def version_conflict_response(current_version):
+    """
+    Monta a resposta 409 de uma escrita feita sobre uma versão desatualizada.
+
+    Args:
+        current_version: Versão atual do registro (None se ele foi removido)
+
+    Returns:
+        tuple: Resposta e código HTTP 409
+    """
+    payload = {
+        "error": "O registro foi alterado por outra requisição",
+        "current_version": current_version
+    }
+    if current_version is None:
+        return jsonify(payload), 409
+    return versioned_response(payload, current_version, 409)
+
+
+def event_stream(select):
+    """
+    Monta uma resposta Server-Sent Events com eventos do feed de alterações.
+
+    A leitura começa após o cursor recebido no cabeçalho Last-Event-ID
+    (enviado pelo navegador ao reconectar) ou no parâmetro last_event_id;
+    sem cursor, apenas alterações novas são enviadas. Se o cursor não puder
+    ser retomado, um evento "reset" avisa o cliente para recarregar os dados.
+
+    No modo ASGI (app/asgi.py), o stream é entregue ao servidor como um
+    iterador assíncrono (em ASYNC_BODY_ENVIRON_KEY) e a espera por eventos
+    não ocupa uma thread.
+
+    Args:
+        select: Função que recebe um evento do feed e retorna (nome do evento,
+            dados) para enviá-lo ao cliente, ou None para ignorá-lo
+
+    Returns:
+        Response: Resposta em streaming (text/event-stream)
+    """
+    cursor = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    stream = _EventStream(select, *change_feed.parse_cursor(cursor),
+                          executor=request.environ.get(ASYNC_EXECUTOR_ENVIRON_KEY))
+    request.environ[ASYNC_BODY_ENVIRON_KEY] = stream
+
+    response = Response(stream, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+class _EventStream:
+    """
+    Mensagens SSE de um stream, iteráveis com for (WSGI) ou async for (ASGI).
+    No modo ASGI, a espera por eventos acontece no loop, mas select (que pode
+    ler os dados e esperar pelas travas das coleções) roda no pool de threads
+    do servidor, sem bloquear os demais clientes.
+    """
+
+    def __init__(self, select, seq, reset, executor=None):
+        self.select = select
+        self.seq = seq
+        self.reset = reset
+        self.executor = executor
+
+    def __iter__(self):
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            if self.reset:
+                yield self._reset_message()
+            events, self.reset = change_feed.read(self.seq, timeout=SSE_KEEPALIVE_SECONDS)
+            yield from self._messages(events)
+
+    async def __aiter__(self):
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            if self.reset:
+                yield self._reset_message()
+            events, self.reset = await change_feed.read_async(self.seq, timeout=SSE_KEEPALIVE_SECONDS)
+            if events and not self.reset:
+                messages = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, lambda: list(self._messages(events)))
+            else:
+                messages = self._messages(events)
+            for message in messages:
+                yield message
+
+    def _reset_message(self):
+        self.seq = change_feed.last_seq
+        return f"id: {change_feed.cursor(self.seq)}\nevent: reset\ndata: {{}}\n\n"
+
+    def _messages(self, events):
+        if self.reset:
+            return
+        if not events:
+            # Mantém a conexão ativa e avança o cursor do cliente
+            yield f"id: {change_feed.cursor(self.seq)}\n\n"
+            return
+        for event in events:
+            self.seq = event["seq"]
+            selected = self.select(event)
+            if selected is not None:
+                name, payload = selected
+                data = json.dumps(payload, ensure_ascii=False)
+                yield f"id: {change_feed.cursor(self.seq)}\nevent: {name}\ndata: {data}\n\n"
+
+
+def primary_redirect_response(primary_url):
+    """
+    Monta a resposta de uma escrita recebida por uma réplica de leitura:
+    redireciona para a mesma rota no primário (307 mantém o método e o corpo).
+
+    Args:
+        primary_url: URL base do primário (ex.: http://localhost:5000), ou None
+
+    Returns:
+        Response: Redirecionamento 307, ou 503 se o primário não foi configurado
+    """
+    if not primary_url:
+        return jsonify({"error": "Réplica somente leitura"}), 503
+    return redirect(primary_url.rstrip("/") + request.full_path.rstrip("?"), code=307)
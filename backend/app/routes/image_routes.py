@@ -0,0 +1,103 @@
+"""
+Módulo de rotas das imagens.
+Este arquivo contém as rotas de envio e de acesso às imagens dos imóveis:
+- Envio de uma imagem (gravada por conteúdo, ver app/services/images.py)
+- Acesso à imagem original ou a uma miniatura, com cache HTTP
+"""
+
+import os
+
+from flask import Blueprint, request, jsonify, send_file
+from app.routes.helpers import session_user
+from app.services.images import (MAX_IMAGE_BYTES, THUMBNAIL_SIZES, ImageError, image_file, image_url,
+                                 store_image)
+
+# Cache das imagens: o conteúdo de um ID nunca muda
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# Cache de uma miniatura ainda não gerada (servida com a imagem original)
+PENDING_CACHE = "public, max-age=60"
+
+# Cria um blueprint para agrupar as rotas das imagens
+image_bp = Blueprint('images', __name__)
+
+@image_bp.route('', methods=['POST'])
+def upload_image():
+    """
+    Rota para enviar uma imagem.
+    O corpo pode ser a própria imagem (Content-Type: image/*) ou um formulário
+    multipart com o campo "image". O ID retornado é informado em image_id ao
+    criar ou atualizar um imóvel, por isso o envio exige a sessão de um locador.
+    
+    Recebe:
+    - Imagem JPEG, PNG, GIF ou WebP de até 10 MB
+    - Authorization: Bearer <token> (cabeçalho)
+    
+    Retorna:
+    - 201: Imagem gravada (image_id, url e URLs das miniaturas)
+    - 200: Imagem já existente (mesmo conteúdo), com os mesmos dados
+    - 400: Nenhuma imagem enviada
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário da sessão não é locador
+    - 413: Imagem grande demais
+    - 415: Formato não suportado
+    """
+    user, error = session_user()
+    if error:
+        return error
+    if user is not None and user["user_type"] != "locador":
+        return jsonify({"error": "Usuário inválido"}), 403
+
+    if request.content_length is not None and request.content_length > MAX_IMAGE_BYTES + 64 * 1024:
+        return jsonify({"error": "Imagem grande demais"}), 413
+
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("image")
+        if upload is None:
+            return jsonify({"error": "Nenhuma imagem enviada"}), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+
+    try:
+        image_id, created = store_image(stream)
+    except ImageError as e:
+        return jsonify({"error": str(e)}), e.status
+
+    return jsonify({
+        "image_id": image_id,
+        "url": image_url(image_id),
+        "thumbnails": {size: image_url(image_id, size) for size in THUMBNAIL_SIZES}
+    }), 201 if created else 200
+
+@image_bp.route('/<image_id>', methods=['GET'])
+def get_image(image_id):
+    """
+    Rota para acessar uma imagem.
+    Responde com ETag e cache de longa duração (o conteúdo de um ID nunca
+    muda) e com 304 quando o cliente já tem a imagem (If-None-Match).
+    
+    Recebe:
+    - image_id: ID da imagem
+    - size: Miniatura (opcional, query string: small ou medium). Enquanto a
+      miniatura não foi gerada, a imagem original é servida com cache curto
+    
+    Retorna:
+    - 200: Imagem
+    - 304: Imagem não alterada
+    - 400: Tamanho inválido
+    - 404: Imagem não encontrada
+    """
+    size = request.args.get('size')
+    if size is not None and size not in THUMBNAIL_SIZES:
+        return jsonify({"error": "Tamanho inválido"}), 400
+
+    found = image_file(image_id, size)
+    if found is None:
+        return jsonify({"error": "Imagem não encontrada"}), 404
+    path, mimetype, exact = found
+
+    etag = f"{image_id}.{size}" if size and exact else image_id
+    response = send_file(os.path.abspath(path), mimetype=mimetype, etag=etag, conditional=True)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE if exact else PENDING_CACHE
+    return response
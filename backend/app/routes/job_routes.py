@@ -0,0 +1,75 @@
+"""
+Módulo de rotas das tarefas em segundo plano.
+Este arquivo contém as rotas de administração do agendador de tarefas
+(ver app/services/scheduler.py):
+- Estado do agendador e de cada tarefa (execuções, duração e CPU)
+- Execução imediata de uma tarefa
+- Pausa e retomada das tarefas
+
+As rotas que alteram o agendador exigem o cabeçalho X-Admin-Token com o valor
+da variável de ambiente ADMIN_TOKEN; sem ela configurada, respondem 403.
+"""
+
+import hmac
+import os
+
+from flask import Blueprint, jsonify, request
+from app.services.scheduler import scheduler
+
+# Cria um blueprint para agrupar as rotas das tarefas
+job_bp = Blueprint('jobs', __name__)
+
+@job_bp.before_request
+def require_admin_token():
+    if request.method in ("GET", "HEAD", "OPTIONS"):
+        return None
+    expected = os.environ.get("ADMIN_TOKEN")
+    if not expected:
+        return jsonify({"error": "Administração das tarefas desativada (defina ADMIN_TOKEN)"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), expected):
+        return jsonify({"error": "Token de administração inválido"}), 403
+    return None
+
+@job_bp.route('', methods=['GET'])
+def list_jobs():
+    """
+    Rota para consultar o estado do agendador de tarefas.
+
+    Retorna:
+    - running, paused e busy (pausado pela carga), in_flight e pause_in_flight
+    - cpu: orçamento (segundos de CPU por segundo) e uso na janela
+    - jobs: para cada tarefa, estado, intervalo, próxima execução, número de
+      execuções e falhas, duração e CPU da última execução, CPU total e último erro
+    """
+    return jsonify(scheduler.status())
+
+@job_bp.route('/<name>/run', methods=['POST'])
+def run_job(name):
+    """
+    Rota para executar uma tarefa registrada assim que possível.
+
+    Recebe:
+    - name: Nome da tarefa (na URL)
+
+    Retorna:
+    - Mensagem de sucesso (202) ou erro 404 se a tarefa não existir
+    """
+    if not scheduler.run_now(name):
+        return jsonify({"error": "Tarefa não encontrada"}), 404
+    return jsonify({"message": "Execução agendada"}), 202
+
+@job_bp.route('/pause', methods=['POST'])
+def pause_jobs():
+    """
+    Rota para pausar o início de novas execuções (as em andamento continuam).
+    """
+    scheduler.pause()
+    return jsonify({"message": "Tarefas pausadas"})
+
+@job_bp.route('/resume', methods=['POST'])
+def resume_jobs():
+    """
+    Rota para retomar as execuções pausadas.
+    """
+    scheduler.resume()
+    return jsonify({"message": "Tarefas retomadas"})
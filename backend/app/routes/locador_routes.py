@@ -2,16 +2,40 @@
 Módulo de rotas do locador.
 Este arquivo contém as rotas relacionadas às operações que um locador pode realizar:
 - Gerenciamento de imóveis (criar, listar, atualizar, deletar)
+- Calendário de preços por dia dos imóveis
 - Gerenciamento de reservas (visualizar, aprovar/recusar)
 """
 
 from flask import Blueprint, request, jsonify
-from app.data_manager import save_data, find_many, find_by_id, delete_data
+from app.data_manager import save_data, find_many, find_by_id, delete_many, find_many_all, find_by_id_all, VersionConflict, record_version, add_feed_context
+from app.routes.helpers import get_expected_version, versioned_response, version_conflict_response, event_stream, authorized_user
+from app.services.analytics import owner_report
+from app.services.expiry import is_expired
+from app.services.geo import parse_coordinates
+from app.services.images import find_image, image_url
+from app.services.pricing import parse_price_calendar
 from datetime import datetime
 
 # Cria um blueprint para agrupar as rotas do locador
 locador_bp = Blueprint('locador', __name__)
 
+def authorized_owner(owner_id):
+    """
+    Confere se a requisição é do locador dono dos dados (ver authorized_user).
+    
+    Args:
+        owner_id: ID do proprietário informado na rota ou no corpo, ou o dono do registro alterado
+        
+    Returns:
+        tuple: Resposta de erro 401/403, ou None se a requisição pode continuar
+    """
+    user, error = authorized_user(owner_id)
+    if error:
+        return error
+    if not user or user["user_type"] != "locador":
+        return jsonify({"error": "Usuário inválido"}), 403
+    return None
+
 @locador_bp.route("/properties", methods=["POST"])
 def create_property():
     """
@@ -27,11 +51,33 @@ def create_property():
     - available_until: Data de disponibilidade final
     - owner_id: ID do proprietário
     - image_url: URL da imagem do imóvel (opcional)
+    - image_id: ID de uma imagem enviada em POST /api/images (opcional, substitui image_url)
+    - latitude, longitude: Coordenadas do imóvel (opcionais, informadas juntas)
+    - price_calendar: Faixas de datas com outro preço por dia (opcional, ver app/services/pricing.py)
     
     Retorna:
     - 201: Imóvel cadastrado com sucesso
+    - 400: Coordenadas, calendário de preços ou imagem inválidos
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário inválido ou token de sessão de outro usuário
     """
     data = request.get_json()
+    error = authorized_owner(data.get("owner_id"))
+    if error:
+        return error
+    try:
+        latitude, longitude = parse_coordinates(data.get("latitude"), data.get("longitude"))
+    except ValueError:
+        return jsonify({"error": "Coordenadas inválidas"}), 400
+    try:
+        price_calendar = parse_price_calendar(data.get("price_calendar"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    image_id, url, error = property_image(data)
+    if error:
+        return error
+
     property_data = {
         "title": data["title"],
         "description": data["description"],
@@ -41,12 +87,33 @@ def create_property():
         "available_from": data["available_from"],
         "available_until": data["available_until"],
         "owner_id": data["owner_id"],
-        "image_url": data.get("image_url")
+        "image_url": url,
+        "image_id": image_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "price_calendar": price_calendar
     }
     
     saved_property = save_data('properties', property_data)
     return jsonify({"message": "Imóvel cadastrado", "property_id": saved_property['id']}), 201
 
+def property_image(data):
+    """
+    Lê a imagem informada ao criar ou atualizar um imóvel.
+    
+    Args:
+        data: Corpo da requisição
+        
+    Returns:
+        tuple: (ID da imagem ou None, URL da imagem, resposta de erro 400 ou None)
+    """
+    image_id = data.get("image_id")
+    if not image_id:
+        return None, data.get("image_url"), None
+    if find_image(image_id)[0] is None:
+        return None, None, (jsonify({"error": "Imagem não encontrada"}), 400)
+    return image_id, image_url(image_id), None
+
 @locador_bp.route("/properties/<owner_id>", methods=["GET"])
 def get_properties(owner_id):
     """
@@ -58,16 +125,22 @@ def get_properties(owner_id):
     
     Retorna:
     - Lista de imóveis com informações detalhadas
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário inválido ou token de sessão de outro usuário
     """
+    error = authorized_owner(owner_id)
+    if error:
+        return error
     properties = find_many('properties', {'owner_id': owner_id})
     result = []
     
     for p in properties:
         # Busca todas as reservas deste imóvel
-        reservations = find_many('reservations', {'property_id': p['id']})
+        reservations = find_many_all('reservations', {'property_id': p['id']}, fields=['id'])
         
         # Busca todas as avaliações deste imóvel
-        reviews = [r for r in find_many('reviews') if r['reservation_id'] in [res['id'] for res in reservations]]
+        reviews = find_many('reviews', {'reservation_id': {'$in': [res['id'] for res in reservations]}},
+                            fields=['rating'])
         
         avg_rating = round(sum(r['rating'] for r in reviews) / len(reviews), 1) if reviews else None
         
@@ -80,8 +153,13 @@ def get_properties(owner_id):
             "available_from": p['available_from'],
             "available_until": p['available_until'],
             "image_url": p.get('image_url'),
+            "image_id": p.get('image_id'),
+            "latitude": p.get('latitude'),
+            "longitude": p.get('longitude'),
+            "price_calendar": p.get('price_calendar', []),
             "average_rating": avg_rating,
-            "total_reservas": len(reservations)
+            "total_reservas": len(reservations),
+            "version": p['version']
         })
     
     return jsonify(result)
@@ -100,16 +178,53 @@ def update_property(id):
     - available_from: Nova data de disponibilidade inicial
     - available_until: Nova data de disponibilidade final
     - image_url: Nova URL da imagem (opcional)
+    - image_id: ID de uma imagem enviada em POST /api/images (opcional, substitui image_url;
+      sem o campo, a imagem atual é mantida, a menos que outra image_url seja informada)
+    - latitude, longitude: Novas coordenadas (opcionais, informadas juntas; sem os
+      campos, as atuais são mantidas, e null as remove)
+    - price_calendar: Novo calendário de preços (opcional; sem o campo, o atual é mantido)
+    - If-Match: Versão do imóvel lida pelo cliente (cabeçalho opcional)
     
     Retorna:
-    - 200: Imóvel atualizado com sucesso
+    - 200: Imóvel atualizado com sucesso (com a nova versão)
+    - 400: Coordenadas, calendário de preços ou imagem inválidos
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Token de sessão de outro usuário que não o dono do imóvel
     - 404: Imóvel não encontrado
+    - 409: Imóvel alterado por outra requisição (com a versão atual)
     """
     data = request.get_json()
+    update_coordinates = "latitude" in data or "longitude" in data
+    try:
+        latitude, longitude = parse_coordinates(data.get("latitude"), data.get("longitude"))
+    except ValueError:
+        return jsonify({"error": "Coordenadas inválidas"}), 400
+
+    try:
+        price_calendar = parse_price_calendar(data["price_calendar"]) if "price_calendar" in data else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    image_id, url, error = property_image(data)
+    if error:
+        return error
+
+    expected_version = get_expected_version()
     property_data = find_by_id('properties', id)
     
     if not property_data:
         return jsonify({"error": "Imóvel não encontrado"}), 404
+
+    error = authorized_owner(property_data["owner_id"])
+    if error:
+        return error
+
+    if expected_version is not None and expected_version != property_data["version"]:
+        return version_conflict_response(property_data["version"])
+
+    if ("image_id" not in data and property_data.get("image_id")
+            and data.get("image_url") in (None, property_data.get("image_url"))):
+        image_id, url = property_data["image_id"], property_data.get("image_url")
     
     property_data.update({
         "title": data["title"],
@@ -118,25 +233,90 @@ def update_property(id):
         "price_per_day": data["price_per_day"],
         "available_from": data["available_from"],
         "available_until": data["available_until"],
-        "image_url": data.get("image_url")
+        "image_url": url,
+        "image_id": image_id
     })
+    if update_coordinates:
+        property_data["latitude"] = latitude
+        property_data["longitude"] = longitude
+    if price_calendar is not None:
+        property_data["price_calendar"] = price_calendar
+    
+    try:
+        save_data('properties', property_data)
+    except VersionConflict as e:
+        return version_conflict_response(e.current_version)
+    return versioned_response({"message": "Imóvel atualizado", "version": property_data["version"]},
+                              property_data["version"])
+
+@locador_bp.route("/property/<id>/prices", methods=["PUT"])
+def update_property_prices(id):
+    """
+    Rota para substituir o calendário de preços de um imóvel.
     
-    save_data('properties', property_data)
-    return jsonify({"message": "Imóvel atualizado"})
+    Recebe:
+    - id: ID do imóvel
+    - price_calendar: Lista de faixas {"from", "until", "price_per_day"}; as noites
+      de from a until (inclusive) usam o preço da faixa, e faixas posteriores na
+      lista prevalecem. Lista vazia volta a usar apenas price_per_day
+    - If-Match: Versão do imóvel lida pelo cliente (cabeçalho opcional)
+    
+    Retorna:
+    - 200: Calendário atualizado (com a nova versão)
+    - 400: Calendário inválido
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Token de sessão de outro usuário que não o dono do imóvel
+    - 404: Imóvel não encontrado
+    - 409: Imóvel alterado por outra requisição (com a versão atual)
+    """
+    data = request.get_json()
+    try:
+        price_calendar = parse_price_calendar(data.get("price_calendar"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    expected_version = get_expected_version()
+    property_data = find_by_id('properties', id)
+    if not property_data:
+        return jsonify({"error": "Imóvel não encontrado"}), 404
+    error = authorized_owner(property_data["owner_id"])
+    if error:
+        return error
+    if expected_version is not None and expected_version != property_data["version"]:
+        return version_conflict_response(property_data["version"])
+
+    property_data["price_calendar"] = price_calendar
+    try:
+        save_data('properties', property_data)
+    except VersionConflict as e:
+        return version_conflict_response(e.current_version)
+    return versioned_response({"message": "Calendário de preços atualizado", "version": property_data["version"]},
+                              property_data["version"])
 
 @locador_bp.route("/property/<id>", methods=["DELETE"])
 def delete_property(id):
     """
     Rota para deletar um imóvel.
+    As reservas do imóvel e as avaliações dessas reservas também são removidas.
     
     Recebe:
     - id: ID do imóvel
     
     Retorna:
     - 200: Imóvel removido com sucesso
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Token de sessão de outro usuário que não o dono do imóvel
     - 404: Imóvel não encontrado
     """
-    if delete_data('properties', id):
+    property_data = find_by_id('properties', id)
+    if not property_data:
+        return jsonify({"error": "Imóvel não encontrado"}), 404
+    error = authorized_owner(property_data["owner_id"])
+    if error:
+        return error
+
+    removed = delete_many('properties', [id])
+    if removed['properties']:
         return jsonify({"message": "Imóvel removido"})
     return jsonify({"error": "Imóvel não encontrado"}), 404
 
@@ -147,32 +327,134 @@ def get_reservations(owner_id):
     
     Recebe:
     - owner_id: ID do proprietário
+    - since: Data mínima de término das reservas (opcional, query string)
     
     Retorna:
     - Lista de reservas com informações do locatário
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário inválido ou token de sessão de outro usuário
     """
+    error = authorized_owner(owner_id)
+    if error:
+        return error
+    since = request.args.get('since')
+
     # Busca todos os imóveis deste proprietário
     properties = find_many('properties', {'owner_id': owner_id})
     property_ids = [p['id'] for p in properties]
     
-    # Busca todas as reservas para estes imóveis
-    all_reservations = find_many('reservations')
-    reservations = [r for r in all_reservations if r['property_id'] in property_ids]
+    # Busca as reservas para estes imóveis, ignorando as partições anteriores a 'since'
+    query = {'property_id': {'$in': property_ids}}
+    if since:
+        query['end_date'] = {'$gte': since}
+    reservations = find_many_all('reservations', query, date_from=since)
     
-    result = []
-    for r in reservations:
-        # Busca informações do locatário
-        renter = find_by_id('users', r['renter_id'])
-        result.append({
-            "reservation_id": r['id'],
-            "property_id": r['property_id'],
-            "renter_name": renter['name'] if renter else "Unknown",
-            "start_date": r['start_date'],
-            "end_date": r['end_date'],
-            "approved": r.get('approved', False)
-        })
+    return jsonify([reservation_summary(r) for r in reservations])
+
+@locador_bp.route("/analytics/<owner_id>", methods=["GET"])
+def get_analytics(owner_id):
+    """
+    Rota com a ocupação e a receita dos imóveis do locador, por mês.
+    Considera apenas as reservas aprovadas, incluindo as já arquivadas.
     
-    return jsonify(result)
+    Recebe:
+    - owner_id: ID do proprietário
+    - from: Primeiro mês, AAAA-MM (opcional, query string; padrão: primeiro mês com reservas)
+    - to: Último mês, AAAA-MM (opcional, query string; padrão: último mês com reservas)
+    
+    Retorna:
+    - 200: Meses do período; para cada imóvel e mês, noites reservadas, noites
+      disponíveis, ocupação e receita; e os totais do locador
+    - 400: Mês inválido
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário inválido ou token de sessão de outro usuário
+    """
+    error = authorized_owner(owner_id)
+    if error:
+        return error
+    first_month, last_month = request.args.get('from'), request.args.get('to')
+    try:
+        for month in (first_month, last_month):
+            if month is not None:
+                datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        return jsonify({"error": "Mês inválido, use AAAA-MM"}), 400
+    if first_month and last_month and first_month > last_month:
+        return jsonify({"error": "Período inválido"}), 400
+
+    return jsonify(owner_report(owner_id, first_month, last_month))
+
+@locador_bp.route("/reservations/<owner_id>/stream", methods=["GET"])
+def stream_reservations(owner_id):
+    """
+    Rota que envia, via Server-Sent Events, as reservas criadas, atualizadas
+    ou removidas nos imóveis do locador, substituindo a consulta periódica
+    de /reservations/<owner_id>.
+    
+    Recebe:
+    - owner_id: ID do proprietário
+    - Last-Event-ID (cabeçalho) ou last_event_id (query string): cursor para retomar o stream
+    
+    Retorna:
+    - Stream text/event-stream com eventos reservation_created, reservation_updated
+      e reservation_deleted (dados no formato de /reservations/<owner_id>)
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário inválido ou token de sessão de outro usuário
+    """
+    error = authorized_owner(owner_id)
+    if error:
+        return error
+    event_names = {"insert": "reservation_created", "update": "reservation_updated",
+                   "delete": "reservation_deleted"}
+
+    def select(event):
+        if event["collection"] != "reservations" or event["op"] not in event_names:
+            return None
+        # Dono resolvido na publicação: continua disponível depois que o imóvel é removido
+        if event["context"].get("owner_id") != owner_id:
+            return None
+        return event_names[event["op"]], reservation_summary(event["new"] or event["old"])
+
+    return event_stream(select)
+
+def reservation_owner(reservation):
+    """
+    Resolve o dono do imóvel de uma reserva para o contexto dos eventos do feed.
+    
+    Args:
+        reservation: Reserva
+        
+    Returns:
+        dict: {"owner_id": ID do dono, ou None se o imóvel não existir}
+    """
+    prop = find_by_id('properties', reservation['property_id'])
+    return {"owner_id": prop['owner_id'] if prop else None}
+
+add_feed_context('reservations', reservation_owner)
+
+def reservation_summary(r):
+    """
+    Monta os dados de uma reserva exibidos ao locador.
+    
+    Args:
+        r: Reserva
+        
+    Returns:
+        dict: Reserva com o nome do locatário
+    """
+    # Busca informações do locatário
+    renter = find_by_id('users', r['renter_id'])
+    return {
+        "reservation_id": r['id'],
+        "property_id": r['property_id'],
+        "renter_name": renter['name'] if renter else "Unknown",
+        "start_date": r['start_date'],
+        "end_date": r['end_date'],
+        "approved": r.get('approved', False),
+        "expired": r.get('expired', False),
+        "expires_at": r.get('expires_at'),
+        "version": record_version(r)
+    }
 
 @locador_bp.route("/reservation/<id>", methods=["PUT"])
 def update_reservation(id):
@@ -182,17 +464,41 @@ def update_reservation(id):
     Recebe:
     - id: ID da reserva
     - approved: Boolean indicando se a reserva foi aprovada
+    - If-Match: Versão da reserva lida pelo cliente (cabeçalho opcional)
     
     Retorna:
-    - 200: Reserva atualizada com sucesso
+    - 200: Reserva atualizada com sucesso (com a nova versão)
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Token de sessão de outro usuário que não o dono do imóvel
     - 404: Reserva não encontrada
+    - 409: Reserva já encerrada e arquivada, solicitação expirada, ou alterada por outra requisição
     """
     data = request.get_json()
+    expected_version = get_expected_version()
     reservation = find_by_id('reservations', id)
-    
-    if not reservation:
+    archived = None if reservation else find_by_id_all('reservations', id)
+    if not reservation and not archived:
         return jsonify({"error": "Reserva não encontrada"}), 404
+
+    error = authorized_owner(reservation_owner(reservation or archived)["owner_id"])
+    if error:
+        return error
+
+    if not reservation:
+        if archived.get('expired'):
+            return jsonify({"error": "Solicitação de reserva expirada"}), 409
+        return jsonify({"error": "Reserva já encerrada"}), 409
+
+    if expected_version is not None and expected_version != reservation["version"]:
+        return version_conflict_response(reservation["version"])
+
+    if reservation.get('expired') or is_expired(reservation):
+        return jsonify({"error": "Solicitação de reserva expirada"}), 409
     
     reservation['approved'] = data["approved"]
-    save_data('reservations', reservation)
-    return jsonify({"message": "Reserva atualizada"})
+    try:
+        save_data('reservations', reservation)
+    except VersionConflict as e:
+        return version_conflict_response(e.current_version)
+    return versioned_response({"message": "Reserva atualizada", "version": reservation["version"]},
+                              reservation["version"])
@@ -2,6 +2,7 @@
 Módulo de rotas do locatário.
 Este arquivo contém as rotas relacionadas às operações que um locatário pode realizar:
 - Busca de imóveis disponíveis
+- Cotação de estadias em vários imóveis
 - Realização de reservas
 - Gerenciamento de reservas próprias
 - Criação e visualização de avaliações
@@ -9,9 +10,15 @@ Este arquivo contém as rotas relacionadas às operações que um locatário pod
 
 from flask import Blueprint, request, jsonify
 from datetime import datetime, date
-from app.data_manager import find_many, find_by_id, save_data
+from app.data_manager import find_many, find_by_id, save_data, find_many_all, find_by_id_all, scan
+from app.routes.helpers import event_stream, authorized_user
+from app.services.expiry import pending_expiry
+from app.services.geo import parse_coordinates, find_properties_near, find_properties_in_bbox
+from app.services.pricing import MAX_QUOTE_NIGHTS, MAX_QUOTE_PROPERTIES, quote, stay_total
+from app.services.ranking import SORT_OPTIONS, sort_key, top_k
+from app.services.search_index import search_properties_text
+from app.services.text import normalize
 import uuid
-import unicodedata
 
 # Cria um blueprint para agrupar as rotas do locatário
 locatario_bp = Blueprint('locatario', __name__)
@@ -28,34 +35,67 @@ def parse_date(date_str):
     """
     return datetime.strptime(date_str, "%Y-%m-%d").date()
 
-def is_overlapping(start1, end1, start2, end2):
+def approved_overlap_query(property_ids, start, end):
     """
-    Verifica se dois intervalos de datas se sobrepõem.
+    Monta a query das reservas aprovadas que se sobrepõem a um período
+    (início da reserva até o fim do período e fim da reserva a partir do início).
     
     Args:
-        start1: Data inicial do primeiro intervalo
-        end1: Data final do primeiro intervalo
-        start2: Data inicial do segundo intervalo
-        end2: Data final do segundo intervalo
+        property_ids: IDs dos imóveis
+        start: Data inicial do período
+        end: Data final do período
         
     Returns:
-        bool: True se os intervalos se sobrepõem, False caso contrário
+        dict: Query para find_many_all (datas comparadas como texto no formato
+            YYYY-MM-DD, normalizado na gravação e na carga; ver DATE_FIELDS no data_manager)
     """
-    return start1 <= end2 and start2 <= end1
+    return {
+        "property_id": {"$in": property_ids},
+        "approved": {"$truthy": True},
+        "start_date": {"$lte": end.isoformat()},
+        "end_date": {"$gte": start.isoformat()},
+    }
+
+def matches_search_filters(p, normalized_city, min_price, max_price):
+    """
+    Verifica se um imóvel atende aos filtros de preço e cidade da busca.
+    
+    Args:
+        p: Imóvel
+        normalized_city: Cidade buscada, já normalizada (vazia para não filtrar)
+        min_price: Preço mínimo por dia
+        max_price: Preço máximo por dia
+        
+    Returns:
+        bool: True se o imóvel atende aos filtros
+    """
+    # Filtro por preço
+    if not (min_price <= p["price_per_day"] <= max_price):
+        return False
+
+    # Filtro por cidade (normalizado)
+    if normalized_city:
+        property_city = normalize(p.get("city", ""))
+        property_address = normalize(p.get("address", ""))
+
+        if normalized_city not in property_city and normalized_city not in property_address:
+            return False
+
+    return True
 
-def normalize(text):
+def average_rating(property_id):
     """
-    Normaliza um texto removendo acentos e convertendo para minúsculas.
+    Calcula a média das avaliações de um imóvel.
     
     Args:
-        text: Texto a ser normalizado
+        property_id: ID do imóvel
         
     Returns:
-        str: Texto normalizado
+        float: Média arredondada em uma casa decimal, ou None se não houver avaliações
     """
-    if not text:
-        return ""
-    return unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8").lower()
+    reservations = find_many_all('reservations', {"property_id": property_id}, fields=["id"])
+    reviews = find_many('reviews', {"reservation_id": {"$in": [r["id"] for r in reservations]}}, fields=["rating"])
+    return round(sum(r["rating"] for r in reviews) / len(reviews), 1) if reviews else None
 
 @locatario_bp.route('/search', methods=['GET'])
 def search_properties():
@@ -63,59 +103,123 @@ def search_properties():
     Rota para buscar imóveis disponíveis com filtros.
     
     Parâmetros de busca:
+    - q: Texto livre buscado no título e na descrição (todos os termos; resultados por relevância)
     - city: Cidade do imóvel
     - min_price: Preço mínimo por dia
     - max_price: Preço máximo por dia
     - start_date: Data inicial da estadia
     - end_date: Data final da estadia
+    - min_total, max_total: Total da estadia mínimo e máximo, pelo calendário de preços (exigem as datas)
+    - lat, lng, radius_km: Busca por raio a partir de um ponto (resultados do mais próximo ao mais distante)
+    - bbox: Busca por retângulo, no formato min_lat,min_lng,max_lat,max_lng
+    - sort: Ordenação dos resultados: rating, price, score (nota e preço combinados)
+      ou total (menor total da estadia; exige as datas)
+    - k: Número máximo de resultados
+    - offset: Número de resultados a pular (paginação)
     
     Retorna:
-    - Lista de imóveis disponíveis que atendem aos critérios de busca
+    - Lista de imóveis disponíveis que atendem aos critérios de busca (com as datas,
+      inclui nights e stay_total de cada imóvel)
+    - 400: Parâmetros de localização, ordenação, total ou paginação inválidos
     """
     city = request.args.get('city', "")
     min_price = float(request.args.get('min_price', 0))
     max_price = float(request.args.get('max_price', 1e9))
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-
-    properties = find_many('properties')
-    result = []
+    bbox = request.args.get('bbox')
+    sort = request.args.get('sort')
+
+    if sort and sort not in SORT_OPTIONS:
+        return jsonify({"error": "Critério de ordenação inválido"}), 400
+    try:
+        min_total = float(request.args['min_total']) if request.args.get('min_total') else None
+        max_total = float(request.args['max_total']) if request.args.get('max_total') else None
+    except ValueError:
+        return jsonify({"error": "Total da estadia inválido"}), 400
+    if (sort == "total" or min_total is not None or max_total is not None) and not (start_date and end_date):
+        return jsonify({"error": "Filtro e ordenação pelo total da estadia exigem start_date e end_date"}), 400
+    try:
+        k = int(request.args['k']) if request.args.get('k') else None
+        offset = int(request.args.get('offset', 0))
+        if (k is not None and k < 1) or offset < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "Parâmetros de paginação inválidos"}), 400
+
+    try:
+        lat, lng = parse_coordinates(request.args.get('lat'), request.args.get('lng'))
+        radius_km = float(request.args.get('radius_km', 10))
+        if bbox:
+            min_lat, min_lng, max_lat, max_lng = (float(v) for v in bbox.split(","))
+    except ValueError:
+        return jsonify({"error": "Parâmetros de localização inválidos"}), 400
+
+    # Candidatos pela localização (índice geográfico), pelo texto (índice invertido)
+    # ou pela coleção inteira (None)
+    candidate_ids = None
+    distances = {}
+    if lat is not None:
+        distances = dict(find_properties_near(lat, lng, radius_km))
+        candidate_ids = list(distances)
+    elif bbox:
+        candidate_ids = find_properties_in_bbox(min_lat, min_lng, max_lat, max_lng)
+
+    text_matches = search_properties_text(request.args.get('q', ""))
+    relevance = dict(text_matches) if text_matches is not None else {}
+    if text_matches is not None:
+        if candidate_ids is None:
+            candidate_ids = list(relevance)
+        else:
+            candidate_ids = [_id for _id in candidate_ids if _id in relevance]
+
+    if candidate_ids is not None:
+        candidates = [find_by_id('properties', _id) for _id in candidate_ids]
+        properties = [p for p in candidates
+                      if p and matches_search_filters(p, normalize(city), min_price, max_price)]
+    else:
+        # Filtros de preço e cidade, nos registros em memória
+        properties = scan('properties', matches_search_filters, normalize(city), min_price, max_price)
+    candidates = []  # pares (imóvel, nota média)
+    stay_totals = {}  # ID do imóvel -> total da estadia (com as datas)
+
+    if start_date and end_date:
+        start = parse_date(start_date)
+        end = parse_date(end_date)
+        # Imóveis com reserva aprovada no período, em uma única consulta pelo índice de property_id
+        overlapping = find_many_all('reservations', approved_overlap_query([p["id"] for p in properties], start, end),
+                                    date_from=start.isoformat(), fields=["property_id"])
+        booked = {r["property_id"] for r in overlapping}
 
     for p in properties:
-        # Filtro por preço
-        if not (min_price <= p["price_per_day"] <= max_price):
-            continue
-        
-        # Filtro por cidade (normalizado)
-        if city:
-            normalized_city = normalize(city)
-            property_city = normalize(p.get("city", ""))
-            property_address = normalize(p.get("address", ""))
-
-            if normalized_city not in property_city and normalized_city not in property_address:
-                continue
-
         # Verificar disponibilidade
         if start_date and end_date:
-            start = parse_date(start_date)
-            end = parse_date(end_date)
-
             if start < parse_date(p["available_from"]) or end > parse_date(p["available_until"]):
                 continue
 
-            reservations = find_many('reservations', {"property_id": p["id"]})
-            for r in reservations:
-                if r.get("approved"):
-                    if is_overlapping(start, end, parse_date(r["start_date"]), parse_date(r["end_date"])):
-                        break
-            else:
-                pass  # disponível
+            if p["id"] in booked:
+                continue  # indisponível no período
+
+            # Total da estadia pelo calendário de preços (O(1) por imóvel)
+            total = stay_total(p, start, end)
+            if (min_total is not None and total < min_total) or (max_total is not None and total > max_total):
+                continue
+            stay_totals[p["id"]] = total
+
+        # A média de avaliações só é calculada antes da seleção se a ordenação depende dela
+        candidates.append((p, average_rating(p["id"]) if sort in ("rating", "score") else None))
 
-        # calcular média de avaliações
-        reservations = find_many('reservations', {"property_id": p["id"]})
-        reviews = [rv for r in reservations for rv in find_many('reviews', {"reservation_id": r["id"]})]
-        avg_rating = round(sum(r["rating"] for r in reviews) / len(reviews), 1) if reviews else None
+    # Ordenação e seleção dos k primeiros (heap), ou apenas paginação na ordem atual
+    if sort:
+        cheapest_price = min((p["price_per_day"] for p, _ in candidates), default=0)
+        candidates = top_k(candidates, sort_key(sort, cheapest_price, stay_totals), k, offset)
+    else:
+        candidates = candidates[offset:offset + k if k else None]
 
+    result = []
+    for p, avg_rating in candidates:
+        if sort not in ("rating", "score"):
+            avg_rating = average_rating(p["id"])
         result.append({
             "id": p["id"],
             "title": p["title"],
@@ -125,11 +229,73 @@ def search_properties():
             "available_from": p["available_from"],
             "available_until": p["available_until"],
             "image_url": p.get("image_url"),
+            "latitude": p.get("latitude"),
+            "longitude": p.get("longitude"),
             "average_rating": avg_rating
         })
+        if p["id"] in distances:
+            result[-1]["distance_km"] = round(distances[p["id"]], 2)
+        if p["id"] in relevance:
+            result[-1]["relevance"] = round(relevance[p["id"]], 4)
+        if p["id"] in stay_totals:
+            result[-1]["nights"] = (end - start).days
+            result[-1]["stay_total"] = stay_totals[p["id"]]
 
     return jsonify(result)
 
+@locatario_bp.route('/quote', methods=['POST'])
+def quote_stays():
+    """
+    Rota para cotar uma estadia em vários imóveis de uma vez.
+    
+    Recebe:
+    - property_ids: IDs dos imóveis (até MAX_QUOTE_PROPERTIES)
+    - start_date: Data de entrada (AAAA-MM-DD)
+    - end_date: Data de saída (AAAA-MM-DD, posterior à entrada, até MAX_QUOTE_NIGHTS noites)
+    - breakdown: Inclui os trechos de noites com o mesmo preço (opcional, padrão true)
+    
+    Retorna:
+    - quotes: Para cada imóvel encontrado, na ordem pedida: nights, total,
+      average_per_night, available (dentro do período disponível e sem reserva
+      aprovada no período) e breakdown
+    - not_found: IDs de imóveis inexistentes
+    - 400: Datas ou lista de imóveis inválidas
+    """
+    data = request.get_json()
+    property_ids = data.get("property_ids")
+    if (not isinstance(property_ids, list) or not property_ids or len(property_ids) > MAX_QUOTE_PROPERTIES
+            or not all(isinstance(_id, str) for _id in property_ids)):
+        return jsonify({"error": f"Informe de 1 a {MAX_QUOTE_PROPERTIES} IDs de imóveis (texto) em property_ids"}), 400
+    try:
+        start = parse_date(data.get("start_date"))
+        end = parse_date(data.get("end_date"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Datas inválidas, use AAAA-MM-DD"}), 400
+    if end <= start:
+        return jsonify({"error": "A data de saída deve ser posterior à de entrada"}), 400
+    if (end - start).days > MAX_QUOTE_NIGHTS:
+        return jsonify({"error": f"A estadia deve ter no máximo {MAX_QUOTE_NIGHTS} noites"}), 400
+
+    property_ids = list(dict.fromkeys(property_ids))
+    properties = [find_by_id("properties", _id) for _id in property_ids]
+    found = [p for p in properties if p]
+    overlapping = find_many_all("reservations", approved_overlap_query([p["id"] for p in found], start, end),
+                                date_from=start.isoformat(), fields=["property_id"])
+    booked = {r["property_id"] for r in overlapping}
+
+    quotes = []
+    for p in found:
+        result = quote(p, start, end, breakdown=data.get("breakdown", True) is not False)
+        result["available"] = (parse_date(p["available_from"]) <= start and end <= parse_date(p["available_until"])
+                               and p["id"] not in booked)
+        quotes.append(result)
+    return jsonify({
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "quotes": quotes,
+        "not_found": [_id for _id, p in zip(property_ids, properties) if not p],
+    })
+
 @locatario_bp.route('/reserve', methods=['POST'])
 def reserve_property():
     """
@@ -144,6 +310,8 @@ def reserve_property():
     Retorna:
     - 201: Reserva solicitada com sucesso
     - 400: Dados inválidos ou datas fora do período disponível
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Token de sessão de outro usuário
     - 409: Já existe uma reserva no período solicitado
     """
     data = request.get_json()
@@ -153,7 +321,9 @@ def reserve_property():
     end_date = parse_date(data.get("end_date"))
 
     prop = find_by_id("properties", property_id)
-    renter = find_by_id("users", renter_id)
+    renter, error = authorized_user(renter_id)
+    if error:
+        return error
 
     if not prop or not renter or renter["user_type"] != "locatario":
         return jsonify({"error": "Dados inválidos"}), 400
@@ -161,19 +331,24 @@ def reserve_property():
     if start_date < parse_date(prop["available_from"]) or end_date > parse_date(prop["available_until"]):
         return jsonify({"error": "Datas fora do período disponível"}), 400
 
-    existing = find_many("reservations", {"property_id": prop["id"]})
-    for r in existing:
-        if r.get("approved") and is_overlapping(start_date, end_date, parse_date(r["start_date"]), parse_date(r["end_date"])):
-            return jsonify({"error": "Já existe uma reserva nesse período"}), 409
+    # Apenas estadias que terminam a partir do início da nova reserva podem conflitar
+    existing = find_many_all("reservations", approved_overlap_query([prop["id"]], start_date, end_date),
+                             date_from=start_date.isoformat(), fields=[])
+    if existing:
+        return jsonify({"error": "Já existe uma reserva nesse período"}), 409
 
     reservation = {
         "id": str(uuid.uuid4()),
         "property_id": property_id,
         "renter_id": renter_id,
-        "start_date": data.get("start_date"),
-        "end_date": data.get("end_date"),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
         "approved": None
     }
+    # Prazo para o locador responder (ver app/services/expiry.py)
+    expires_at = pending_expiry(start_date)
+    if expires_at:
+        reservation["expires_at"] = expires_at
     save_data("reservations", reservation)
     return jsonify({"message": "Reserva solicitada com sucesso", "reservation_id": reservation["id"]}), 201
 
@@ -184,33 +359,78 @@ def list_my_reservations(user_id):
     
     Recebe:
     - user_id: ID do locatário
+    - Authorization: Bearer <token> (cabeçalho, token emitido no login)
     
     Retorna:
     - Lista de reservas com informações do imóvel e avaliações
-    - 403: Usuário inválido
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário inválido ou token de sessão de outro usuário
     """
-    user = find_by_id("users", user_id)
+    user, error = authorized_user(user_id)
+    if error:
+        return error
     if not user or user["user_type"] != "locatario":
         return jsonify({"error": "Usuário inválido"}), 403
 
-    reservations = find_many("reservations", {"renter_id": user_id})
-    result = []
+    reservations = find_many_all("reservations", {"renter_id": user_id})
+    return jsonify([my_reservation_summary(r) for r in reservations])
 
-    for r in reservations:
-        prop = find_by_id("properties", r["property_id"])
-        review = find_many("reviews", {"reservation_id": r["id"]})
-        result.append({
-            "reservation_id": r["id"],
-            "property_id": r["property_id"],
-            "property_title": prop["title"] if prop else "Desconhecido",
-            "start_date": r["start_date"],
-            "end_date": r["end_date"],
-            "approved": r.get("approved"),
-            "image_url": prop.get("image_url") if prop else None,
-            "review": review[0] if review else None
-        })
+@locatario_bp.route('/my-reservations/<user_id>/stream', methods=['GET'])
+def stream_my_reservations(user_id):
+    """
+    Rota que envia, via Server-Sent Events, as decisões do locador
+    (aprovação ou recusa) sobre as reservas do locatário.
+    
+    Recebe:
+    - user_id: ID do locatário
+    - Last-Event-ID (cabeçalho) ou last_event_id (query string): cursor para retomar o stream
+    
+    Retorna:
+    - Stream text/event-stream com eventos reservation_decision
+      (dados no formato de /my-reservations/<user_id>)
+    - 401: Token de sessão ausente, inválido ou expirado
+    - 403: Usuário inválido ou token de sessão de outro usuário
+    """
+    user, error = authorized_user(user_id)
+    if error:
+        return error
+    if not user or user["user_type"] != "locatario":
+        return jsonify({"error": "Usuário inválido"}), 403
 
-    return jsonify(result)
+    def select(event):
+        if event["collection"] != "reservations" or event["op"] != "update":
+            return None
+        old, new = event["old"], event["new"]
+        if new["renter_id"] != user_id or old.get("approved") == new.get("approved"):
+            return None
+        return "reservation_decision", my_reservation_summary(new)
+
+    return event_stream(select)
+
+def my_reservation_summary(r):
+    """
+    Monta os dados de uma reserva exibidos ao locatário.
+    
+    Args:
+        r: Reserva
+        
+    Returns:
+        dict: Reserva com informações do imóvel e avaliação
+    """
+    prop = find_by_id("properties", r["property_id"])
+    review = find_many("reviews", {"reservation_id": r["id"]})
+    return {
+        "reservation_id": r["id"],
+        "property_id": r["property_id"],
+        "property_title": prop["title"] if prop else "Desconhecido",
+        "start_date": r["start_date"],
+        "end_date": r["end_date"],
+        "approved": r.get("approved"),
+        "expired": r.get("expired", False),
+        "expires_at": r.get("expires_at"),
+        "image_url": prop.get("image_url") if prop else None,
+        "review": review[0] if review else None
+    }
 
 @locatario_bp.route('/review', methods=['POST'])
 def create_review():
@@ -235,7 +455,7 @@ def create_review():
     if not (1 <= rating <= 5):
         return jsonify({"error": "Nota deve ser entre 1 e 5"}), 400
 
-    reservation = find_by_id("reservations", reservation_id)
+    reservation = find_by_id_all("reservations", reservation_id)
     if not reservation:
         return jsonify({"error": "Reserva não encontrada"}), 404
 
@@ -266,7 +486,7 @@ def list_reviews(property_id):
     Retorna:
     - Lista de avaliações com informações do locatário
     """
-    reservations = find_many("reservations", {"property_id": property_id})
+    reservations = find_many_all("reservations", {"property_id": property_id})
     result = []
 
     for r in reservations:
@@ -0,0 +1,24 @@
+"""
+Módulo de rotas da replicação.
+Este arquivo contém a rota de acompanhamento da replicação entre o processo
+primário e as réplicas de leitura:
+- Estado da replicação (papel do processo, posição no log e atraso)
+"""
+
+from flask import Blueprint, jsonify
+from app.services.replication import get_status
+
+# Cria um blueprint para agrupar as rotas da replicação
+replication_bp = Blueprint('replication', __name__)
+
+@replication_bp.route('/status', methods=['GET'])
+def replication_status():
+    """
+    Rota para consultar o estado da replicação deste processo.
+    
+    Retorna:
+    - role: primary, follower ou standalone
+    - No primário: head_seq (último evento publicado) e snapshot_seq
+    - Nas réplicas: applied_seq, head_seq, lag_events e lag_seconds
+    """
+    return jsonify(get_status())
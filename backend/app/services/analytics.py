@@ -0,0 +1,232 @@
+"""
+Módulo de indicadores dos locadores.
+Calcula, por imóvel e por mês, as noites reservadas, a taxa de ocupação e a
+receita das reservas aprovadas, em uma única passada pelas reservas do
+locador (incluindo as partições arquivadas).
+
+Cada estadia é dividida nos meses que atravessa com aritmética de datas (uma
+operação por mês, não por noite), então o custo cresce com o número de
+reservas e não com a duração delas. A receita de cada mês usa o calendário
+de preços do imóvel (somas prefixadas, ver app/services/pricing.py), também
+em uma operação por mês. Os totais de cada locador ficam em cache
+e são descartados pelas notificações do data_manager quando uma reserva
+aprovada muda (aprovação, datas, remoção) ou quando um imóvel do locador é
+criado, alterado ou removido.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from app.data_manager import add_listener, find_many, find_many_all
+from app.services.pricing import get_calendar
+
+# Número máximo de locadores mantidos no cache
+CACHE_MAX_ENTRIES = 1000
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def split_nights(start, end):
+    """
+    Divide as noites de uma estadia entre os meses.
+    A noite de cada data de start (inclusive) a end (exclusive) pertence ao mês da data.
+
+    Args:
+        start: Data de entrada
+        end: Data de saída
+
+    Returns:
+        list: Pares ("AAAA-MM", noites)
+    """
+    result = []
+    while start < end:
+        boundary = min(_next_month(start), end)
+        result.append((start.strftime("%Y-%m"), (boundary - start).days))
+        start = boundary
+    return result
+
+
+def month_range(first, last):
+    """
+    Lista os meses de first a last (inclusive), no formato AAAA-MM.
+    """
+    months = []
+    day = date.fromisoformat(first + "-01")
+    while day.strftime("%Y-%m") <= last:
+        months.append(day.strftime("%Y-%m"))
+        day = _next_month(day)
+    return months
+
+
+def compute_owner_totals(owner_id):
+    """
+    Soma as noites reservadas (reservas aprovadas) de cada imóvel do locador e a
+    receita dessas noites (pelo calendário de preços), por mês.
+
+    Args:
+        owner_id: ID do proprietário
+
+    Returns:
+        dict: ID do imóvel -> {"property": dados do imóvel, "nights": {"AAAA-MM": noites},
+            "revenue": {"AAAA-MM": receita}}
+    """
+    properties = find_many("properties", {"owner_id": owner_id},
+                           fields=["title", "price_per_day", "price_calendar", "available_from",
+                                   "available_until", "version"])
+    totals = {p["id"]: {"property": p, "nights": {}, "revenue": {}} for p in properties}
+    if not totals:
+        return totals
+
+    reservations = find_many_all("reservations", {"property_id": {"$in": list(totals)}, "approved": {"$truthy": True}},
+                                 fields=["property_id", "start_date", "end_date"])
+    for r in reservations:
+        entry = totals[r["property_id"]]
+        calendar = get_calendar(entry["property"])
+        nights, revenue = entry["nights"], entry["revenue"]
+        start = date.fromisoformat(r["start_date"])
+        for month, count in split_nights(start, date.fromisoformat(r["end_date"])):
+            nights[month] = nights.get(month, 0) + count
+            revenue[month] = revenue.get(month, 0) + calendar.total(start, start + timedelta(days=count))
+            start += timedelta(days=count)
+    return totals
+
+
+def available_nights(prop, month):
+    """
+    Retorna as noites do mês dentro do período de disponibilidade do imóvel.
+    """
+    first = date.fromisoformat(month + "-01")
+    start = max(first, date.fromisoformat(prop["available_from"]))
+    end = min(_next_month(first), date.fromisoformat(prop["available_until"]))
+    return max((end - start).days, 0)
+
+
+def _ratio(booked, available):
+    return round(booked / available, 4) if available else None
+
+
+def build_report(totals, first_month=None, last_month=None):
+    """
+    Monta o relatório de ocupação e receita a partir dos totais de um locador.
+    Sem período, considera do primeiro ao último mês com reservas aprovadas.
+
+    Args:
+        totals: Resultado de compute_owner_totals()
+        first_month: Primeiro mês do relatório (AAAA-MM, opcional)
+        last_month: Último mês do relatório (AAAA-MM, opcional)
+
+    Returns:
+        dict: Meses do período, imóveis (com os indicadores de cada mês) e totais do locador
+    """
+    booked_months = sorted({month for entry in totals.values() for month in entry["nights"]})
+    first_month = first_month or (booked_months[0] if booked_months else None)
+    last_month = last_month or (booked_months[-1] if booked_months else None)
+    months = month_range(first_month, last_month) if first_month and last_month else []
+
+    report = {"months": months, "properties": [],
+              "totals": {"booked_nights": 0, "available_nights": 0, "revenue": 0}}
+    for property_id, entry in totals.items():
+        prop = entry["property"]
+        price = prop.get("price_per_day") or 0
+        rows = []
+        for month in months:
+            booked = entry["nights"].get(month, 0)
+            available = available_nights(prop, month)
+            rows.append({"month": month, "booked_nights": booked, "available_nights": available,
+                         "occupancy": _ratio(booked, available),
+                         "revenue": round(entry["revenue"].get(month, 0), 2)})
+        booked = sum(row["booked_nights"] for row in rows)
+        available = sum(row["available_nights"] for row in rows)
+        revenue = round(sum(row["revenue"] for row in rows), 2)
+        report["properties"].append({
+            "property_id": property_id,
+            "title": prop.get("title"),
+            "price_per_day": price,
+            "months": rows,
+            "booked_nights": booked,
+            "available_nights": available,
+            "occupancy": _ratio(booked, available),
+            "revenue": revenue,
+        })
+        report["totals"]["booked_nights"] += booked
+        report["totals"]["available_nights"] += available
+        report["totals"]["revenue"] = round(report["totals"]["revenue"] + revenue, 2)
+    report["totals"]["occupancy"] = _ratio(report["totals"]["booked_nights"],
+                                           report["totals"]["available_nights"])
+    return report
+
+
+# Totais por locador (owner_id -> totais), do menos para o mais recentemente usado
+_cache = OrderedDict()
+# Imóvel -> locador, para descartar o cache de um locador quando uma reserva muda
+_owner_of = {}
+# Incrementado a cada descarte: um cálculo concorrente com uma alteração não é guardado
+_generation = 0
+_cache_lock = threading.Lock()
+
+
+def _invalidate(owner_id):
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        _cache.pop(owner_id, None)
+
+
+def _on_property_change(old, new):
+    for p in (old, new):
+        if p is not None:
+            _invalidate(p.get("owner_id"))
+
+
+def _on_reservation_change(old, new):
+    # Reservas pendentes ou recusadas não entram nos indicadores
+    if not (old and old.get("approved")) and not (new and new.get("approved")):
+        return
+    if old and new and old.get("approved") and new.get("approved") and \
+            (old["start_date"], old["end_date"]) == (new["start_date"], new["end_date"]):
+        return
+    # Imóvel ainda sem locador conhecido: só incrementa a geração (pode haver um cálculo em andamento)
+    _invalidate(_owner_of.get((new or old)["property_id"]))
+
+
+add_listener("properties", _on_property_change)
+# Inclui as partições arquivadas, lidas por find_many_all() (remoções em cascata e vacuum())
+add_listener("reservations", _on_reservation_change, partitions=True)
+
+
+def get_owner_totals(owner_id):
+    """
+    Retorna os totais de um locador, do cache ou calculados (e guardados no cache).
+
+    Args:
+        owner_id: ID do proprietário
+
+    Returns:
+        dict: Resultado de compute_owner_totals()
+    """
+    with _cache_lock:
+        totals = _cache.get(owner_id)
+        if totals is not None:
+            _cache.move_to_end(owner_id)
+            return totals
+        generation = _generation
+
+    totals = compute_owner_totals(owner_id)
+    with _cache_lock:
+        for property_id in totals:
+            _owner_of[property_id] = owner_id
+        if generation == _generation:
+            _cache[owner_id] = totals
+            while len(_cache) > CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+    return totals
+
+
+def owner_report(owner_id, first_month=None, last_month=None):
+    """
+    Retorna o relatório de ocupação e receita de um locador (ver build_report()).
+    """
+    return build_report(get_owner_totals(owner_id), first_month, last_month)
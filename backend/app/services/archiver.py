@@ -0,0 +1,19 @@
+"""
+Módulo do arquivador de reservas.
+Executa periodicamente, no agendador de tarefas, a movimentação das
+estadias já encerradas da partição principal para as partições arquivadas.
+"""
+
+from app.data_manager import archive_partitioned
+from app.services.scheduler import PRIORITY_NORMAL, scheduler
+
+
+def schedule_archiver(interval_seconds):
+    """
+    Registra o arquivador no agendador de tarefas, com a primeira execução imediata.
+
+    Args:
+        interval_seconds: Intervalo entre duas execuções, em segundos
+    """
+    scheduler.add_job("archive-reservations", archive_partitioned, interval=interval_seconds,
+                      args=("reservations",), priority=PRIORITY_NORMAL)
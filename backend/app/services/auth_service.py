@@ -3,9 +3,24 @@ Módulo de serviços de autenticação.
 Este arquivo contém funções relacionadas à autenticação e gerenciamento de usuários.
 """
 
-from app.data_manager import find_by_id, save_data
+from app.data_manager import find_by_id, find_many, save_data, VersionConflict
 
-def update_user_info(user_id, name, email):
+def find_user_by_email(email):
+    """
+    Busca um usuário pelo email.
+    A busca usa o índice de hash de "email" da coleção de usuários
+    (INDEXED_FIELDS no data_manager), sem percorrer a coleção.
+    
+    Args:
+        email: Email do usuário
+        
+    Returns:
+        dict: Usuário encontrado ou None se não existir
+    """
+    users = find_many("users", {"email": email})
+    return users[0] if users else None
+
+def update_user_info(user_id, name, email, expected_version=None):
     """
     Atualiza as informações de um usuário.
     
@@ -13,15 +28,23 @@ def update_user_info(user_id, name, email):
         user_id: ID do usuário a ser atualizado
         name: Novo nome do usuário (opcional)
         email: Novo email do usuário (opcional)
+        expected_version: Versão do usuário lida pelo cliente (opcional)
+        
+    Returns:
+        dict: Usuário atualizado, com a nova versão
         
     Raises:
         Exception: Se o usuário não for encontrado
+        VersionConflict: Se o usuário foi alterado desde a versão esperada
     """
     user = find_by_id("users", user_id)
 
     if not user:
         raise Exception("Usuário não encontrado")
 
+    if expected_version is not None and expected_version != user["version"]:
+        raise VersionConflict("users", user_id, user["version"])
+
     # Atualiza os campos desejados
     if name:
         user["name"] = name
@@ -29,4 +52,5 @@ def update_user_info(user_id, name, email):
         user["email"] = email
 
     # Salva de volta usando a lógica do data_manager
-    save_data("users", user)
+    # (a gravação falha com VersionConflict se houve outra escrita desde a leitura)
+    return save_data("users", user)
@@ -0,0 +1,294 @@
+"""
+Módulo de snapshots (backups) das coleções.
+Grava cópias consistentes de todas as coleções e partições sem parar o
+servidor: a cópia é obtida em memória (data_manager.snapshot_collections) e
+a serialização e a compressão acontecem fora das travas das coleções.
+
+Tipos de snapshot, gravados em BACKUP_DIR como arquivos JSON comprimidos (gzip):
+- full: todos os registros de todas as coleções
+- incremental: apenas os registros inseridos/alterados e os IDs removidos
+  desde o snapshot anterior (o "pai")
+
+O arquivo index.json lista os snapshots com o pai de cada um e as somas de
+verificação (SHA-256) do estado de cada coleção. A restauração reconstrói a
+cadeia de snapshots, confere as somas antes de gravar os arquivos e lê os
+arquivos gravados para conferi-las de novo.
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from app.data_manager import _dump_file, _parse_file, snapshot_collections
+from app.services.scheduler import PRIORITY_HIGH, scheduler
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+
+# Número máximo de snapshots incrementais seguidos antes de um novo snapshot completo
+FULL_EVERY = 24
+
+# Número de cadeias (snapshot completo e seus incrementais) mantidas
+KEEP_FULL = 3
+
+# Estado do último snapshot gravado por este processo, para calcular o próximo
+# incremental sem reler a cadeia do disco: (ID do snapshot, {coleção: {ID: registro}})
+_last_state = None
+_snapshot_lock = threading.Lock()
+
+
+class SnapshotError(Exception):
+    """
+    Erro lançado quando um snapshot não existe ou não confere com as somas de verificação.
+    """
+
+
+def state_checksum(records):
+    """
+    Calcula a soma de verificação do estado de uma coleção, independente da ordem dos registros.
+
+    Args:
+        records: Registros da coleção (ID -> registro)
+
+    Returns:
+        str: SHA-256 em hexadecimal
+    """
+    digest = hashlib.sha256()
+    for _id in sorted(records):
+        digest.update(json.dumps(records[_id], sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _read_index(directory):
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_index(directory, index):
+    tmp_path = os.path.join(directory, INDEX_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(directory, INDEX_FILE))
+
+
+def _write_snapshot_file(path, payload):
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot_file(path):
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        raise SnapshotError(f"Snapshot ilegível: {os.path.basename(path)} ({e})")
+
+
+def list_snapshots(directory):
+    """
+    Lista os snapshots de um diretório, do mais antigo para o mais recente.
+
+    Args:
+        directory: Diretório dos snapshots
+
+    Returns:
+        list: Descrição de cada snapshot (id, type, parent, seq, created_at, records, changed)
+    """
+    return [{key: entry[key] for key in ("id", "type", "parent", "seq", "created_at", "records", "changed")}
+            for entry in _read_index(directory)]
+
+
+def load_snapshot_state(directory, snapshot_id):
+    """
+    Reconstrói o estado das coleções em um snapshot, aplicando a cadeia de
+    incrementais a partir do snapshot completo, e confere as somas de verificação.
+
+    Args:
+        directory: Diretório dos snapshots
+        snapshot_id: ID do snapshot
+
+    Returns:
+        dict: Coleção/partição -> {ID: registro}
+
+    Raises:
+        SnapshotError: Se algum snapshot da cadeia não existir ou não conferir
+    """
+    entries = {entry["id"]: entry for entry in _read_index(directory)}
+    chain = []
+    current = snapshot_id
+    while current is not None:
+        entry = entries.get(current)
+        if entry is None:
+            raise SnapshotError(f"Snapshot não encontrado: {current}")
+        chain.append(entry)
+        current = entry["parent"]
+
+    state = {}
+    for entry in reversed(chain):
+        payload = _read_snapshot_file(os.path.join(directory, entry["file"]))
+        if entry["type"] == "full":
+            state = {name: {item["id"]: item for item in items}
+                     for name, items in payload["collections"].items()}
+        else:
+            for name, changes in payload["changes"].items():
+                records = state.setdefault(name, {})
+                for _id in changes["delete"]:
+                    records.pop(_id, None)
+                for item in changes["upsert"]:
+                    records[item["id"]] = item
+        _verify(state, entry)
+    return state
+
+
+def _verify(state, entry):
+    names = set(state) | set(entry["checksums"])
+    for name in sorted(names):
+        if state_checksum(state.get(name, {})) != entry["checksums"].get(name, state_checksum({})):
+            raise SnapshotError(f"Soma de verificação não confere em '{name}' (snapshot {entry['id']})")
+
+
+def take_snapshot(directory, full=False):
+    """
+    Grava um snapshot consistente de todas as coleções.
+    Sem full, grava um incremental em relação ao último snapshot, exceto se
+    ainda não houver nenhum ou se a cadeia atual já tiver FULL_EVERY incrementais.
+
+    Args:
+        directory: Diretório dos snapshots
+        full: Se True, força um snapshot completo
+
+    Returns:
+        dict: Descrição do snapshot gravado, ou None se nada mudou desde o último
+    """
+    global _last_state
+    with _snapshot_lock:
+        os.makedirs(directory, exist_ok=True)
+        seq, state = snapshot_collections()
+        index = _read_index(directory)
+        parent = index[-1] if index else None
+
+        incrementals = 0
+        for entry in reversed(index):
+            if entry["type"] == "full":
+                break
+            incrementals += 1
+        if parent is None or incrementals >= FULL_EVERY:
+            full = True
+
+        if not full:
+            if _last_state is not None and _last_state[0] == parent["id"]:
+                previous = _last_state[1]
+            else:
+                previous = load_snapshot_state(directory, parent["id"])
+            changes = {}
+            for name in sorted(set(state) | set(previous)):
+                records, before = state.get(name, {}), previous.get(name, {})
+                upsert = [item for _id, item in records.items() if before.get(_id) != item]
+                delete = [_id for _id in before if _id not in records]
+                if upsert or delete:
+                    changes[name] = {"upsert": upsert, "delete": delete}
+            if not changes:
+                return None
+            changed = sum(len(c["upsert"]) + len(c["delete"]) for c in changes.values())
+
+        created_at = datetime.now()
+        snapshot_id = f"{created_at.strftime('%Y%m%d-%H%M%S-%f')}-{seq}"
+        entry = {
+            "id": snapshot_id,
+            "type": "full" if full else "incremental",
+            "parent": None if full else parent["id"],
+            "seq": seq,
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "file": f"snapshot-{snapshot_id}.json.gz",
+            "records": sum(len(records) for records in state.values()),
+            "changed": sum(len(records) for records in state.values()) if full else changed,
+            "checksums": {name: state_checksum(records) for name, records in state.items()},
+        }
+        payload = {key: entry[key] for key in ("id", "type", "parent", "seq", "created_at")}
+        if full:
+            payload["collections"] = {name: list(records.values()) for name, records in state.items()}
+        else:
+            payload["changes"] = changes
+        _write_snapshot_file(os.path.join(directory, entry["file"]), payload)
+
+        index.append(entry)
+        _write_index(directory, _prune(directory, index))
+        _last_state = (snapshot_id, state)
+        logger.info("Snapshot %s gravado (%s, %d registros alterados)", snapshot_id, entry["type"], entry["changed"])
+        return {key: entry[key] for key in ("id", "type", "parent", "seq", "created_at", "records", "changed")}
+
+
+def _prune(directory, index):
+    """
+    Mantém apenas as KEEP_FULL cadeias mais recentes e remove os arquivos das demais.
+    """
+    fulls = [position for position, entry in enumerate(index) if entry["type"] == "full"]
+    if len(fulls) <= KEEP_FULL:
+        return index
+    kept = index[fulls[-KEEP_FULL]:]
+    for entry in index[:fulls[-KEEP_FULL]]:
+        path = os.path.join(directory, entry["file"])
+        if os.path.exists(path):
+            os.remove(path)
+    return kept
+
+
+def restore_snapshot(directory, snapshot_id, target_dir, force=False):
+    """
+    Restaura um snapshot em um diretório de dados, com verificação.
+    O estado é conferido com as somas de verificação antes de gravar; depois
+    de gravados, os arquivos são relidos e conferidos de novo.
+
+    Args:
+        directory: Diretório dos snapshots
+        snapshot_id: ID do snapshot
+        target_dir: Diretório de dados de destino (o servidor não deve estar usando-o)
+        force: Se True, substitui arquivos de coleções já existentes no destino
+
+    Returns:
+        dict: Número de registros restaurados por coleção/partição
+
+    Raises:
+        SnapshotError: Se o snapshot não conferir, ou se o destino já tiver coleções e force for False
+    """
+    state = load_snapshot_state(directory, snapshot_id)
+    entry = next(entry for entry in _read_index(directory) if entry["id"] == snapshot_id)
+
+    os.makedirs(target_dir, exist_ok=True)
+    existing = glob.glob(os.path.join(target_dir, "*.json"))
+    if existing and not force:
+        raise SnapshotError(f"O diretório {target_dir} já contém coleções (use force para substituí-las)")
+    for path in existing:
+        os.remove(path)
+
+    for name, records in state.items():
+        _dump_file(os.path.join(target_dir, f"{name}.json"), list(records.values()), fsync=True)
+
+    restored = {os.path.basename(path)[:-len(".json")]: {item["id"]: item for item in _parse_file(path)}
+                for path in glob.glob(os.path.join(target_dir, "*.json"))}
+    _verify(restored, entry)
+    return {name: len(records) for name, records in sorted(restored.items())}
+
+
+def schedule_backups(directory, interval_seconds):
+    """
+    Registra a gravação periódica de snapshots no agendador de tarefas.
+
+    Args:
+        directory: Diretório dos snapshots
+        interval_seconds: Intervalo entre dois snapshots, em segundos
+    """
+    scheduler.add_job("snapshot", take_snapshot, interval=interval_seconds, delay=interval_seconds,
+                      args=(directory,), priority=PRIORITY_HIGH)
@@ -0,0 +1,178 @@
+"""
+Módulo de expiração das solicitações de reserva pendentes.
+Uma reserva criada por reserve_property() fica pendente (approved None) até
+o locador aprová-la ou recusá-la. Com um prazo configurado (PENDING_TTL_SECONDS),
+cada solicitação recebe expires_at na criação: o prazo, limitado ao fim do
+dia de início da estadia. Vencido o prazo, a reserva passa ao estado final
+recusada por expiração (approved False, expired True) e é movida da partição
+principal para a partição arquivada do mês de término, deixando as listas
+de reservas de cada imóvel curtas.
+
+Os prazos ficam em um heap em memória (prazo, ID), montado uma vez a partir
+das reservas pendentes e mantido pelas notificações do data_manager: a tarefa
+periódica do agendador retira apenas os prazos vencidos, sem percorrer as
+reservas. Entradas de reservas já aprovadas, recusadas ou removidas são
+descartadas quando chegam ao topo. Reservas pendentes sem expires_at
+(criadas antes da configuração) expiram ao fim do dia de início da estadia.
+"""
+
+import heapq
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+
+from app.data_manager import add_listener, archive_records, find_many
+from app.services.scheduler import PRIORITY_NORMAL, scheduler
+
+logger = logging.getLogger(__name__)
+
+# Prazo padrão de uma solicitação pendente, em segundos (3 dias)
+PENDING_TTL_SECONDS = 3 * 24 * 3600
+
+# Intervalo entre as verificações dos prazos vencidos, em segundos
+CHECK_INTERVAL_SECONDS = 60
+
+_ttl_seconds = 0
+_heap = []
+_heap_lock = threading.Lock()
+_heap_built = False
+
+
+def _end_of_day(day):
+    return datetime.combine(day + timedelta(days=1), time.min).astimezone(timezone.utc)
+
+
+def pending_expiry(start_date, now=None):
+    """
+    Retorna o prazo de uma nova solicitação de reserva.
+
+    Args:
+        start_date: Data de início da estadia (date)
+        now: Instante atual (datetime com fuso; padrão: agora)
+
+    Returns:
+        str: Prazo em ISO 8601 (UTC), ou None se a expiração estiver desativada
+    """
+    if not _ttl_seconds:
+        return None
+    now = now or datetime.now(timezone.utc)
+    deadline = min(now + timedelta(seconds=_ttl_seconds), _end_of_day(start_date))
+    return deadline.isoformat(timespec="seconds")
+
+
+def _deadline(reservation):
+    """
+    Retorna o prazo (timestamp) de uma reserva pendente, ou None se não estiver pendente.
+    """
+    if reservation.get("approved") is not None or reservation.get("expired"):
+        return None
+    try:
+        if reservation.get("expires_at"):
+            return datetime.fromisoformat(reservation["expires_at"]).timestamp()
+        return _end_of_day(date.fromisoformat(reservation["start_date"])).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def is_expired(reservation, now=None):
+    """
+    Indica se uma reserva pendente já passou do prazo (mesmo que ainda não tenha sido expirada).
+
+    Args:
+        reservation: Reserva
+        now: Timestamp atual (padrão: agora)
+
+    Returns:
+        bool: True se a expiração está ativa e o prazo venceu
+    """
+    if not _ttl_seconds:
+        return False
+    deadline = _deadline(reservation)
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    return deadline is not None and deadline <= now
+
+
+def _push(reservation):
+    deadline = _deadline(reservation)
+    if deadline is not None:
+        with _heap_lock:
+            heapq.heappush(_heap, (deadline, reservation["id"]))
+
+
+def _on_reservation_change(old, new):
+    if _ttl_seconds and _heap_built and new is not None:
+        _push(new)
+
+
+add_listener("reservations", _on_reservation_change)
+
+
+def _build_heap():
+    global _heap_built
+    with _heap_lock:
+        if _heap_built:
+            return
+        _heap_built = True
+    for reservation in find_many("reservations", {"approved": None}):
+        _push(reservation)
+
+
+def expire_due(now=None):
+    """
+    Expira as solicitações pendentes com prazo vencido.
+
+    Args:
+        now: Timestamp atual (padrão: agora)
+
+    Returns:
+        int: Número de reservas expiradas
+    """
+    _build_heap()
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    due = []
+    with _heap_lock:
+        while _heap and _heap[0][0] <= now:
+            due.append(heapq.heappop(_heap)[1])
+
+    expired = []
+    postponed = []
+
+    def expire(reservation):
+        # Reavaliada sob a trava da coleção: a reserva pode ter sido respondida desde a entrada no heap
+        deadline = _deadline(reservation)
+        if deadline is None:
+            return None
+        if deadline > now:
+            # O prazo foi alterado depois da entrada no heap
+            postponed.append(reservation)
+            return None
+        reservation["approved"] = False
+        reservation["expired"] = True
+        expired.append(reservation["id"])
+        return reservation
+
+    if due:
+        # Estado final e arquivamento em uma única operação: reservations.json e
+        # cada partição de destino são gravados uma vez por lote
+        archive_records("reservations", dict.fromkeys(due), update=expire)
+    for reservation in postponed:
+        _push(reservation)
+
+    if expired:
+        logger.info("Expiradas %d solicitações de reserva pendentes", len(expired))
+    return len(expired)
+
+
+def schedule_expiry(ttl_seconds=PENDING_TTL_SECONDS):
+    """
+    Define o prazo das solicitações pendentes e registra a verificação periódica no agendador.
+
+    Args:
+        ttl_seconds: Prazo de uma solicitação pendente, em segundos
+    """
+    global _ttl_seconds
+    if ttl_seconds <= 0:
+        raise ValueError("O prazo das solicitações pendentes deve ser positivo")
+    _ttl_seconds = ttl_seconds
+    scheduler.add_job("expire-reservations", expire_due, interval=CHECK_INTERVAL_SECONDS,
+                      priority=PRIORITY_NORMAL)
@@ -0,0 +1,231 @@
+"""
+Módulo de busca geográfica de imóveis.
+Este arquivo implementa um índice espacial em grade uniforme sobre a
+latitude/longitude dos imóveis, usado nas buscas por raio ("perto de mim")
+e por retângulo (bounding box).
+
+A grade divide o mapa em células de tamanho fixo (em graus). Uma busca
+visita apenas as células que cobrem a área pedida e calcula a distância
+exata (haversine) só para os imóveis dessas células.
+"""
+
+import math
+import threading
+
+from app.data_manager import add_listener, load_data
+
+# Raio médio da Terra em km
+EARTH_RADIUS_KM = 6371.0088
+
+# Quilômetros por grau de latitude
+KM_PER_DEGREE = 111.32
+
+# Tamanho padrão das células da grade, em graus (~5,5 km de latitude)
+DEFAULT_CELL_SIZE = 0.05
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Calcula a distância em km entre dois pontos pela fórmula de haversine.
+
+    Args:
+        lat1, lng1: Coordenadas do primeiro ponto (graus)
+        lat2, lng2: Coordenadas do segundo ponto (graus)
+
+    Returns:
+        float: Distância em km
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_coordinates(latitude, longitude):
+    """
+    Valida e converte um par de coordenadas.
+
+    Args:
+        latitude: Latitude (número ou string) ou None
+        longitude: Longitude (número ou string) ou None
+
+    Returns:
+        tuple: (latitude, longitude) como float, ou (None, None) se ambos vazios
+
+    Raises:
+        ValueError: Se apenas uma coordenada for informada ou se estiverem fora dos limites
+    """
+    if latitude in (None, "") and longitude in (None, ""):
+        return None, None
+    if latitude in (None, "") or longitude in (None, ""):
+        raise ValueError("Informe latitude e longitude")
+    lat, lng = float(latitude), float(longitude)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("Coordenadas fora dos limites")
+    return lat, lng
+
+
+class GeoGridIndex:
+    """
+    Índice espacial em grade uniforme.
+
+    Attributes:
+        cell_size: Tamanho de cada célula, em graus
+        cells: Células da grade ((linha, coluna) -> IDs)
+        points: Coordenadas de cada ID indexado
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.points = {}
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def upsert(self, _id, lat, lng):
+        """
+        Insere ou move um ponto no índice.
+        """
+        self.remove(_id)
+        self.points[_id] = (lat, lng)
+        self.cells.setdefault(self._cell(lat, lng), set()).add(_id)
+
+    def remove(self, _id):
+        """
+        Remove um ponto do índice, se existir.
+        """
+        point = self.points.pop(_id, None)
+        if point is not None:
+            cell = self._cell(*point)
+            ids = self.cells.get(cell)
+            if ids is not None:
+                ids.discard(_id)
+                if not ids:
+                    del self.cells[cell]
+
+    def _candidates(self, min_lat, min_lng, max_lat, max_lng):
+        """
+        Retorna os IDs das células que cobrem o retângulo.
+        Se o retângulo cobre mais células do que há pontos, percorre os pontos diretamente.
+        """
+        row0, col0 = self._cell(min_lat, min_lng)
+        row1, col1 = self._cell(max_lat, max_lng)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > len(self.points):
+            return list(self.points)
+        return [_id for row in range(row0, row1 + 1) for col in range(col0, col1 + 1)
+                for _id in self.cells.get((row, col), ())]
+
+    def within_bbox(self, min_lat, min_lng, max_lat, max_lng):
+        """
+        Retorna os IDs dos pontos dentro de um retângulo.
+
+        Args:
+            min_lat, min_lng: Canto sudoeste (graus)
+            max_lat, max_lng: Canto nordeste (graus)
+
+        Returns:
+            list: IDs encontrados
+        """
+        result = []
+        for _id in self._candidates(min_lat, min_lng, max_lat, max_lng):
+            lat, lng = self.points[_id]
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                result.append(_id)
+        return result
+
+    def within_radius(self, lat, lng, radius_km):
+        """
+        Retorna os pontos a até radius_km de um ponto, do mais próximo ao mais distante.
+
+        Args:
+            lat, lng: Centro da busca (graus)
+            radius_km: Raio em km
+
+        Returns:
+            list: Pares (ID, distância em km)
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        result = []
+        for _id in self._candidates(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            distance = haversine_km(lat, lng, *self.points[_id])
+            if distance <= radius_km:
+                result.append((_id, distance))
+        result.sort(key=lambda pair: (pair[1], pair[0]))
+        return result
+
+
+# Índice dos imóveis, construído no primeiro uso e mantido pelas notificações do data_manager
+_property_index = None
+_property_index_lock = threading.Lock()
+
+
+def _index_property(index, p):
+    try:
+        lat, lng = parse_coordinates(p.get("latitude"), p.get("longitude"))
+    except (TypeError, ValueError):
+        lat = None
+    if lat is None:
+        index.remove(p["id"])
+    else:
+        index.upsert(p["id"], lat, lng)
+
+
+def _on_property_change(old, new):
+    with _property_index_lock:
+        if _property_index is None:
+            return
+        if new is None:
+            _property_index.remove(old["id"])
+        else:
+            _index_property(_property_index, new)
+
+
+add_listener("properties", _on_property_change)
+
+
+def _get_property_index():
+    """
+    Retorna o índice geográfico dos imóveis, construindo-o no primeiro uso.
+    Deve ser chamada com _property_index_lock adquirida.
+    """
+    global _property_index
+    if _property_index is None:
+        index = GeoGridIndex()
+        for p in load_data("properties"):
+            _index_property(index, p)
+        _property_index = index
+    return _property_index
+
+
+def find_properties_near(lat, lng, radius_km):
+    """
+    Busca os imóveis a até radius_km de um ponto.
+
+    Args:
+        lat, lng: Centro da busca (graus)
+        radius_km: Raio em km
+
+    Returns:
+        list: Pares (ID do imóvel, distância em km), do mais próximo ao mais distante
+    """
+    with _property_index_lock:
+        return _get_property_index().within_radius(lat, lng, radius_km)
+
+
+def find_properties_in_bbox(min_lat, min_lng, max_lat, max_lng):
+    """
+    Busca os imóveis dentro de um retângulo.
+
+    Args:
+        min_lat, min_lng: Canto sudoeste (graus)
+        max_lat, max_lng: Canto nordeste (graus)
+
+    Returns:
+        list: IDs dos imóveis encontrados
+    """
+    with _property_index_lock:
+        return _get_property_index().within_bbox(min_lat, min_lng, max_lat, max_lng)
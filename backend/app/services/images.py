@@ -0,0 +1,263 @@
+"""
+Módulo de armazenamento das imagens dos imóveis.
+As imagens são gravadas por conteúdo: o ID de cada imagem é o SHA-256 dos
+seus bytes, então enviar a mesma foto duas vezes (ou para dois imóveis)
+grava um único arquivo, e o arquivo de um ID nunca muda.
+
+O envio é lido em blocos (UPLOAD_CHUNK_SIZE) e gravado em um arquivo
+temporário enquanto o hash é calculado, sem manter o arquivo inteiro em
+memória. As miniaturas (THUMBNAIL_SIZES) são geradas depois, em um pool de
+processos que executa apenas thumbnail_worker.py (sem importar a aplicação),
+fora da requisição; enquanto não existem, a imagem original é
+servida no lugar. A geração de miniaturas usa o Pillow, dependência
+opcional: sem ele, apenas as imagens originais são servidas.
+
+Estrutura em IMAGE_DIR:
+    <2 primeiros caracteres do ID>/<ID>.<extensão>           imagem original
+    <2 primeiros caracteres do ID>/<ID>.<tamanho>.<extensão> miniatura
+"""
+
+import hashlib
+import importlib.util
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import thumbnail_worker
+
+logger = logging.getLogger(__name__)
+
+# Diretório das imagens (relativo a backend/, como data/)
+IMAGE_DIR = "images"
+
+# Tamanho de cada bloco lido do envio, em bytes
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Tamanho máximo de uma imagem, em bytes
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Miniaturas geradas para cada imagem: nome -> maior lado, em pixels
+THUMBNAIL_SIZES = {"small": 320, "medium": 960}
+
+# Número de processos que geram miniaturas
+THUMBNAIL_WORKERS = 2
+
+# Tipos aceitos: assinatura no início do arquivo -> (extensão, tipo MIME)
+_SIGNATURES = [
+    (b"\xff\xd8\xff", ("jpg", "image/jpeg")),
+    (b"\x89PNG\r\n\x1a\n", ("png", "image/png")),
+    (b"GIF87a", ("gif", "image/gif")),
+    (b"GIF89a", ("gif", "image/gif")),
+]
+MIME_TYPES = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+
+_IMAGE_ID = re.compile(r"^[0-9a-f]{64}$")
+
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+
+class ImageError(Exception):
+    """
+    Erro lançado quando um envio não é uma imagem aceita.
+
+    Attributes:
+        status: Código HTTP da resposta (400, 413 ou 415)
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def detect_image_type(head):
+    """
+    Reconhece o tipo de uma imagem pelos primeiros bytes.
+
+    Args:
+        head: Início do arquivo (ao menos 12 bytes)
+
+    Returns:
+        str: Extensão do tipo (jpg, png, gif ou webp), ou None se não for aceito
+    """
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, (extension, _) in _SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+def is_image_id(image_id):
+    """
+    Indica se o texto tem o formato de um ID de imagem (SHA-256 em hexadecimal).
+    """
+    return isinstance(image_id, str) and bool(_IMAGE_ID.match(image_id))
+
+
+def _image_path(image_id, extension, size=None):
+    name = f"{image_id}.{size}.{extension}" if size else f"{image_id}.{extension}"
+    return os.path.join(IMAGE_DIR, image_id[:2], name)
+
+
+def configure_images(directory, workers=THUMBNAIL_WORKERS):
+    """
+    Define o diretório das imagens e o número de processos que geram as miniaturas.
+
+    Args:
+        directory: Diretório das imagens
+        workers: Número de processos do pool de miniaturas
+    """
+    global IMAGE_DIR, THUMBNAIL_WORKERS
+    if workers < 1:
+        raise ValueError("O pool de miniaturas precisa de ao menos um processo")
+    IMAGE_DIR, THUMBNAIL_WORKERS = directory, workers
+
+
+def find_image(image_id):
+    """
+    Localiza o arquivo original de uma imagem.
+
+    Args:
+        image_id: ID da imagem
+
+    Returns:
+        tuple: (caminho, extensão), ou (None, None) se a imagem não existir
+    """
+    if not is_image_id(image_id):
+        return None, None
+    for extension in MIME_TYPES:
+        path = _image_path(image_id, extension)
+        if os.path.exists(path):
+            return path, extension
+    return None, None
+
+
+def image_file(image_id, size=None):
+    """
+    Retorna o arquivo a servir para uma imagem, no tamanho pedido.
+
+    Args:
+        image_id: ID da imagem
+        size: Nome da miniatura (ver THUMBNAIL_SIZES), ou None para a original
+
+    Returns:
+        tuple: (caminho, tipo MIME, True se é o arquivo pedido ou False se a
+            miniatura ainda não existe e o caminho é o da original), ou None
+    """
+    path, extension = find_image(image_id)
+    if path is None:
+        return None
+    if size:
+        thumbnail = _image_path(image_id, extension, size)
+        if os.path.exists(thumbnail):
+            return thumbnail, MIME_TYPES[extension], True
+        return path, MIME_TYPES[extension], not HAS_PILLOW
+    return path, MIME_TYPES[extension], True
+
+
+def store_image(stream, max_bytes=MAX_IMAGE_BYTES):
+    """
+    Grava uma imagem lida de um stream, em blocos, deduplicando pelo conteúdo.
+
+    Args:
+        stream: Objeto com read(n) (ex.: request.stream)
+        max_bytes: Tamanho máximo aceito
+
+    Returns:
+        tuple: (ID da imagem, True se o arquivo é novo ou False se já existia)
+
+    Raises:
+        ImageError: Se o conteúdo estiver vazio, for grande demais ou não for uma imagem aceita
+    """
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    fd, tmp_path = tempfile.mkstemp(dir=IMAGE_DIR, suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageError(f"Imagem maior que {max_bytes // (1024 * 1024)} MB", 413)
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+        if size == 0:
+            raise ImageError("Nenhuma imagem enviada")
+        extension = detect_image_type(head)
+        if extension is None:
+            raise ImageError("Formato de imagem não suportado (use JPEG, PNG, GIF ou WebP)", 415)
+
+        image_id = digest.hexdigest()
+        path = _image_path(image_id, extension)
+        if os.path.exists(path):
+            return image_id, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        tmp_path = None
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    schedule_thumbnails(image_id)
+    return image_id, True
+
+
+# Pool de processos das miniaturas, criado no primeiro uso
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # "spawn" evita herdar travas de outras threads do servidor no fork
+                _pool = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Falha ao gerar miniatura: %s", future.exception())
+
+
+def schedule_thumbnails(image_id):
+    """
+    Agenda, no pool de processos, a geração das miniaturas que ainda não existem.
+
+    Args:
+        image_id: ID da imagem
+
+    Returns:
+        list: Futures das miniaturas agendadas (vazia sem o Pillow)
+    """
+    path, extension = find_image(image_id)
+    if path is None or not HAS_PILLOW:
+        return []
+    futures = []
+    for size, max_side in THUMBNAIL_SIZES.items():
+        target = _image_path(image_id, extension, size)
+        if not os.path.exists(target):
+            future = _get_pool().submit(thumbnail_worker.resize, path, target, max_side)
+            future.add_done_callback(_log_failure)
+            futures.append(future)
+    return futures
+
+
+def image_url(image_id, size=None):
+    """
+    Retorna a URL pública de uma imagem.
+    """
+    return f"/api/images/{image_id}" + (f"?size={size}" if size else "")
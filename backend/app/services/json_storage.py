@@ -12,6 +12,9 @@ import json
 import os
 import uuid
 
+from app.query import compile_query
+from app.storage_format import decode
+
 # Diretório base onde os arquivos JSON serão armazenados
 BASE_PATH = "data"
 
@@ -29,7 +32,7 @@ def _get_file_path(file_name):
 
 def load_all(file_name):
     """
-    Carrega todos os dados de um arquivo JSON.
+    Carrega todos os dados de um arquivo JSON (em qualquer formato de app/storage_format.py).
     
     Args:
         file_name: Nome do arquivo (sem extensão)
@@ -41,10 +44,10 @@ def load_all(file_name):
     print("Loading data from:", path)
     if not os.path.exists(path):
         return []
-    with open(path, "r", encoding="utf-8") as f:
+    with open(path, "rb") as f:
         try:
-            return json.load(f)
-        except json.JSONDecodeError:
+            return decode(f.read())
+        except ValueError:
             return []
 
 def save_all(file_name, data):
@@ -114,6 +117,8 @@ def find_by_id(file_name, id_value):
 def find_many(file_name, filters=None):
     """
     Busca itens que correspondem aos filtros.
+    Os filtros aceitam os mesmos operadores de data_manager.find_many()
+    (ver app/query.py) e são comparados sem conversão para texto.
     
     Args:
         file_name: Nome do arquivo (sem extensão)
@@ -126,11 +131,8 @@ def find_many(file_name, filters=None):
     if not filters:
         return data
 
-    result = []
-    for item in data:
-        if all(str(item.get(k)) == str(v) for k, v in filters.items()):
-            result.append(item)
-    return result
+    predicate = compile_query(filters)
+    return [item for item in data if predicate(item)]
 
 def delete_data(file_name, id_value):
     """
@@ -0,0 +1,282 @@
+"""
+Módulo de preços das estadias.
+Cada imóvel tem um preço por dia (price_per_day) e, opcionalmente, um
+calendário de preços (price_calendar): uma lista compacta de faixas de datas
+com outro preço por noite, ex.:
+    [{"from": "2025-12-20", "until": "2026-01-05", "price_per_day": 450},
+     {"from": "2025-12-31", "until": "2025-12-31", "price_per_day": 900}]
+Cada faixa vale para as noites de from a until (inclusive); faixas posteriores
+na lista prevalecem sobre as anteriores (ex.: um dia específico dentro de uma
+temporada). Fora das faixas, vale price_per_day.
+
+Para calcular estadias, o calendário é expandido em um array com o preço de
+cada noite do primeiro ao último dia com faixas e nas somas prefixadas desse
+array: o total de qualquer estadia custa O(1) por imóvel (duas leituras nas
+somas, mais price_per_day vezes as noites fora das faixas). Os calendários
+expandidos ficam em cache pela versão do imóvel. Imóveis sem faixas não
+guardam arrays. O detalhamento (breakdown) é montado a partir dos trechos de
+preço constante do array, calculados junto com ele: custa proporcional ao
+número de trechos na estadia, não ao número de noites.
+
+As noites de uma estadia vão da data de entrada (inclusive) à de saída
+(exclusive), como em analytics.split_nights().
+"""
+
+import threading
+from array import array
+from bisect import bisect_right
+from datetime import date
+from itertools import accumulate
+
+from app.data_manager import add_listener
+
+# Máximo de faixas no calendário de um imóvel
+MAX_CALENDAR_ENTRIES = 500
+
+# Máximo de dias cobertos pelas faixas de um calendário (do primeiro ao último)
+MAX_CALENDAR_DAYS = 3 * 366
+
+# Máximo de imóveis por cotação
+MAX_QUOTE_PROPERTIES = 500
+
+# Máximo de noites de uma estadia cotada
+MAX_QUOTE_NIGHTS = 3 * 366
+
+
+def parse_price_calendar(entries):
+    """
+    Valida e normaliza o calendário de preços enviado por um locador.
+
+    Args:
+        entries: Lista de faixas {"from", "until", "price_per_day"} (None ou vazia remove o calendário)
+
+    Returns:
+        list: Faixas normalizadas, na ordem recebida
+
+    Raises:
+        ValueError: Se o calendário for inválido
+    """
+    if not entries:
+        return []
+    if not isinstance(entries, list) or len(entries) > MAX_CALENDAR_ENTRIES:
+        raise ValueError(f"O calendário deve ser uma lista de até {MAX_CALENDAR_ENTRIES} faixas")
+    result = []
+    for entry in entries:
+        try:
+            first = date.fromisoformat(entry["from"])
+            last = date.fromisoformat(entry["until"])
+            price = entry["price_per_day"]
+        except (TypeError, KeyError, ValueError):
+            raise ValueError("Cada faixa precisa de from e until (AAAA-MM-DD) e price_per_day")
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+            raise ValueError("price_per_day da faixa deve ser um número não negativo")
+        if last < first:
+            raise ValueError("until deve ser igual ou posterior a from")
+        result.append({"from": first.isoformat(), "until": last.isoformat(), "price_per_day": price})
+    first_day = min(date.fromisoformat(e["from"]) for e in result)
+    last_day = max(date.fromisoformat(e["until"]) for e in result)
+    if (last_day - first_day).days + 1 > MAX_CALENDAR_DAYS:
+        raise ValueError(f"As faixas do calendário devem caber em {MAX_CALENDAR_DAYS} dias")
+    return result
+
+
+def _number(value):
+    """
+    Arredonda um valor em duas casas, como int quando não tem parte decimal.
+    """
+    value = round(value, 2)
+    return int(value) if float(value).is_integer() else value
+
+
+class PriceCalendar:
+    """
+    Preços por noite de um imóvel, com somas prefixadas.
+
+    Attributes:
+        base: Preço por dia fora das faixas
+        first: Ordinal (date.toordinal) da primeira noite coberta pelas faixas, ou None sem faixas
+        prices: Preço de cada noite de first em diante
+        prefix: Somas prefixadas de prices (prefix[i] = soma das i primeiras noites)
+        run_starts: Ordinal da primeira noite de cada trecho de preço constante de prices
+        run_prices: Preço de cada trecho
+    """
+
+    __slots__ = ("base", "first", "prices", "prefix", "run_starts", "run_prices")
+
+    def __init__(self, base, entries=()):
+        self.base = base
+        self.first = None
+        self.prices = self.prefix = None
+        self.run_starts = self.run_prices = None
+        if not entries:
+            return
+        ranges = [(date.fromisoformat(e["from"]).toordinal(), date.fromisoformat(e["until"]).toordinal() + 1,
+                   e["price_per_day"]) for e in entries]
+        self.first = min(start for start, _, _ in ranges)
+        days = max(end for _, end, _ in ranges) - self.first
+        self.prices = array("d", [base]) * days
+        for start, end, price in ranges:
+            self.prices[start - self.first:end - self.first] = array("d", [price]) * (end - start)
+        self.prefix = array("d", accumulate(self.prices, initial=0.0))
+        self.run_starts, self.run_prices = [], []
+        for position, price in enumerate(self.prices):
+            if not self.run_prices or price != self.prices[position - 1]:
+                self.run_starts.append(self.first + position)
+                self.run_prices.append(_number(price))
+
+    def _covered(self, start, end):
+        """
+        Retorna o trecho [start, end) (ordinais) dentro das faixas, como posições no array.
+        """
+        low = min(max(start - self.first, 0), len(self.prices))
+        high = min(max(end - self.first, 0), len(self.prices))
+        return low, max(high, low)
+
+    def total(self, start, end):
+        """
+        Calcula o total das noites de start (inclusive) a end (exclusive), em O(1).
+
+        Args:
+            start: Data de entrada
+            end: Data de saída
+
+        Returns:
+            float: Total da estadia
+        """
+        nights = max((end - start).days, 0)
+        if self.first is None or not nights:
+            return self.base * nights
+        low, high = self._covered(start.toordinal(), start.toordinal() + nights)
+        return self.prefix[high] - self.prefix[low] + self.base * (nights - (high - low))
+
+    def _runs(self, start, end):
+        """
+        Gera os trechos (início, fim, preço) de preço constante de [start, end) (ordinais),
+        em ordem; trechos vizinhos podem ter o mesmo preço.
+        """
+        if self.first is None:
+            yield start, end, self.base
+            return
+        last = self.first + len(self.prices)
+        if start < self.first:
+            yield start, min(end, self.first), self.base
+        index = max(bisect_right(self.run_starts, start) - 1, 0)
+        while index < len(self.run_starts) and self.run_starts[index] < end:
+            run_end = self.run_starts[index + 1] if index + 1 < len(self.run_starts) else last
+            yield max(start, self.run_starts[index]), min(end, run_end), self.run_prices[index]
+            index += 1
+        if end > last:
+            yield max(start, last), end, self.base
+
+    def breakdown(self, start, end):
+        """
+        Lista as noites da estadia agrupadas em trechos consecutivos com o mesmo preço.
+
+        Args:
+            start: Data de entrada
+            end: Data de saída
+
+        Returns:
+            list: Trechos {"from", "until" (última noite), "nights", "price_per_day", "subtotal"}
+        """
+        runs = []  # [início, fim, preço], com os trechos vizinhos de mesmo preço unidos
+        for low, high, price in self._runs(start.toordinal(), end.toordinal()):
+            if low >= high:
+                continue
+            if runs and runs[-1][2] == price:
+                runs[-1][1] = high
+            else:
+                runs.append([low, high, price])
+        return [{"from": date.fromordinal(low).isoformat(), "until": date.fromordinal(high - 1).isoformat(),
+                 "nights": high - low, "price_per_day": price, "subtotal": _number(price * (high - low))}
+                for low, high, price in runs]
+
+    def price(self, day):
+        """
+        Retorna o preço da noite de uma data.
+        """
+        if self.first is not None:
+            position = day.toordinal() - self.first
+            if 0 <= position < len(self.prices):
+                return _number(self.prices[position])
+        return self.base
+
+
+# Calendários expandidos: ID do imóvel -> (versão do imóvel, PriceCalendar)
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+def _on_property_change(old, new):
+    if new is None:
+        with _calendars_lock:
+            _calendars.pop(old["id"], None)
+
+
+add_listener("properties", _on_property_change)
+
+
+def get_calendar(prop):
+    """
+    Retorna o calendário de preços de um imóvel, expandindo-o no primeiro uso de cada versão.
+
+    Args:
+        prop: Imóvel (com price_per_day, price_calendar e version)
+
+    Returns:
+        PriceCalendar: Calendário do imóvel
+    """
+    entries = prop.get("price_calendar")
+    if not entries:
+        return PriceCalendar(prop.get("price_per_day") or 0)
+    version = prop.get("version")
+    with _calendars_lock:
+        cached = _calendars.get(prop["id"])
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
+    calendar = PriceCalendar(prop.get("price_per_day") or 0, entries)
+    with _calendars_lock:
+        _calendars[prop["id"]] = (version, calendar)
+    return calendar
+
+
+def stay_total(prop, start, end):
+    """
+    Calcula o total de uma estadia em um imóvel.
+
+    Args:
+        prop: Imóvel
+        start: Data de entrada
+        end: Data de saída
+
+    Returns:
+        float: Total, arredondado em duas casas
+    """
+    return _number(get_calendar(prop).total(start, end))
+
+
+def quote(prop, start, end, breakdown=True):
+    """
+    Monta a cotação de uma estadia em um imóvel.
+
+    Args:
+        prop: Imóvel
+        start: Data de entrada
+        end: Data de saída
+        breakdown: Se True, inclui os trechos de noites com o mesmo preço
+
+    Returns:
+        dict: property_id, nights, total, average_per_night e, opcionalmente, breakdown
+    """
+    calendar = get_calendar(prop)
+    nights = max((end - start).days, 0)
+    total = _number(calendar.total(start, end))
+    result = {
+        "property_id": prop["id"],
+        "nights": nights,
+        "total": total,
+        "average_per_night": _number(total / nights) if nights else None,
+    }
+    if breakdown:
+        result["breakdown"] = calendar.breakdown(start, end)
+    return result
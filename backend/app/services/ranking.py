@@ -0,0 +1,85 @@
+"""
+Módulo de ordenação dos resultados de busca.
+Define os critérios de ordenação de imóveis e a seleção dos k melhores
+resultados com heap, sem ordenar a lista inteira de candidatos.
+
+Todas as chaves terminam no ID do imóvel, para que empates sejam sempre
+desfeitos da mesma forma e a paginação seja estável entre requisições.
+"""
+
+import heapq
+
+# Pesos da nota e do preço no critério combinado ("score")
+SCORE_RATING_WEIGHT = 0.7
+SCORE_PRICE_WEIGHT = 0.3
+
+# Nota considerada para imóveis ainda sem avaliações no critério combinado
+NEUTRAL_RATING = 3.0
+
+SORT_OPTIONS = ("rating", "price", "score", "total")
+
+
+def blended_score(average_rating, price_per_day, cheapest_price):
+    """
+    Calcula a pontuação combinada de nota e preço de um imóvel (entre 0 e 1).
+
+    Args:
+        average_rating: Nota média do imóvel (None se não avaliado)
+        price_per_day: Preço por dia do imóvel
+        cheapest_price: Menor preço por dia entre os candidatos
+
+    Returns:
+        float: Pontuação; quanto maior, melhor
+    """
+    rating = average_rating if average_rating is not None else NEUTRAL_RATING
+    price = cheapest_price / price_per_day if price_per_day > 0 else 1.0
+    return SCORE_RATING_WEIGHT * rating / 5 + SCORE_PRICE_WEIGHT * price
+
+
+def sort_key(sort, cheapest_price=None, stay_totals=None):
+    """
+    Retorna a chave de ordenação de um critério, para ordem crescente.
+    A chave recebe pares (imóvel, nota média).
+
+    Args:
+        sort: "rating" (maior nota primeiro, não avaliados por último),
+            "price" (menor preço primeiro), "score" (maior pontuação combinada primeiro)
+            ou "total" (menor total da estadia primeiro)
+        cheapest_price: Menor preço entre os candidatos (obrigatório para "score")
+        stay_totals: ID do imóvel -> total da estadia (obrigatório para "total")
+
+    Returns:
+        function: Chave de ordenação
+
+    Raises:
+        ValueError: Se o critério não existir
+    """
+    if sort == "rating":
+        return lambda pair: (pair[1] is None, -(pair[1] or 0), pair[0]["id"])
+    if sort == "price":
+        return lambda pair: (pair[0]["price_per_day"], pair[0]["id"])
+    if sort == "score":
+        return lambda pair: (-blended_score(pair[1], pair[0]["price_per_day"], cheapest_price),
+                             pair[0]["id"])
+    if sort == "total":
+        return lambda pair: (stay_totals[pair[0]["id"]], pair[0]["id"])
+    raise ValueError(f"Critério de ordenação inválido: {sort}")
+
+
+def top_k(items, key, k=None, offset=0):
+    """
+    Seleciona os itens das posições offset a offset + k na ordem da chave.
+    Com k informado, usa heap (O(n log(offset + k))) em vez de ordenar tudo.
+
+    Args:
+        items: Itens candidatos
+        key: Chave de ordenação crescente
+        k: Número de itens (None para todos)
+        offset: Número de itens iniciais a pular
+
+    Returns:
+        list: Itens selecionados, em ordem
+    """
+    if k is None:
+        return sorted(items, key=key)[offset:]
+    return heapq.nsmallest(offset + k, items, key=key)[offset:]
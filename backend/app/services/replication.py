@@ -0,0 +1,388 @@
+"""
+Módulo de replicação para réplicas de leitura.
+O processo primário publica o estado das coleções em um diretório
+compartilhado (REPLICATION_DIR), na forma de um snapshot seguido de um log
+das alterações posteriores. Processos seguidores carregam o snapshot,
+aplicam o log em memória e atendem as rotas de leitura.
+
+Arquivos do diretório de replicação:
+- manifest.json: geração atual (snapshot e log), último evento publicado e
+  horário do último sinal de vida do primário
+- snapshot-<época>-<seq>.json: estado de todas as coleções no evento <seq>
+- log-<época>-<seq>.jsonl: um evento por linha, posteriores ao snapshot
+
+Os eventos vêm do feed de alterações (app/change_feed.py) e trazem o
+registro completo, então reaplicar um evento já refletido no snapshot não
+altera o resultado. A cada SNAPSHOT_EVERY eventos o primário inicia uma nova
+geração; a anterior é mantida até a seguinte, para que seguidores que ainda
+estão lendo o log antigo terminem a leitura.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from app import data_manager
+from app.data_manager import (apply_change, apply_move, change_feed, export_collections, install_collections,
+                              restore_redacted)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+# Número de eventos no log que dispara um novo snapshot
+SNAPSHOT_EVERY = 10000
+
+# Intervalo, em segundos, entre os sinais de vida do primário no manifesto
+HEARTBEAT_SECONDS = 1.0
+
+# Intervalo, em segundos, entre as leituras do diretório pelos seguidores
+POLL_INTERVAL = 0.5
+
+_state_lock = threading.Lock()
+_role = None
+_shipper = None
+_follower = None
+_follower_thread = None
+
+
+def _write_json(path, payload):
+    """
+    Grava um arquivo JSON de forma atômica (arquivo temporário + os.replace).
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+class LogShipper:
+    """
+    Publica as alterações do processo primário no diretório de replicação.
+
+    Attributes:
+        directory: Diretório de replicação
+        epoch: Identificador desta execução do primário
+        seq: Último evento do feed gravado no log
+        snapshot_seq: Evento do snapshot da geração atual
+    """
+
+    def __init__(self, directory, snapshot_every=SNAPSHOT_EVERY):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.snapshot_seq = 0
+        self._log = None
+        self._log_name = None
+        self._generations = []
+        self._heartbeat_at = 0.0
+
+    def _new_generation(self):
+        """
+        Grava um snapshot de todas as coleções e começa um novo log a partir dele.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # O cursor é lido antes da cópia: eventos concorrentes com a cópia
+        # aparecem também no log, e reaplicá-los não muda o resultado
+        seq = change_feed.last_seq
+        snapshot_name = f"snapshot-{self.epoch}-{seq}.json"
+        log_name = f"log-{self.epoch}-{seq}.jsonl"
+        _write_json(os.path.join(self.directory, snapshot_name),
+                    {"epoch": self.epoch, "seq": seq, "collections": export_collections()})
+        if self._log is not None:
+            self._log.close()
+        self._log = open(os.path.join(self.directory, log_name), "a", encoding="utf-8")
+        self._log_name = log_name
+        self.seq = self.snapshot_seq = seq
+        self._write_manifest(snapshot_name)
+
+        # Mantém a geração atual e a anterior; remove as demais
+        self._generations.append((snapshot_name, log_name))
+        current = {name for generation in self._generations[-2:] for name in generation}
+        for path in glob.glob(os.path.join(self.directory, "snapshot-*.json")) + \
+                glob.glob(os.path.join(self.directory, "log-*.jsonl")):
+            if os.path.basename(path) not in current:
+                os.remove(path)
+        self._generations = self._generations[-2:]
+        logger.info("Replicação: snapshot %s gravado", snapshot_name)
+
+    def _write_manifest(self, snapshot_name=None):
+        if snapshot_name is None:
+            snapshot_name = self._generations[-1][0]
+        self._heartbeat_at = time.time()
+        _write_json(os.path.join(self.directory, MANIFEST_FILE), {
+            "epoch": self.epoch,
+            "snapshot": snapshot_name,
+            "snapshot_seq": self.snapshot_seq,
+            "log": self._log_name,
+            "head_seq": self.seq,
+            "heartbeat_at": self._heartbeat_at,
+        })
+
+    def _append(self, events):
+        now = time.time()
+        for event in events:
+            entry = {
+                "seq": event["seq"],
+                "segment": event["segment"],
+                "op": event["op"],
+                "id": event["id"],
+                "record": restore_redacted(event["segment"], event["new"]),
+                "ts": now,
+            }
+            if event["op"] == "move":
+                entry["moved_from"] = event["moved_from"]
+            self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._log.flush()
+        self.seq = events[-1]["seq"]
+
+    def run(self):
+        self._new_generation()
+        while True:
+            try:
+                events, reset = change_feed.read(self.seq, timeout=HEARTBEAT_SECONDS)
+                if reset:
+                    # O feed descartou eventos ainda não publicados: recomeça com um snapshot
+                    self._new_generation()
+                    continue
+                if events:
+                    self._append(events)
+                if self.seq - self.snapshot_seq >= self.snapshot_every:
+                    self._new_generation()
+                elif events or time.time() - self._heartbeat_at >= HEARTBEAT_SECONDS:
+                    self._write_manifest()
+            except OSError:
+                logger.exception("Falha ao publicar alterações em '%s'", self.directory)
+                time.sleep(HEARTBEAT_SECONDS)
+
+    def status(self):
+        return {
+            "role": "primary",
+            "epoch": self.epoch,
+            "head_seq": self.seq,
+            "snapshot_seq": self.snapshot_seq,
+            "log": self._log_name,
+        }
+
+
+class Follower:
+    """
+    Aplica em memória o snapshot e o log publicados pelo primário.
+
+    Attributes:
+        directory: Diretório de replicação
+        epoch: Época do primário que está sendo seguido
+        applied_seq: Último evento aplicado
+        head_seq: Último evento publicado pelo primário (segundo o manifesto)
+        caught_up_at: Horário do sinal de vida do primário mais recente em que
+            todos os eventos publicados já estavam aplicados
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.epoch = None
+        self.applied_seq = 0
+        self.head_seq = 0
+        self.heartbeat_at = None
+        self.caught_up_at = None
+        self._log_name = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def _load_snapshot(self, manifest):
+        snapshot = _read_json(os.path.join(self.directory, manifest["snapshot"]))
+        if snapshot is None:
+            return False
+        install_collections(snapshot["collections"])
+        self.epoch = snapshot["epoch"]
+        self.applied_seq = snapshot["seq"]
+        self._log_name = manifest["log"]
+        self._offset = 0
+        logger.info("Réplica: snapshot %s carregado", manifest["snapshot"])
+        return True
+
+    def _apply(self, entry):
+        if entry["op"] == "move":
+            apply_move(entry["moved_from"], entry["segment"], entry["record"])
+        else:
+            apply_change(entry["segment"], entry["id"], entry["record"])
+
+    def _drain(self):
+        """
+        Aplica as linhas completas do log atual a partir da última posição lida.
+
+        Returns:
+            bool: False se o log não existe mais ou tem uma lacuna (é preciso recarregar o snapshot)
+        """
+        try:
+            with open(os.path.join(self.directory, self._log_name), "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return False
+        # Uma última linha sem quebra ainda está sendo escrita pelo primário
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            if entry["seq"] <= self.applied_seq:
+                continue
+            if entry["seq"] != self.applied_seq + 1:
+                return False
+            self._apply(entry)
+            self.applied_seq = entry["seq"]
+        self._offset += end
+        return True
+
+    def sync(self):
+        """
+        Lê o manifesto e aplica tudo o que o primário publicou desde a última leitura.
+
+        Returns:
+            bool: True se a réplica está em dia com o manifesto lido
+        """
+        with self._lock:
+            manifest = _read_json(os.path.join(self.directory, MANIFEST_FILE))
+            if manifest is None:
+                return False
+            if manifest["epoch"] != self.epoch:
+                if not self._load_snapshot(manifest):
+                    return False
+            elif self._log_name != manifest["log"]:
+                # Termina o log da geração anterior antes de passar para o novo
+                if self._drain() and self.applied_seq >= manifest["snapshot_seq"]:
+                    self._log_name, self._offset = manifest["log"], 0
+                elif not self._load_snapshot(manifest):
+                    return False
+            if not self._drain() and not self._load_snapshot(manifest):
+                return False
+
+            self.head_seq = manifest["head_seq"]
+            self.heartbeat_at = manifest["heartbeat_at"]
+            if self.applied_seq >= self.head_seq:
+                self.caught_up_at = self.heartbeat_at
+                return True
+            return False
+
+    def run(self, poll_interval):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Falha ao aplicar a replicação de '%s'", self.directory)
+            time.sleep(poll_interval)
+
+    def lag_seconds(self):
+        """
+        Atraso da réplica: tempo desde o último momento em que ela estava em dia
+        com o primário (None se ainda não sincronizou).
+        """
+        if self.caught_up_at is None:
+            return None
+        return max(time.time() - self.caught_up_at, 0.0)
+
+    def status(self):
+        lag = self.lag_seconds()
+        return {
+            "role": "follower",
+            "epoch": self.epoch,
+            "applied_seq": self.applied_seq,
+            "head_seq": self.head_seq,
+            "lag_events": max(self.head_seq - self.applied_seq, 0),
+            "lag_seconds": round(lag, 3) if lag is not None else None,
+            "primary_heartbeat_at": self.heartbeat_at,
+        }
+
+
+def start_primary(directory, snapshot_every=SNAPSHOT_EVERY):
+    """
+    Inicia, em segundo plano, a publicação das alterações no diretório de replicação.
+
+    Args:
+        directory: Diretório de replicação
+        snapshot_every: Número de eventos no log que dispara um novo snapshot
+    """
+    global _role, _shipper
+    with _state_lock:
+        if _shipper is not None:
+            return
+        _role = "primary"
+        _shipper = LogShipper(directory, snapshot_every)
+        threading.Thread(target=_shipper.run, name="replication-shipper", daemon=True).start()
+
+
+def init_follower(directory):
+    """
+    Prepara o processo como réplica de leitura: as coleções passam a vir
+    apenas do diretório de replicação (o diretório de dados local não é usado)
+    e o estado publicado até agora é aplicado.
+
+    Args:
+        directory: Diretório de replicação
+
+    Returns:
+        bool: True se a réplica já está em dia com o primário
+    """
+    global _role, _follower
+    with _state_lock:
+        _role = "follower"
+        # Diretório de dados vazio e exclusivo: coleções ainda não publicadas começam vazias
+        data_manager.DATA_DIR = tempfile.mkdtemp(prefix="replica-")
+        atexit.register(shutil.rmtree, data_manager.DATA_DIR, True)
+        data_manager.reset_cache()
+        _follower = Follower(directory)
+    return _follower.sync()
+
+
+def start_follower(poll_interval=POLL_INTERVAL):
+    """
+    Inicia, em segundo plano, a aplicação contínua do log do primário.
+    Deve ser chamada depois de init_follower().
+
+    Args:
+        poll_interval: Intervalo, em segundos, entre as leituras do diretório
+    """
+    global _follower_thread
+    with _state_lock:
+        if _follower_thread is not None:
+            return
+        _follower_thread = threading.Thread(target=_follower.run, args=(poll_interval,),
+                                            name="replication-follower", daemon=True)
+        _follower_thread.start()
+
+
+def replica_lag_seconds():
+    """
+    Retorna o atraso da réplica em segundos (None se o processo não é réplica ou ainda não sincronizou).
+    """
+    return _follower.lag_seconds() if _follower is not None else None
+
+
+def get_status():
+    """
+    Retorna o estado da replicação deste processo.
+
+    Returns:
+        dict: Papel do processo ("primary", "follower" ou "standalone") e
+            posição no log; nas réplicas, também o atraso em eventos e segundos
+    """
+    if _role == "primary":
+        return _shipper.status()
+    if _role == "follower":
+        return _follower.status()
+    return {"role": "standalone"}
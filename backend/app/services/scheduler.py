@@ -0,0 +1,411 @@
+"""
+Módulo do agendador de tarefas em segundo plano.
+Executa as tarefas de manutenção (arquivamento de reservas, snapshots,
+remoção de órfãos, compactação do índice de busca) fora das requisições:
+- Tarefas periódicas (interval) e tarefas únicas (submit), identificadas pelo nome
+- Entre as tarefas vencidas, as de menor prioridade numérica rodam primeiro
+- Tarefas "thread" rodam em um pool de threads do próprio processo (acessam o
+  data_manager); tarefas "process" rodam em um pool de processos e devem ser
+  funções de módulo que não dependem do estado em memória do servidor
+- Orçamento de CPU: as tarefas podem usar no máximo cpu_budget segundos de CPU
+  por segundo, na média de CPU_WINDOW_SECONDS; acima disso, novas execuções esperam
+- Pausa: manual (rotas /api/jobs/pause e /resume) ou automática enquanto houver
+  pause_in_flight ou mais requisições em andamento (picos de tráfego).
+  Execuções já iniciadas não são interrompidas
+
+A thread do agendador é iniciada por start(), na primeira requisição (ver create_app).
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from flask import g
+
+logger = logging.getLogger(__name__)
+
+# Prioridades usuais (menor roda primeiro)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+# Padrões da configuração (ver configure())
+JOB_WORKERS = 2
+JOB_PROCESS_WORKERS = 1
+CPU_BUDGET = 0.5
+PAUSE_IN_FLIGHT = 16
+
+# Janela da média do orçamento de CPU, em segundos
+CPU_WINDOW_SECONDS = 60.0
+
+# Intervalo entre as verificações de carga enquanto pausado por tráfego, em segundos
+LOAD_POLL_SECONDS = 0.5
+
+
+def _timed_call(func, args):
+    """
+    Executa uma tarefa no pool de processos, retornando o tempo de CPU gasto.
+    """
+    started = time.process_time()
+    func(*args)
+    return time.process_time() - started
+
+
+class Job:
+    """
+    Tarefa registrada no agendador.
+
+    Attributes:
+        name: Nome (único) da tarefa
+        func: Função executada, chamada com args
+        interval: Intervalo entre execuções em segundos, ou None para tarefa única
+        priority: Prioridade (menor roda primeiro)
+        executor: "thread" ou "process"
+        next_run: Instante (time.monotonic) da próxima execução, ou None se não agendada
+    """
+
+    def __init__(self, name, func, args, interval, priority, executor):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.interval = interval
+        self.priority = priority
+        self.executor = executor
+        self.next_run = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.last_started = None
+        self.last_duration = None
+        self.last_cpu = None
+        self.total_cpu = 0.0
+        self.last_error = None
+
+    def status(self, now):
+        if self.running:
+            state = "running"
+        elif self.next_run is not None:
+            state = "scheduled"
+        elif self.runs == 0:
+            state = "idle"
+        else:
+            state = "failed" if self.last_error is not None else "done"
+        return {
+            "name": self.name,
+            "state": state,
+            "executor": self.executor,
+            "priority": self.priority,
+            "interval_seconds": self.interval,
+            "next_run_in": None if self.next_run is None else round(max(self.next_run - now, 0.0), 3),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_started": self.last_started,
+            "last_duration_ms": None if self.last_duration is None else round(self.last_duration * 1000, 3),
+            "last_cpu_ms": None if self.last_cpu is None else round(self.last_cpu * 1000, 3),
+            "total_cpu_ms": round(self.total_cpu * 1000, 3),
+            "last_error": self.last_error,
+        }
+
+
+class JobScheduler:
+    """
+    Agendador de tarefas periódicas e únicas, com prioridades, orçamento de CPU e pausa.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._jobs = {}
+        self._thread = None
+        self._stopping = False
+        self._threads = None
+        self._processes = None
+        self._running_by_executor = {"thread": 0, "process": 0}
+        self._cpu_usage = deque()
+        self.workers = JOB_WORKERS
+        self.process_workers = JOB_PROCESS_WORKERS
+        self.cpu_budget = CPU_BUDGET
+        self.pause_in_flight = PAUSE_IN_FLIGHT
+        self.paused = False
+        self.in_flight = 0
+
+    def configure(self, workers=JOB_WORKERS, process_workers=JOB_PROCESS_WORKERS,
+                  cpu_budget=CPU_BUDGET, pause_in_flight=PAUSE_IN_FLIGHT):
+        """
+        Define os pools, o orçamento de CPU e o limite de carga. Deve ser chamada antes de start().
+
+        Args:
+            workers: Threads que executam as tarefas "thread"
+            process_workers: Processos que executam as tarefas "process"
+            cpu_budget: Segundos de CPU por segundo disponíveis para as tarefas (0 desativa o limite)
+            pause_in_flight: Requisições em andamento a partir das quais as tarefas
+                esperam (0 desativa a pausa automática)
+        """
+        if workers < 1 or process_workers < 1:
+            raise ValueError("Os pools de tarefas precisam de ao menos um trabalhador")
+        if cpu_budget < 0 or pause_in_flight < 0:
+            raise ValueError("Orçamento de CPU e limite de carga não podem ser negativos")
+        with self._cond:
+            self.workers, self.process_workers = workers, process_workers
+            self.cpu_budget, self.pause_in_flight = cpu_budget, pause_in_flight
+
+    def add_job(self, name, func, interval=None, delay=0.0, args=(), priority=PRIORITY_NORMAL,
+                executor="thread"):
+        """
+        Registra (ou substitui) uma tarefa.
+
+        Args:
+            name: Nome da tarefa
+            func: Função executada
+            interval: Intervalo entre execuções em segundos, ou None para executar uma única vez
+            delay: Segundos até a primeira execução
+            args: Argumentos de func
+            priority: Prioridade (menor roda primeiro)
+            executor: "thread" ou "process"
+        """
+        if executor not in self._running_by_executor:
+            raise ValueError(f"Executor de tarefas inválido: {executor}")
+        if interval is not None and interval <= 0:
+            raise ValueError("O intervalo de uma tarefa periódica deve ser positivo")
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None:
+                job = self._jobs[name] = Job(name, func, args, interval, priority, executor)
+            else:
+                job.func, job.args, job.interval = func, tuple(args), interval
+                job.priority, job.executor = priority, executor
+            job.next_run = time.monotonic() + delay
+            self._cond.notify()
+
+    def submit(self, name, func, args=(), delay=0.0, priority=PRIORITY_NORMAL, executor="thread"):
+        """
+        Agenda uma execução única de uma tarefa, se ela ainda não estiver agendada.
+        Uma tarefa submetida enquanto roda é executada de novo ao terminar; o nome
+        de uma tarefa periódica já registrada mantém a periodicidade.
+
+        Args:
+            name: Nome da tarefa
+            func: Função executada
+            args: Argumentos de func
+            delay: Segundos até a execução
+            priority: Prioridade (menor roda primeiro)
+            executor: "thread" ou "process"
+
+        Returns:
+            bool: False se o agendador não está rodando (a tarefa não foi agendada)
+        """
+        with self._cond:
+            if self._thread is None or self._stopping:
+                return False
+            job = self._jobs.get(name)
+            if job is None or (job.interval is None and job.next_run is None):
+                self.add_job(name, func, delay=delay, args=args, priority=priority, executor=executor)
+            return True
+
+    def run_now(self, name):
+        """
+        Antecipa a próxima execução de uma tarefa registrada para agora.
+
+        Returns:
+            bool: False se não há tarefa com esse nome
+        """
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None:
+                return False
+            job.next_run = time.monotonic()
+            self._cond.notify()
+            return True
+
+    def pause(self):
+        """
+        Pausa o início de novas execuções (as em andamento continuam).
+        """
+        with self._cond:
+            self.paused = True
+
+    def resume(self):
+        """
+        Retoma as execuções pausadas por pause().
+        """
+        with self._cond:
+            self.paused = False
+            self._cond.notify()
+
+    def request_started(self):
+        with self._cond:
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._cond:
+            self.in_flight -= 1
+
+    def _busy(self):
+        return self.pause_in_flight > 0 and self.in_flight >= self.pause_in_flight
+
+    def _cpu_used(self, now):
+        while self._cpu_usage and self._cpu_usage[0][0] <= now - CPU_WINDOW_SECONDS:
+            self._cpu_usage.popleft()
+        return sum(cpu for _, cpu in self._cpu_usage)
+
+    def _capacity(self, executor):
+        return self.workers if executor == "thread" else self.process_workers
+
+    def _dispatch(self, now):
+        """
+        Inicia as tarefas vencidas que cabem nos pools. Chamada com _cond adquirida.
+
+        Returns:
+            float: Segundos até a próxima verificação, ou None para esperar uma notificação
+        """
+        if self.paused:
+            return None
+        if self._busy():
+            return LOAD_POLL_SECONDS
+        if self.cpu_budget > 0 and self._cpu_used(now) >= self.cpu_budget * CPU_WINDOW_SECONDS:
+            return self._cpu_usage[0][0] + CPU_WINDOW_SECONDS - now
+
+        due = sorted((job for job in self._jobs.values()
+                      if not job.running and job.next_run is not None and job.next_run <= now),
+                     key=lambda job: (job.priority, job.next_run))
+        for job in due:
+            if self._running_by_executor[job.executor] < self._capacity(job.executor):
+                self._start(job)
+
+        pending = [job.next_run for job in self._jobs.values()
+                   if not job.running and job.next_run is not None and job.next_run > now]
+        return min(pending) - now if pending else None
+
+    def _start(self, job):
+        job.running = True
+        job.next_run = None
+        job.last_started = time.time()
+        executor = job.executor
+        self._running_by_executor[executor] += 1
+        started = time.perf_counter()
+        if executor == "thread":
+            self._threads.submit(self._run_in_thread, job, started)
+        else:
+            if self._processes is None:
+                # "spawn" evita herdar travas de outras threads do servidor no fork
+                self._processes = ProcessPoolExecutor(max_workers=self.process_workers,
+                                                      mp_context=multiprocessing.get_context("spawn"))
+            future = self._processes.submit(_timed_call, job.func, job.args)
+            future.add_done_callback(lambda f: self._process_done(job, started, f))
+
+    def _run_in_thread(self, job, started):
+        cpu_started = time.thread_time()
+        error = None
+        try:
+            job.func(*job.args)
+        except Exception as e:
+            logger.exception("Falha na tarefa '%s'", job.name)
+            error = e
+        self._finish(job, "thread", started, time.thread_time() - cpu_started, error)
+
+    def _process_done(self, job, started, future):
+        if future.cancelled():
+            self._finish(job, "process", started, 0.0, RuntimeError("Execução cancelada"))
+        elif future.exception() is not None:
+            logger.error("Falha na tarefa '%s': %s", job.name, future.exception())
+            self._finish(job, "process", started, 0.0, future.exception())
+        else:
+            self._finish(job, "process", started, future.result(), None)
+
+    def _finish(self, job, executor, started, cpu, error):
+        with self._cond:
+            job.running = False
+            job.runs += 1
+            job.last_duration = time.perf_counter() - started
+            job.last_cpu = cpu
+            job.total_cpu += cpu
+            job.last_error = None if error is None else f"{type(error).__name__}: {error}"
+            if error is not None:
+                job.failures += 1
+            self._running_by_executor[executor] -= 1
+            now = time.monotonic()
+            self._cpu_usage.append((now, cpu))
+            if job.next_run is None and job.interval is not None:
+                job.next_run = max(now - job.last_duration + job.interval, now)
+            self._cond.notify()
+
+    def _loop(self):
+        with self._cond:
+            while not self._stopping:
+                self._cond.wait(self._dispatch(time.monotonic()))
+
+    def start(self):
+        """
+        Inicia a thread do agendador, caso ainda não esteja rodando.
+        """
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+                self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """
+        Interrompe o agendador, esperando as execuções em andamento terminarem.
+        """
+        with self._cond:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        thread.join()
+        self._threads.shutdown(wait=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=True)
+        with self._cond:
+            self._thread, self._threads, self._processes = None, None, None
+
+    def status(self):
+        """
+        Retorna o estado do agendador e de cada tarefa.
+
+        Returns:
+            dict: running, paused, busy, in_flight, cpu (orçamento e uso na janela) e jobs
+        """
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "running": self._thread is not None and not self._stopping,
+                "paused": self.paused,
+                "busy": self._busy(),
+                "in_flight": self.in_flight,
+                "pause_in_flight": self.pause_in_flight,
+                "cpu": {
+                    "budget_per_second": self.cpu_budget,
+                    "window_seconds": CPU_WINDOW_SECONDS,
+                    "used_seconds": round(self._cpu_used(now), 6),
+                },
+                "jobs": [job.status(now) for job in sorted(self._jobs.values(), key=lambda j: j.name)],
+            }
+
+
+scheduler = JobScheduler()
+
+
+def register_scheduler(app):
+    """
+    Conta as requisições em andamento da aplicação, para a pausa automática do agendador.
+
+    Args:
+        app: Aplicação Flask
+    """
+    @app.before_request
+    def count_request():
+        scheduler.request_started()
+        g.job_scheduler_counted = True
+
+    @app.teardown_request
+    def uncount_request(exc):
+        if g.pop("job_scheduler_counted", False):
+            scheduler.request_finished()
@@ -0,0 +1,233 @@
+"""
+Módulo de busca por texto livre nos imóveis.
+Este arquivo implementa um índice invertido sobre o título e a descrição dos
+imóveis, com pontuação BM25 e consultas com vários termos (todos obrigatórios).
+
+Os textos passam pela mesma normalização da busca por cidade (sem acentos,
+minúsculas). Cada termo aponta para uma lista de postings compacta: dois
+arrays de inteiros com os números internos dos documentos, em ordem
+crescente, e a frequência do termo em cada um.
+"""
+
+import math
+import threading
+from array import array
+from bisect import bisect_left
+
+from app.data_manager import add_listener, load_data
+from app.services.scheduler import PRIORITY_LOW, scheduler
+from app.services.text import tokenize
+
+# Parâmetros do BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Peso dos termos do título em relação aos da descrição
+TITLE_WEIGHT = 2
+
+
+class InvertedIndex:
+    """
+    Índice invertido com pontuação BM25.
+
+    Attributes:
+        postings: Termo -> (números dos documentos, frequências), em arrays
+        doc_ids: Número interno -> ID do documento (None se removido)
+        doc_numbers: ID do documento -> número interno
+        doc_lengths: Número interno -> quantidade de termos do documento
+        total_length: Soma dos tamanhos dos documentos ativos
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_ids = []
+        self.doc_numbers = {}
+        self.doc_lengths = array("I")
+        self.total_length = 0
+        self._doc_terms = {}
+
+    def __len__(self):
+        return len(self.doc_numbers)
+
+    def add(self, _id, terms):
+        """
+        Indexa (ou reindexa) um documento.
+
+        Args:
+            _id: ID do documento
+            terms: Termos do documento, com repetições
+        """
+        self.remove(_id)
+        frequencies = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+
+        # Números internos sempre crescentes mantêm as listas de postings ordenadas
+        number = len(self.doc_ids)
+        self.doc_ids.append(_id)
+        self.doc_numbers[_id] = number
+        self.doc_lengths.append(len(terms))
+        self.total_length += len(terms)
+        self._doc_terms[number] = tuple(frequencies)
+        for term, frequency in frequencies.items():
+            numbers, counts = self.postings.setdefault(term, (array("I"), array("H")))
+            numbers.append(number)
+            counts.append(min(frequency, 0xFFFF))
+
+    def remove(self, _id):
+        """
+        Remove um documento do índice, se existir.
+        """
+        number = self.doc_numbers.pop(_id, None)
+        if number is None:
+            return
+        self.doc_ids[number] = None
+        self.total_length -= self.doc_lengths[number]
+        for term in self._doc_terms.pop(number, ()):
+            numbers, counts = self.postings[term]
+            position = bisect_left(numbers, number)
+            del numbers[position]
+            del counts[position]
+            if not numbers:
+                del self.postings[term]
+
+    def search(self, terms):
+        """
+        Busca os documentos que contêm todos os termos, ordenados pela pontuação BM25.
+
+        Args:
+            terms: Termos da consulta
+
+        Returns:
+            list: Pares (ID do documento, pontuação), da maior para a menor pontuação
+        """
+        terms = list(dict.fromkeys(terms))
+        if not terms or not self.doc_numbers:
+            return []
+        lists = [self.postings.get(term) for term in terms]
+        if any(entry is None for entry in lists):
+            return []
+
+        # Interseção a partir da lista mais curta
+        ordered = sorted(zip(terms, lists), key=lambda pair: len(pair[1][0]))
+        shortest_numbers, _ = ordered[0][1]
+        matches = []
+        for number in shortest_numbers:
+            positions = []
+            for _, (numbers, _) in ordered:
+                position = bisect_left(numbers, number)
+                if position == len(numbers) or numbers[position] != number:
+                    break
+                positions.append(position)
+            else:
+                matches.append((number, positions))
+
+        doc_count = len(self.doc_numbers)
+        avg_length = self.total_length / doc_count if doc_count else 0
+        idfs = [math.log(1 + (doc_count - len(numbers) + 0.5) / (len(numbers) + 0.5))
+                for _, (numbers, _) in ordered]
+
+        result = []
+        for number, positions in matches:
+            length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[number] / (avg_length or 1)
+            score = 0.0
+            for idf, position, (_, (_, counts)) in zip(idfs, positions, ordered):
+                tf = counts[position]
+                score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+            result.append((self.doc_ids[number], score))
+        result.sort(key=lambda pair: (-pair[1], pair[0]))
+        return result
+
+    def compact(self):
+        """
+        Renumera os documentos ativos, descartando as posições dos removidos.
+        """
+        active = [(_id, number) for number, _id in enumerate(self.doc_ids) if _id is not None]
+        documents = {}
+        for term, (numbers, counts) in self.postings.items():
+            for number, count in zip(numbers, counts):
+                documents.setdefault(number, []).extend([term] * count)
+        self.__init__()
+        for _id, number in active:
+            self.add(_id, documents.get(number, []))
+
+
+def property_terms(p):
+    """
+    Retorna os termos indexados de um imóvel: título (com peso) e descrição.
+
+    Args:
+        p: Imóvel
+
+    Returns:
+        list: Termos normalizados
+    """
+    return tokenize(p.get("title")) * TITLE_WEIGHT + tokenize(p.get("description"))
+
+
+# Índice dos imóveis, construído no primeiro uso e mantido pelas notificações do data_manager
+_property_index = None
+_property_index_lock = threading.Lock()
+
+
+def _on_property_change(old, new):
+    with _property_index_lock:
+        if _property_index is None:
+            return
+        if new is None:
+            _property_index.remove(old["id"])
+        else:
+            _property_index.add(new["id"], property_terms(new))
+        # Remoções deixam posições vazias; renumera quando passam da metade, em
+        # segundo plano (ou aqui mesmo, se o agendador de tarefas não está rodando)
+        if _needs_compaction(_property_index) and not scheduler.submit(
+                "compact-search-index", _compact_property_index, priority=PRIORITY_LOW):
+            _property_index.compact()
+
+
+def _needs_compaction(index):
+    return len(index.doc_ids) > 2 * max(len(index), 16)
+
+
+def _compact_property_index():
+    with _property_index_lock:
+        if _property_index is not None and _needs_compaction(_property_index):
+            _property_index.compact()
+
+
+add_listener("properties", _on_property_change)
+
+
+def _get_property_index():
+    """
+    Retorna o índice invertido dos imóveis, construindo-o no primeiro uso.
+    Deve ser chamada com _property_index_lock adquirida.
+    """
+    global _property_index
+    if _property_index is None:
+        index = InvertedIndex()
+        for p in load_data("properties"):
+            index.add(p["id"], property_terms(p))
+        _property_index = index
+    return _property_index
+
+
+def search_properties_text(query):
+    """
+    Busca imóveis cujo título ou descrição contêm todos os termos da consulta.
+
+    Args:
+        query: Texto da consulta (ex.: "vista para o mar")
+
+    Returns:
+        list: Pares (ID do imóvel, pontuação BM25), do mais para o menos relevante
+            (vazia se a consulta não tiver termos indexáveis, ex.: só palavras de
+            STOPWORDS), ou None se a consulta estiver vazia
+    """
+    if not query or not query.strip():
+        return None
+    terms = tokenize(query)
+    if not terms:
+        return []
+    with _property_index_lock:
+        return _get_property_index().search(terms)
@@ -0,0 +1,139 @@
+"""
+Módulo de sessões de usuário.
+Emite, no login, um token de sessão assinado (itsdangerous) com o ID e o tipo
+do usuário, e mantém um cache em memória das sessões já verificadas, com
+tamanho máximo e expiração. Assim, autorizar uma requisição não exige ler a
+coleção de usuários.
+
+O token é autossuficiente: a assinatura e a validade são verificadas sem
+acesso a dados, então sessões que saíram do cache (ou criadas em outro
+processo com a mesma chave, como uma réplica de leitura) continuam válidas.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# Validade de uma sessão, em segundos
+SESSION_TTL_SECONDS = 8 * 3600
+
+# Número máximo de sessões mantidas no cache
+SESSION_MAX_ENTRIES = 10000
+
+
+class SessionStore:
+    """
+    Cache de sessões com tamanho máximo (descarta a menos usada) e expiração.
+
+    Attributes:
+        max_entries: Número máximo de sessões
+    """
+
+    def __init__(self, max_entries=SESSION_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token):
+        """
+        Retorna a sessão de um token, ou None se não estiver no cache ou tiver expirado.
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            session, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return session
+
+    def put(self, token, session, expires_at):
+        """
+        Guarda a sessão de um token até expires_at (timestamp).
+        """
+        with self._lock:
+            self._entries[token] = (session, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_serializer = URLSafeTimedSerializer(secrets.token_hex(32), salt="session")
+_store = SessionStore()
+_ttl_seconds = SESSION_TTL_SECONDS
+_required = True
+
+
+def configure_sessions(secret_key, ttl_seconds=SESSION_TTL_SECONDS, max_entries=SESSION_MAX_ENTRIES,
+                       required=True):
+    """
+    Define a chave de assinatura, a validade e o tamanho do cache das sessões.
+    Sessões emitidas antes com outra chave deixam de ser aceitas.
+
+    Args:
+        secret_key: Chave secreta usada para assinar os tokens
+        ttl_seconds: Validade de cada sessão, em segundos
+        max_entries: Número máximo de sessões no cache
+        required: Se False, rotas que recebem o ID do usuário também aceitam
+            requisições sem token, buscando o usuário pelo ID (obsoleto)
+    """
+    global _serializer, _store, _ttl_seconds, _required
+    if ttl_seconds <= 0 or max_entries < 1:
+        raise ValueError("Validade e tamanho do cache de sessões devem ser positivos")
+    _serializer = URLSafeTimedSerializer(secret_key, salt="session")
+    _store = SessionStore(max_entries)
+    _ttl_seconds = ttl_seconds
+    _required = required
+
+
+def sessions_required():
+    """
+    Indica se as rotas que recebem o ID do usuário exigem o token de sessão.
+    """
+    return _required
+
+
+def create_session(user):
+    """
+    Cria uma sessão para o usuário.
+
+    Args:
+        user: Usuário autenticado (com id e user_type)
+
+    Returns:
+        tuple: (token, validade em segundos)
+    """
+    token = _serializer.dumps({"uid": user["id"], "typ": user["user_type"]})
+    _store.put(token, {"user_id": user["id"], "user_type": user["user_type"]}, time.time() + _ttl_seconds)
+    return token, _ttl_seconds
+
+
+def get_session(token):
+    """
+    Retorna a sessão de um token, sem acessar os dados.
+
+    Args:
+        token: Token emitido por create_session()
+
+    Returns:
+        dict: user_id e user_type da sessão, ou None se o token for inválido ou tiver expirado
+    """
+    session = _store.get(token)
+    if session is not None:
+        return session
+    try:
+        payload, issued_at = _serializer.loads(token, max_age=_ttl_seconds, return_timestamp=True)
+        session = {"user_id": payload["uid"], "user_type": payload["typ"]}
+    except (BadSignature, KeyError, TypeError):
+        return None
+    _store.put(token, session, issued_at.timestamp() + _ttl_seconds)
+    return session
+
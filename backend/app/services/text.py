@@ -0,0 +1,45 @@
+"""
+Módulo de tratamento de texto.
+Concentra a normalização usada nas buscas (cidade, endereço e texto livre),
+para que todas comparem os textos da mesma forma.
+"""
+
+import re
+import unicodedata
+
+# Palavras muito frequentes, ignoradas na busca por texto livre
+STOPWORDS = frozenset({
+    "a", "ao", "aos", "as", "com", "da", "das", "de", "do", "dos", "e", "em",
+    "na", "nas", "no", "nos", "o", "os", "ou", "para", "pela", "pelo", "por",
+    "um", "uma",
+})
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    """
+    Normaliza um texto removendo acentos e convertendo para minúsculas.
+    
+    Args:
+        text: Texto a ser normalizado
+        
+    Returns:
+        str: Texto normalizado
+    """
+    if not text:
+        return ""
+    return unicodedata.normalize("NFD", text).encode("ascii", "ignore").decode("utf-8").lower()
+
+
+def tokenize(text):
+    """
+    Divide um texto em termos normalizados, sem as palavras de STOPWORDS.
+    
+    Args:
+        text: Texto a ser dividido
+        
+    Returns:
+        list: Termos na ordem em que aparecem
+    """
+    return [term for term in _TOKEN_PATTERN.findall(normalize(text)) if term not in STOPWORDS]
@@ -0,0 +1,243 @@
+"""
+Módulo dos formatos de arquivo das coleções.
+Codifica e decodifica os registros de uma coleção em um dos formatos:
+- "json": lista JSON indentada (formato original, legível)
+- "jsonl": um registro JSON compacto por linha
+- "binary": registros JSON compactos com uma tabela de tamanhos e, opcionalmente,
+  um índice por ID para ler um registro sem decodificar os demais
+
+O formato de um arquivo é reconhecido pelos primeiros bytes, então arquivos
+em formatos diferentes convivem no mesmo diretório e qualquer leitor (carga,
+carga em outros processos, restauração de snapshots) lê todos eles.
+
+Estrutura do formato binário (inteiros little-endian, sem sinal):
+    cabeçalho: MAGIC (4 bytes), versão (1), flags (1), número de registros N (4),
+               tamanho do corpo (8)
+    tamanhos: N inteiros de 4 bytes, o tamanho do JSON de cada registro
+    corpo: "[registro,registro,...]", uma lista JSON compacta, decodificada de uma vez na carga
+    índice (flag FLAG_INDEX): N CRC32 dos IDs em ordem crescente (4 bytes cada),
+            seguidos da posição de cada registro na lista (4 bytes cada)
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, Dict, List, Optional
+
+FORMATS = ("json", "jsonl", "binary")
+
+MAGIC = b"AIDB"
+VERSION = 1
+FLAG_INDEX = 1
+
+_HEADER = struct.Struct("<4sBBIQ")
+
+# Codificador compacto reutilizado (json.dumps com argumentos cria um codificador por chamada)
+_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _uint32_array(values=()) -> array:
+    result = array("I", values)
+    if result.itemsize != 4:
+        result = array("L", values)
+    return result
+
+
+def _id_hash(_id: Any) -> int:
+    return zlib.crc32(str(_id).encode("utf-8"))
+
+
+def detect_format(head: bytes) -> Optional[str]:
+    """
+    Reconhece o formato de um arquivo pelos primeiros bytes.
+
+    Args:
+        head: Início do conteúdo do arquivo
+
+    Returns:
+        str: Formato do arquivo, ou None se estiver vazio
+    """
+    if head.startswith(MAGIC):
+        return "binary"
+    stripped = head.lstrip()
+    if not stripped:
+        return None
+    return "jsonl" if stripped[:1] == b"{" else "json"
+
+
+def detect_file_format(file_path: str) -> Optional[str]:
+    """
+    Reconhece o formato de um arquivo de coleção (ver detect_format()).
+    """
+    with open(file_path, "rb") as f:
+        return detect_format(f.read(64))
+
+
+def encode(items: List[Dict[str, Any]], fmt: str = "json", index: bool = True) -> bytes:
+    """
+    Codifica os registros de uma coleção.
+
+    Args:
+        items: Registros
+        fmt: Formato (ver FORMATS)
+        index: No formato binário, inclui o índice por ID
+
+    Returns:
+        bytes: Conteúdo do arquivo
+    """
+    if fmt == "json":
+        return json.dumps(items, ensure_ascii=False, indent=2).encode("utf-8")
+    if fmt == "jsonl":
+        return "".join(_compact(item) + "\n" for item in items).encode("utf-8")
+    if fmt != "binary":
+        raise ValueError(f"Formato de armazenamento inválido: {fmt}")
+
+    records = [_compact(item).encode("utf-8") for item in items]
+    body = b"[" + b",".join(records) + b"]"
+    parts = [_HEADER.pack(MAGIC, VERSION, FLAG_INDEX if index else 0, len(records), len(body)),
+             _uint32_array(map(len, records)).tobytes(), body]
+    if index:
+        entries = sorted((_id_hash(item.get("id")), position) for position, item in enumerate(items))
+        parts.append(_uint32_array(h for h, _ in entries).tobytes())
+        parts.append(_uint32_array(p for _, p in entries).tobytes())
+    return b"".join(parts)
+
+
+def decode(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Decodifica o conteúdo de um arquivo de coleção, em qualquer formato.
+
+    Args:
+        data: Conteúdo do arquivo
+
+    Returns:
+        List[Dict[str, Any]]: Registros
+
+    Raises:
+        ValueError: Se o conteúdo estiver corrompido (json.JSONDecodeError é subclasse)
+    """
+    fmt = detect_format(data[:64])
+    if fmt is None:
+        return []
+    if fmt == "json":
+        return json.loads(data)
+    if fmt == "jsonl":
+        # JSON compacto não tem quebras de linha: as linhas viram uma lista decodificada
+        # de uma vez. Linhas em branco (ex.: arquivo editado à mão) são ignoradas
+        lines = [line for line in data.splitlines() if line.strip()]
+        try:
+            return json.loads(b"[" + b",".join(lines) + b"]")
+        except ValueError:
+            pass
+        # Alguma linha inválida: decodifica uma a uma para apontar qual
+        for number, line in enumerate(data.splitlines(), 1):
+            if line.strip():
+                try:
+                    json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"Linha {number} inválida: {e}") from e
+        raise ValueError("Conteúdo jsonl inválido")
+
+    if len(data) < _HEADER.size:
+        raise ValueError("Arquivo binário truncado")
+    _, version, _, count, body_length = _HEADER.unpack_from(data, 0)
+    if version != VERSION:
+        raise ValueError(f"Versão de arquivo binário não suportada: {version}")
+    start = _HEADER.size + 4 * count
+    if start + body_length > len(data):
+        raise ValueError("Arquivo binário truncado")
+    records = json.loads(data[start:start + body_length])
+    if len(records) != count:
+        raise ValueError("Número de registros não confere com o cabeçalho")
+    return records
+
+
+class _OffsetIndex:
+    """
+    Índice de um arquivo binário: CRC32 dos IDs em ordem, posições e início de cada registro.
+    """
+
+    def __init__(self, f, count: int, body_length: int):
+        lengths = _uint32_array()
+        lengths.frombytes(f.read(4 * count))
+        body_start = _HEADER.size + 4 * count
+        # Registro i começa depois de "[" e dos i registros anteriores, cada um seguido de ","
+        self.starts = [body_start + 1 + total + i
+                       for i, total in enumerate(accumulate(lengths, initial=0))][:count]
+        self.lengths = lengths
+        f.seek(body_start + body_length)
+        self.hashes = _uint32_array()
+        self.hashes.frombytes(f.read(4 * count))
+        self.positions = _uint32_array()
+        self.positions.frombytes(f.read(4 * count))
+        if len(self.hashes) != count or len(self.positions) != count:
+            raise ValueError("Índice do arquivo binário truncado")
+
+    def candidates(self, _id: Any) -> List[int]:
+        """
+        Retorna as posições dos registros cujo ID tem o mesmo CRC32 de _id.
+        """
+        h = _id_hash(_id)
+        i = bisect_left(self.hashes, h)
+        result = []
+        while i < len(self.hashes) and self.hashes[i] == h:
+            result.append(self.positions[i])
+            i += 1
+        return result
+
+
+# Índices dos arquivos binários já lidos: caminho -> ((mtime, tamanho), _OffsetIndex)
+_offset_indexes: Dict[str, tuple] = {}
+_offset_indexes_lock = threading.Lock()
+
+
+def _offset_index(f, file_path: str) -> Optional[_OffsetIndex]:
+    stat = os.fstat(f.fileno())
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _offset_indexes_lock:
+        cached = _offset_indexes.get(file_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size or not header.startswith(MAGIC):
+        return None
+    _, version, flags, count, body_length = _HEADER.unpack(header)
+    if version != VERSION or not flags & FLAG_INDEX:
+        return None
+    index = _OffsetIndex(f, count, body_length)
+    with _offset_indexes_lock:
+        _offset_indexes[file_path] = (key, index)
+    return index
+
+
+def read_record(file_path: str, _id: Any) -> tuple:
+    """
+    Lê um único registro de um arquivo binário com índice, sem decodificar os demais.
+
+    Args:
+        file_path: Caminho do arquivo
+        _id: ID do registro
+
+    Returns:
+        tuple: (True, registro ou None se não estiver no arquivo), ou (False, None)
+            se o arquivo não existe ou não tem índice (é preciso ler o arquivo inteiro)
+    """
+    try:
+        with open(file_path, "rb") as f:
+            index = _offset_index(f, file_path)
+            if index is None:
+                return False, None
+            for position in index.candidates(_id):
+                f.seek(index.starts[position])
+                item = json.loads(f.read(index.lengths[position]))
+                if item.get("id") == _id:
+                    return True, item
+            return True, None
+    except (OSError, ValueError, struct.error):
+        return False, None
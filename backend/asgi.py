@@ -0,0 +1,16 @@
+"""
+Script de inicialização da aplicação em modo ASGI.
+Executado por um servidor ASGI, a partir de backend/ (ver app/asgi.py):
+
+    uvicorn asgi:app --port 5000
+"""
+import logging
+import os
+
+from app.asgi import ASGI_WORKERS, create_asgi_app
+
+# Exibe os logs informativos da aplicação (ex.: tempo de carga de cada coleção)
+logging.basicConfig(level=logging.INFO)
+
+# Cria a aplicação e a adapta para ASGI. ASGI_WORKERS limita as threads que executam as rotas
+app = create_asgi_app(max_workers=int(os.environ.get("ASGI_WORKERS", ASGI_WORKERS)))
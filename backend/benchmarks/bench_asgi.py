@@ -0,0 +1,174 @@
+"""
+Benchmark dos modos de execução WSGI e ASGI.
+Simula, no mesmo processo, muitos locadores com o stream de reservas aberto
+(/api/locador/reservations/<owner_id>/stream) enquanto outros clientes
+consultam a listagem de reservas, e mede em cada modo:
+- threads em uso com os streams abertos
+- vazão das consultas com os streams abertos
+- tempo até todos os streams receberem uma alteração de reserva
+
+No modo WSGI, cada stream ocupa uma thread (como em um servidor WSGI com
+threads); no modo ASGI, os streams são corrotinas no loop e as consultas
+rodam no pool de ASGI_WORKERS threads. Os dados ficam em um diretório temporário.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_asgi [--subscribers 500] [--polls 2000] [--workers 16]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("RESERVATION_ARCHIVE_INTERVAL", "0")
+os.environ.setdefault("RATE_LIMITS", "off")
+os.environ.setdefault("CONCURRENCY_LIMITS", "off")
+
+from app import create_app, data_manager  # noqa: E402
+from app.asgi import ASGIAdapter  # noqa: E402
+from app.services.session_service import create_session  # noqa: E402
+
+OWNER_ID = str(uuid.uuid4())
+EVENT = b"event: reservation_updated"
+
+
+def populate(reservations):
+    owner = data_manager.save_data("users", {"id": OWNER_ID, "name": "L", "email": "l@l.com", "user_type": "locador"})
+    prop = data_manager.save_data("properties", {
+        "title": "Casa", "description": "", "address": "", "city": "", "price_per_day": 100,
+        "available_from": "2026-01-01", "available_until": "2030-12-31", "owner_id": OWNER_ID,
+    })
+    renter = data_manager.save_data("users", {"name": "R", "email": "r@r.com", "user_type": "locatario"})
+    for i in range(reservations):
+        last = data_manager.save_data("reservations", {
+            "property_id": prop["id"], "renter_id": renter["id"],
+            "start_date": f"2027-{i % 12 + 1:02d}-01", "end_date": f"2027-{i % 12 + 1:02d}-05", "approved": None,
+        })
+    token, _ = create_session(owner)
+    return last, {"Authorization": f"Bearer {token}"}
+
+
+def touch(reservation):
+    reservation = data_manager.find_by_id("reservations", reservation["id"])
+    reservation["approved"] = not reservation["approved"]
+    data_manager.save_data("reservations", reservation)
+
+
+def run_wsgi(app, reservation, headers, subscribers, polls, workers):
+    client = app.test_client()
+    ready, received = threading.Barrier(subscribers + 1), []
+
+    def subscribe():
+        response = client.get(f"/api/locador/reservations/{OWNER_ID}/stream", headers=headers)
+        chunks = iter(response.response)
+        next(chunks)  # retry:
+        ready.wait()
+        for chunk in chunks:
+            if EVENT in chunk:
+                received.append(time.perf_counter())
+                break
+        response.close()
+
+    threads = [threading.Thread(target=subscribe, daemon=True) for _ in range(subscribers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    thread_count = threading.active_count()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda _: client.get(f"/api/locador/reservations/{OWNER_ID}", headers=headers).status_code, range(polls)))
+    polls_per_s = polls / (time.perf_counter() - started)
+
+    published = time.perf_counter()
+    touch(reservation)
+    for thread in threads:
+        thread.join()
+    return thread_count, polls_per_s, (max(received) - published) * 1000
+
+
+def scope(path, headers):
+    headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+    return {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": headers,
+            "server": ("bench", 80), "client": ("127.0.0.1", 1), "scheme": "http", "http_version": "1.1"}
+
+
+async def asgi_request(adapter, path, headers, until=None, subscribed=None):
+    disconnect = asyncio.Event()
+    received = {}
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            if subscribed is not None and not received:
+                received["subscribed"] = True
+                subscribed()
+            if until is not None and until in message.get("body", b""):
+                received["at"] = time.perf_counter()
+                disconnect.set()
+
+    await adapter(scope(path, headers), receive, send)
+    return received.get("at")
+
+
+async def run_asgi_async(adapter, reservation, headers, subscribers, polls):
+    loop = asyncio.get_running_loop()
+    subscribed = asyncio.Semaphore(0)
+    streams = [asyncio.ensure_future(asgi_request(adapter, f"/api/locador/reservations/{OWNER_ID}/stream", headers,
+                                                  until=EVENT, subscribed=subscribed.release))
+               for _ in range(subscribers)]
+    for _ in range(subscribers):
+        await subscribed.acquire()
+    thread_count = threading.active_count()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[asgi_request(adapter, f"/api/locador/reservations/{OWNER_ID}", headers) for _ in range(polls)])
+    polls_per_s = polls / (time.perf_counter() - started)
+
+    published = time.perf_counter()
+    await loop.run_in_executor(adapter.executor, touch, reservation)
+    received = await asyncio.gather(*streams)
+    return thread_count, polls_per_s, (max(received) - published) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--reservations", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        data_manager.DATA_DIR = data_dir
+        app = create_app()
+        reservation, headers = populate(args.reservations)
+        baseline = threading.active_count()
+        print(f"Streams: {args.subscribers}  consultas: {args.polls}  threads de trabalho: {args.workers}  "
+              f"(threads antes: {baseline})")
+        print(f"{'modo':<5} {'threads':>8} {'consultas/s':>12} {'entrega ms':>11}")
+
+        threads, polls_per_s, fanout_ms = run_wsgi(app, reservation, headers, args.subscribers, args.polls, args.workers)
+        print(f"{'wsgi':<5} {threads:>8} {polls_per_s:>12.0f} {fanout_ms:>11.1f}")
+
+        adapter = ASGIAdapter(app, max_workers=args.workers)
+        threads, polls_per_s, fanout_ms = asyncio.run(
+            run_asgi_async(adapter, reservation, headers, args.subscribers, args.polls))
+        adapter.executor.shutdown()
+        print(f"{'asgi':<5} {threads:>8} {polls_per_s:>12.0f} {fanout_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark da busca geográfica.
+Compara a busca por raio no índice em grade (GeoGridIndex) com uma varredura
+completa calculando a distância haversine de todos os imóveis.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_geo [--listings 100000] [--queries 500] [--radius 10]
+"""
+
+import argparse
+import random
+import time
+
+from app.services.geo import GeoGridIndex, haversine_km
+
+# Retângulo aproximado do território brasileiro
+BRAZIL_BBOX = (-33.7, -73.9, 5.3, -34.8)
+
+
+def brute_force(points, lat, lng, radius_km):
+    result = []
+    for _id, (plat, plng) in points.items():
+        distance = haversine_km(lat, lng, plat, plng)
+        if distance <= radius_km:
+            result.append((_id, distance))
+    result.sort(key=lambda pair: (pair[1], pair[0]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--radius", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    min_lat, min_lng, max_lat, max_lng = BRAZIL_BBOX
+
+    # Metade dos imóveis concentrada em capitais, como em um catálogo real
+    centers = [(-23.55, -46.63), (-22.91, -43.17), (-19.92, -43.94), (-12.97, -38.51), (-8.05, -34.88)]
+    points = {}
+    for i in range(args.listings):
+        if i % 2:
+            clat, clng = rng.choice(centers)
+            points[str(i)] = (clat + rng.gauss(0, 0.2), clng + rng.gauss(0, 0.2))
+        else:
+            points[str(i)] = (rng.uniform(min_lat, max_lat), rng.uniform(min_lng, max_lng))
+
+    started = time.perf_counter()
+    index = GeoGridIndex()
+    for _id, (lat, lng) in points.items():
+        index.upsert(_id, lat, lng)
+    build_s = time.perf_counter() - started
+
+    queries = [rng.choice(centers) for _ in range(args.queries)]
+    queries = [(lat + rng.gauss(0, 0.1), lng + rng.gauss(0, 0.1)) for lat, lng in queries]
+
+    started = time.perf_counter()
+    indexed = [index.within_radius(lat, lng, args.radius) for lat, lng in queries]
+    index_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanned = [brute_force(points, lat, lng, args.radius) for lat, lng in queries]
+    scan_s = time.perf_counter() - started
+
+    assert indexed == scanned, "O índice retornou resultados diferentes da varredura completa"
+
+    hits = sum(len(r) for r in indexed) / len(indexed)
+    print(f"Imóveis: {args.listings}  consultas: {args.queries}  raio: {args.radius} km  "
+          f"resultados/consulta: {hits:.1f}")
+    print(f"Construção do índice: {build_s * 1000:.1f} ms")
+    print(f"Grade:     {index_s / args.queries * 1000:.3f} ms/consulta")
+    print(f"Varredura: {scan_s / args.queries * 1000:.3f} ms/consulta")
+    print(f"Ganho: {scan_s / index_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
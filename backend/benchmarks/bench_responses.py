@@ -0,0 +1,100 @@
+"""
+Benchmark das respostas grandes das rotas de listagem.
+Gera imóveis e reservas de um locador em um diretório temporário e mede, nas
+rotas /api/locatario/search e /api/locador/reservations/<owner_id>:
+- o tempo de serialização do corpo JSON em cada provedor (app/json_provider.py)
+- os bytes enviados e o tempo da requisição completa sem compressão, com
+  gzip e com br (se o pacote brotli estiver instalado), em cada provedor
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_responses [--properties 2000] [--reservations 5000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+os.environ.setdefault("RESERVATION_ARCHIVE_INTERVAL", "0")
+os.environ.setdefault("RATE_LIMITS", "off")
+os.environ.setdefault("CONCURRENCY_LIMITS", "off")
+
+from app import create_app, data_manager  # noqa: E402
+from app.compression import HAS_BROTLI  # noqa: E402
+from app.json_provider import HAS_ORJSON, create_json_provider  # noqa: E402
+from app.services.session_service import create_session  # noqa: E402
+
+OWNER_ID = str(uuid.uuid4())
+CITIES = ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Curitiba", "Florianópolis", "Salvador"]
+
+
+def populate(properties, reservations, rng):
+    owner = data_manager.save_data("users", {"id": OWNER_ID, "name": "Locador", "email": "l@l.com",
+                                             "user_type": "locador"})
+    renter = data_manager.save_data("users", {"name": "Locatário", "email": "r@r.com", "user_type": "locatario"})
+    ids = []
+    for i in range(properties):
+        prop = data_manager.save_data("properties", {
+            "title": f"Apartamento {i} com varanda", "description": "Próximo ao metrô, mobiliado, com vista " * 3,
+            "address": f"Rua {i}, {rng.randint(1, 2000)}", "city": rng.choice(CITIES),
+            "price_per_day": rng.randint(80, 900), "available_from": "2026-01-01", "available_until": "2030-12-31",
+            "owner_id": OWNER_ID, "image_url": f"https://example.com/{i}.jpg",
+        })
+        ids.append(prop["id"])
+    for i in range(reservations):
+        month = 1 + i % 12
+        data_manager.save_data("reservations", {
+            "property_id": rng.choice(ids), "renter_id": renter["id"], "start_date": f"2027-{month:02d}-01",
+            "end_date": f"2027-{month:02d}-05", "approved": rng.choice([True, False, None]),
+        })
+    token, _ = create_session(owner)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def timed(repeat, func):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--properties", type=int, default=2000)
+    parser.add_argument("--reservations", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    providers = ["stdlib"] + (["orjson"] if HAS_ORJSON else [])
+    encodings = ["identity", "gzip"] + (["br"] if HAS_BROTLI else [])
+    endpoints = {"search": "/api/locatario/search", "reservations": f"/api/locador/reservations/{OWNER_ID}"}
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        data_manager.DATA_DIR = data_dir
+        app = create_app()
+        auth = populate(args.properties, args.reservations, random.Random(args.seed))
+        client = app.test_client()
+        print(f"Imóveis: {args.properties}  reservas: {args.reservations}  repetições: {args.repeat}")
+        print(f"{'rota':<13} {'provedor':<8} {'codificação':<11} {'bytes':>10} {'serialização ms':>16} "
+              f"{'requisição ms':>14}")
+
+        for name, path in endpoints.items():
+            payload = json.loads(client.get(path, headers=auth).data)
+            for provider in providers:
+                app.json = create_json_provider(app, provider)
+                with app.app_context():
+                    serialize_s, _ = timed(args.repeat, lambda: app.json.response(payload))
+                for encoding in encodings:
+                    headers = dict(auth, **{"Accept-Encoding": encoding})
+                    request_s, response = timed(args.repeat, lambda: client.get(path, headers=headers))
+                    assert response.headers.get("Content-Encoding", "identity") == encoding
+                    print(f"{name:<13} {provider:<8} {encoding:<11} {len(response.data):>10} "
+                          f"{serialize_s * 1000:>16.2f} {request_s * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark dos formatos de arquivo das coleções.
+Grava a mesma coleção de reservas em cada formato de app/storage_format.py
+e mede o tamanho em disco, o tempo de gravação, o tempo de carga completa
+(_parse_file) e o tempo de leitura de registros isolados pelo ID (no formato
+binário, pelo índice de posições; nos demais, lendo o arquivo inteiro).
+Os arquivos são gravados em um diretório temporário.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_storage [--records 100000] [--lookups 200]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from app import data_manager
+from app.storage_format import FORMATS, read_record
+
+
+def reservation(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "property_id": f"p{i % 500}",
+        "renter_id": f"u{i % 2000}",
+        "start_date": "2025-07-01",
+        "end_date": "2025-07-05",
+        "approved": i % 3 == 0 or None,
+        "version": 1,
+    }
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def lookup_all(path, ids):
+    for _id in ids:
+        found, item = read_record(path, _id)
+        if not found:
+            item = next(r for r in data_manager._parse_file(path) if r["id"] == _id)
+        assert item["id"] == _id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    items = [reservation(i) for i in range(args.records)]
+    ids = [item["id"] for item in random.sample(items, min(args.lookups, len(items)))]
+    print(f"Registros: {args.records}  leituras por ID: {len(ids)}")
+    print(f"{'formato':<8} {'bytes':>12} {'gravação ms':>12} {'carga ms':>10} {'por ID ms':>10}")
+    with tempfile.TemporaryDirectory() as data_dir:
+        for fmt in FORMATS:
+            path = os.path.join(data_dir, f"reservations.{fmt}.json")
+            write_s = best_of(args.repeat, lambda: data_manager._dump_file(path, items, fmt=fmt))
+            load_s = best_of(args.repeat, lambda: data_manager._parse_file(path))
+            assert len(data_manager._parse_file(path)) == len(items)
+
+            # Sem índice, cada leitura por ID relê o arquivo: mede uma amostra menor
+            sample = ids if fmt == "binary" else ids[:5]
+            lookup_s = best_of(1, lambda: lookup_all(path, sample)) / len(sample)
+
+            print(f"{fmt:<8} {os.path.getsize(path):>12} {write_s * 1000:>12.1f} "
+                  f"{load_s * 1000:>10.1f} {lookup_s * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
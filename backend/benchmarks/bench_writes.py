@@ -0,0 +1,69 @@
+"""
+Benchmark das escritas por nível de durabilidade.
+Mede a vazão de save_data() com várias threads gravando reservas novas em
+uma coleção já populada, em cada nível de durabilidade do data_manager.
+Os arquivos são gravados em um diretório temporário.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_writes [--records 5000] [--writes 500] [--threads 8]
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app import data_manager
+
+
+def reservation(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "property_id": f"p{i % 500}",
+        "renter_id": f"u{i % 2000}",
+        "start_date": "2025-07-01",
+        "end_date": "2025-07-05",
+        "approved": None,
+    }
+
+
+def run(level, records, writes, threads):
+    with tempfile.TemporaryDirectory() as data_dir:
+        data_manager.DATA_DIR = data_dir
+        data_manager.configure_writes("sync")
+        data_manager.reset_cache()
+        data_manager._dump_file(data_manager._file_path("reservations"),
+                                [dict(reservation(i), version=1) for i in range(records)])
+        data_manager.configure_writes(level, interval=0.05, batch_size=500)
+        data_manager.load_data("reservations")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(lambda i: data_manager.save_data("reservations", reservation(i)), range(writes)))
+        write_s = time.perf_counter() - started
+        data_manager.flush()
+        total_s = time.perf_counter() - started
+        stats = data_manager.get_write_stats()
+        data_manager.configure_writes("sync")
+    return write_s, total_s, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"Registros iniciais: {args.records}  escritas: {args.writes}  threads: {args.threads}")
+    for level in data_manager.DURABILITY_LEVELS:
+        flushes_before = data_manager.get_write_stats()["flushes"]
+        write_s, total_s, stats = run(level, args.records, args.writes, args.threads)
+        flushes = stats["flushes"] - flushes_before
+        print(f"{level:<9} {args.writes / write_s:10.0f} escritas/s  "
+              f"(até gravar tudo: {total_s * 1000:8.1f} ms, lotes: {flushes})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,17 @@
 Script de inicialização da aplicação Flask.
 Este arquivo é responsável por iniciar o servidor de desenvolvimento.
 """
+import logging
+
 from app import create_app
 
-# Cria a aplicação Flask usando a função factory
-app = create_app()
+# Exibe os logs informativos da aplicação (ex.: tempo de carga de cada coleção)
+logging.basicConfig(level=logging.INFO)
+
+# Cria a aplicação Flask usando a função factory. Os processos dos pools
+# (ex.: miniaturas) importam este arquivo como "__mp_main__" e não a criam.
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     # Inicia o servidor de desenvolvimento com modo debug ativado
@@ -0,0 +1,27 @@
+"""
+Ponto de entrada dos processos que geram as miniaturas das imagens.
+Fica fora do pacote app para que os processos do pool (ver
+app/services/images.py) importem apenas este módulo e o Pillow, sem
+carregar a aplicação.
+"""
+
+import os
+
+
+def resize(source, target, max_side):
+    """
+    Gera uma miniatura com o maior lado limitado a max_side, mantendo a proporção.
+
+    Args:
+        source: Caminho da imagem original
+        target: Caminho da miniatura
+        max_side: Maior lado da miniatura, em pixels
+    """
+    from PIL import Image
+
+    tmp_path = f"{target}.tmp"
+    with Image.open(source) as image:
+        image_format = image.format
+        image.thumbnail((max_side, max_side))
+        image.save(tmp_path, format=image_format)
+    os.replace(tmp_path, target)
@@ -1,9 +1,10 @@
 // src/components/ProtectedRoute.tsx
 import { Navigate } from "react-router-dom";
 import { ReactNode } from "react";
-import { getLoggedUser } from "../utils/auth";
+import { getLoggedUser, getToken } from "../utils/auth";
 
 export default function ProtectedRoute({ children }: { children: ReactNode }) {
   const user = getLoggedUser();
-  return user ? <>{children}</> : <Navigate to="/login" />;
+  // Sessões anteriores ao token de sessão precisam fazer login de novo
+  return user && getToken() ? <>{children}</> : <Navigate to="/login" />;
 }
@@ -3,6 +3,9 @@ import 'bootstrap/dist/css/bootstrap.min.css';
 import React from 'react'
 import ReactDOM from 'react-dom/client'
 import App from './App'
+import { setupAuthInterceptors } from './utils/auth'
+
+setupAuthInterceptors()
 
 ReactDOM.createRoot(document.getElementById('root')!).render(
   <React.StrictMode>
@@ -10,6 +10,7 @@ export default function Login() {
       const res = await axios.post("http://localhost:5000/api/auth/login", { email });
       const user = res.data.user;
       localStorage.setItem("user", JSON.stringify(user));
+      localStorage.setItem("token", res.data.token);
       alert(`Bem-vindo, ${user.name}!`);
 
       // ✅ Recarrega o app com o usuário já salvo
@@ -1,11 +1,39 @@
 // src/utils/auth.ts
+import axios from "axios";
+
 export function getLoggedUser() {
     const data = localStorage.getItem("user");
     return data ? JSON.parse(data) : null;
   }
   
+  export function getToken() {
+    return localStorage.getItem("token");
+  }
+
   export function logout() {
     localStorage.removeItem("user");
+    localStorage.removeItem("token");
     window.location.href = "/login";
   }
+
+  // Envia o token de sessão (emitido no login) em todas as requisições
+  // e volta para o login quando a sessão expira
+  export function setupAuthInterceptors() {
+    axios.interceptors.request.use((config) => {
+      const token = getToken();
+      if (token) {
+        config.headers.Authorization = `Bearer ${token}`;
+      }
+      return config;
+    });
+    axios.interceptors.response.use(
+      (response) => response,
+      (error) => {
+        if (error.response?.status === 401 && getLoggedUser()) {
+          logout();
+        }
+        return Promise.reject(error);
+      }
+    );
+  }
   
\ No newline at end of file